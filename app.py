@@ -47,12 +47,31 @@ import streamlit as st
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
+from zoneinfo import ZoneInfo
 import time
+import bisect
+import math
+import random
+import os
+import re
+import sys
+import threading
+import functools
+import weakref
 import json
+import csv
+import logging
+import multiprocessing
+import pickle
 import hashlib
 import requests
+from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Tuple, Any
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
@@ -63,6 +82,13 @@ import urllib.parse
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # older yfinance raises plain HTTP errors when throttled
+    YFRateLimitError = ()
+
 # ============================================================================
 # PAGE CONFIGURATION
 # ============================================================================
@@ -481,13 +507,14 @@ def init_session_state():
             'wash_sale_window': 30,
             'default_chart_period': '6mo',
             'currency': 'USD',
+            'fetch_workers': 8,  # Parallel data requests
+            'fetch_timeout': 20,  # Seconds per ticker
+            'screener_universe': '',  # Local file listing the symbols to screen
         },
         
-        # Caching
-        'cached_data': {},
-        'cache_timestamp': {},
-        'benchmark_data': None,
-        'benchmark_timestamp': None,
+        # Caching (market data itself lives in the shared MARKET_CACHE)
+        'fetch_errors': {},
+        'awaiting_refresh': set(),  # normalized tickers shown stale while refreshing
         
         # UI state
         'last_refresh': None,
@@ -620,248 +647,1736 @@ class NotificationManager:
         })
 
 # ============================================================================
-# DATA FETCHING & CACHING
+# SHARED MARKET DATA CACHE
 # ============================================================================
 
-class DataFetcher:
-    """Unified data fetcher for stocks, crypto, and options"""
+class MarketDataCache:
+    """Thread-safe TTL cache shared by every session in the process.
     
-    CACHE_DURATION = 60  # seconds
+    Entries are kept in least-recently-used order and evicted once their estimated
+    size exceeds the memory budget; expired entries go first.
+    """
     
-    # Crypto mapping for yfinance
-    CRYPTO_MAP = {
-        'BTC': 'BTC-USD',
-        'ETH': 'ETH-USD',
-        'SOL': 'SOL-USD',
-        'ADA': 'ADA-USD',
-        'DOT': 'DOT-USD',
-        'DOGE': 'DOGE-USD',
-        'XRP': 'XRP-USD',
-        'AVAX': 'AVAX-USD',
-        'MATIC': 'MATIC-USD',
-        'LINK': 'LINK-USD',
-        'UNI': 'UNI-USD',
-        'ATOM': 'ATOM-USD',
-        'LTC': 'LTC-USD',
-        'BCH': 'BCH-USD',
-        'SHIB': 'SHIB-USD',
-    }
+    def __init__(self, default_ttl: float = 60, max_bytes: int = 256 * 1024 * 1024):
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size), oldest first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._attached = {}  # key prefix -> (sizeof(name), release(name))
     
-    @staticmethod
-    def is_crypto(ticker: str) -> bool:
-        """Check if ticker is a cryptocurrency"""
-        return ticker.upper() in DataFetcher.CRYPTO_MAP or ticker.upper().endswith('-USD')
+    def attach(self, prefix: str, sizeof, release):
+        """Account for data kept outside the cache on behalf of entries under `prefix`.
+        
+        sizeof(name) gives the bytes an entry holds there (name is the key without the
+        prefix); release(name) is called once the entry leaves the cache.
+        """
+        with self._lock:
+            self._attached[prefix] = (sizeof, release)
     
-    @staticmethod
-    def normalize_ticker(ticker: str) -> str:
-        """Normalize ticker for yfinance"""
-        ticker = ticker.upper().strip()
-        if ticker in DataFetcher.CRYPTO_MAP:
-            return DataFetcher.CRYPTO_MAP[ticker]
-        return ticker
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            
+            self.misses += 1
+            return None
     
-    @staticmethod
-    def get_data(ticker: str, force_refresh: bool = False) -> Optional[Dict]:
-        """Fetch comprehensive data for any asset type"""
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the stored value even if it has expired (no hit/miss accounting)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value for ttl seconds (default_ttl if not given)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        size = self._measure(key, value)
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[2]
+            
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            dropped = self._evict()
         
-        original_ticker = ticker.upper().strip()
-        normalized_ticker = DataFetcher.normalize_ticker(ticker)
-        is_crypto = DataFetcher.is_crypto(original_ticker)
+        self._release(dropped)
+    
+    def resize(self, key: str):
+        """Re-estimate an entry whose value has grown in place, evicting others if needed"""
         
-        cache_key = f"data_{normalized_ticker}"
-        current_time = datetime.now()
+        value = self.peek(key)
+        if value is None:
+            return
+        size = self._measure(key, value)
         
-        # Check cache
-        if not force_refresh and cache_key in st.session_state.cached_data:
-            cache_time = st.session_state.cache_timestamp.get(cache_key)
-            if cache_time and (current_time - cache_time).seconds < DataFetcher.CACHE_DURATION:
-                return st.session_state.cached_data[cache_key]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not value:
+                return
+            self._entries[key] = (value, entry[1], size)
+            self._bytes += size - entry[2]
+            dropped = self._evict()
         
-        try:
-            stock = yf.Ticker(normalized_ticker)
-            info = stock.info
-            
-            # Get current price
-            current_price = (
-                info.get('currentPrice') or 
-                info.get('regularMarketPrice') or
-                info.get('previousClose') or
-                info.get('regularMarketPreviousClose')
-            )
+        self._release(dropped)
+    
+    def invalidate(self, keys: List[str]):
+        """Drop the given keys so the next read refetches them"""
+        dropped = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry:
+                    self._bytes -= entry[2]
+                    dropped.append(key)
+        
+        self._release(dropped)
+    
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            dropped = list(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+        
+        self._release(dropped)
+    
+    def stats(self) -> Dict:
+        """Entry count, memory footprint and hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0,
+            }
+    
+    def _measure(self, key: str, value: Any) -> int:
+        """A value's size plus what attached stores hold for its key (called without the lock)"""
+        
+        size = self.sizeof(value)
+        with self._lock:
+            attached = list(self._attached.items())
+        for prefix, (sizeof, _) in attached:
+            if key.startswith(prefix):
+                size += sizeof(key[len(prefix):])
+        return size
+    
+    def _evict(self) -> List[str]:
+        """Drop expired, then least recently used, entries until within budget (lock held);
+        returns the dropped keys
+        """
+        
+        dropped = []
+        if self._bytes <= self.max_bytes:
+            return dropped
+        
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[1] <= now]
+        candidates = iter(expired + list(self._entries.keys()))
+        
+        # Never evict the entry that was just stored
+        newest = next(reversed(self._entries))
+        for key in candidates:
+            if self._bytes <= self.max_bytes:
+                break
+            if key == newest or key not in self._entries:
+                continue
             
-            if not current_price:
-                # Try to get from history
-                hist = stock.history(period="5d")
-                if not hist.empty:
-                    current_price = hist['Close'].iloc[-1]
+            _, _, size = self._entries.pop(key)
+            self._bytes -= size
+            self.evictions += 1
+            dropped.append(key)
+        
+        return dropped
+    
+    def _release(self, keys: List[str]):
+        """Let attached stores free what dropped entries held (called without the lock)"""
+        
+        with self._lock:
+            attached = list(self._attached.items())
+            gone = [key for key in keys if key not in self._entries]
+        
+        for key in gone:
+            for prefix, (_, release) in attached:
+                if key.startswith(prefix):
+                    release(key[len(prefix):])
+    
+    @staticmethod
+    def sizeof(value: Any) -> int:
+        """Estimate the memory held by a cached value in bytes.
+        
+        DataFrames shared between entries are counted in each, which overestimates.
+        """
+        
+        if isinstance(value, (MarketRecord, IndicatorSeries)):
+            return value.nbytes()
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            usage = value.memory_usage(deep=True)
+            return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                sys.getsizeof(k) + MarketDataCache.sizeof(v) for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple, set)):
+            return sys.getsizeof(value) + sum(MarketDataCache.sizeof(v) for v in value)
+        return sys.getsizeof(value)
+
+
+@st.cache_resource
+def get_market_cache() -> MarketDataCache:
+    """Create the process-wide cache once; Streamlit re-runs this script on every interaction"""
+    budget_mb = float(os.environ.get('PORTFOLIO_CACHE_MB', 256))
+    return MarketDataCache(max_bytes=int(budget_mb * 1024 * 1024))
+
+
+MARKET_CACHE = get_market_cache()
+
+
+class SingleFlight:
+    """Coalesces concurrent requests for the same key onto the one already in progress"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> Future of the in-progress request
+    
+    def claim(self, keys: List[str]) -> Tuple[List[str], Dict[str, Future]]:
+        """Split keys into (ones the caller must fetch, futures of ones already in flight).
+        
+        The caller must resolve() every key it was handed to fetch, even on failure.
+        """
+        
+        leading, waiting = [], {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key in self._flights:
+                    waiting[key] = self._flights[key]
                 else:
-                    return None
-            
-            # Get historical data
-            hist = stock.history(period="1y")
-            
-            # Calculate technical indicators
-            technicals = DataFetcher._calculate_technicals(hist, current_price) if not hist.empty else {}
+                    self._flights[key] = Future()
+                    leading.append(key)
+        return leading, waiting
+    
+    def resolve(self, key: str, result: Any):
+        """Publish the result of a claimed key to everyone waiting on it"""
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+
+
+@st.cache_resource
+def get_fetch_flights() -> SingleFlight:
+    """Create the process-wide in-flight request registry once"""
+    return SingleFlight()
+
+
+FETCH_FLIGHTS = get_fetch_flights()
+
+# ============================================================================
+# MARKET DATA PROVIDERS
+# ============================================================================
+
+class MarketDataProvider(ABC):
+    """Source of raw market data; everything above this layer only talks to PROVIDER"""
+    
+    name = 'base'
+    remote = True  # subject to upstream rate limits
+    
+    @abstractmethod
+    def download(self, symbols: List[str], **date_range) -> pd.DataFrame:
+        """Daily bars for several symbols, columns grouped by symbol (period= or start=)"""
+    
+    @abstractmethod
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        """Daily bars for one symbol"""
+    
+    @abstractmethod
+    def quote_bars(self, symbol: str) -> Tuple[pd.DataFrame, Dict]:
+        """Last five daily bars plus the chart metadata (live price, day range)"""
+    
+    @abstractmethod
+    def info(self, symbol: str) -> Dict:
+        """Full profile, valuation and analyst payload"""
+    
+    @abstractmethod
+    def options(self, symbol: str) -> Tuple[str, ...]:
+        """Available option expiration dates"""
+    
+    @abstractmethod
+    def option_chain(self, symbol: str, expiry: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(calls, puts) for one expiration"""
+    
+    @abstractmethod
+    def news(self, symbol: str) -> List[Dict]:
+        """Recent news items"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance"""
+    
+    name = 'yfinance'
+    
+    def download(self, symbols: List[str], **date_range) -> pd.DataFrame:
+        return yf.download(
+            symbols, group_by='ticker', actions=True,
+            auto_adjust=True, threads=True, progress=False, **date_range
+        )
+    
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(period=period)
+    
+    def quote_bars(self, symbol: str) -> Tuple[pd.DataFrame, Dict]:
+        stock = yf.Ticker(symbol)
+        bars = stock.history(period="5d")
+        # Served from the chart request above, no extra round trip
+        return bars, stock.get_history_metadata() or {}
+    
+    def info(self, symbol: str) -> Dict:
+        return yf.Ticker(symbol).info
+    
+    def options(self, symbol: str) -> Tuple[str, ...]:
+        return yf.Ticker(symbol).options
+    
+    def option_chain(self, symbol: str, expiry: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        chain = yf.Ticker(symbol).option_chain(expiry)
+        return chain.calls, chain.puts
+    
+    def news(self, symbol: str) -> List[Dict]:
+        return yf.Ticker(symbol).news
+
+
+class RecordReplayProvider(MarketDataProvider):
+    """Records another provider's responses to files, or plays them back offline.
+    
+    Each call is stored as a pickle named after a hash of the method and its
+    arguments, so a replay returns exactly what was recorded for the same request.
+    """
+    
+    def __init__(self, directory: str, inner: Optional[MarketDataProvider] = None):
+        self.directory = directory
+        self.inner = inner
+        self.name = 'record' if inner else 'replay'
+        self.remote = inner is not None and inner.remote
+        os.makedirs(directory, exist_ok=True)
+    
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        key = repr((method, args, sorted(kwargs.items())))
+        path = os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.pkl')
+        
+        if self.inner is None:
+            if not os.path.exists(path):
+                raise LookupError(f"no recording for {method}{args}")
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        
+        result = getattr(self.inner, method)(*args, **kwargs)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(path + '.tmp', path)
+        return result
+    
+    def download(self, symbols: List[str], **date_range) -> pd.DataFrame:
+        return self._call('download', tuple(symbols), **{k: str(v) for k, v in date_range.items()})
+    
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        return self._call('history', symbol, period)
+    
+    def quote_bars(self, symbol: str) -> Tuple[pd.DataFrame, Dict]:
+        return self._call('quote_bars', symbol)
+    
+    def info(self, symbol: str) -> Dict:
+        return self._call('info', symbol)
+    
+    def options(self, symbol: str) -> Tuple[str, ...]:
+        return self._call('options', symbol)
+    
+    def option_chain(self, symbol: str, expiry: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        return self._call('option_chain', symbol, expiry)
+    
+    def news(self, symbol: str) -> List[Dict]:
+        return self._call('news', symbol)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Generated OHLCV and profile data for any symbol, for offline profiling and load tests.
+    
+    Every series is a seeded random walk from a fixed start date, so the same
+    symbol always produces the same bars.
+    """
+    
+    name = 'synthetic'
+    remote = False
+    START = pd.Timestamp('2023-01-02')
+    SECTORS = ('Technology', 'Healthcare', 'Financial Services', 'Consumer Cyclical',
+               'Industrials', 'Energy', 'Utilities', 'Communication Services')
+    RATINGS = ('strong_buy', 'buy', 'hold', 'underperform', 'sell')
+    HEADLINES = ('beats estimates', 'misses on revenue', 'raises guidance', 'announces buyback',
+                 'upgraded by analysts', 'downgraded on valuation', 'names new CEO', 'expands into Asia')
+    
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._calendars = {}  # (is_crypto, today) -> bar dates, building them is slow
+    
+    def download(self, symbols: List[str], **date_range) -> pd.DataFrame:
+        frames = {}
+        for symbol in symbols:
+            if 'start' in date_range:
+                bars = self._bars(symbol)
+                frames[symbol] = bars[bars.index >= pd.Timestamp(date_range['start'])]
+            else:
+                frames[symbol] = self.history(symbol, date_range.get('period', '1y'))
+        return pd.concat(frames, axis=1)
+    
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        bars = self._bars(symbol)
+        return bars[bars.index >= self._period_start(period, bars.index[-1])]
+    
+    def quote_bars(self, symbol: str) -> Tuple[pd.DataFrame, Dict]:
+        bars = self.history(symbol, '5d')
+        year = self.history(symbol, '1y')
+        last = bars.iloc[-1]
+        return bars, {
+            'regularMarketPrice': last['Close'],
+            'regularMarketDayHigh': last['High'],
+            'regularMarketDayLow': last['Low'],
+            'regularMarketVolume': last['Volume'],
+            'fiftyTwoWeekHigh': year['High'].max(),
+            'fiftyTwoWeekLow': year['Low'].min(),
+            'chartPreviousClose': bars['Close'].iloc[0],
+            'shortName': f"{symbol} Synthetic",
+        }
+    
+    def info(self, symbol: str) -> Dict:
+        year = self.history(symbol, '1y')
+        rng = self._rng(symbol, 'info')
+        price, previous = year['Close'].iloc[-1], year['Close'].iloc[-2]
+        eps = price / rng.uniform(8, 60)
+        shares = rng.integers(10 ** 7, 10 ** 10)
+        annual_dividend = year['Dividends'].sum()
+        
+        return {
+            'shortName': f"{symbol} Synthetic",
+            'longName': f"{symbol} Synthetic Holdings",
+            'sector': self.SECTORS[rng.integers(len(self.SECTORS))],
+            'industry': 'Synthetic',
+            'country': 'United States',
+            'currentPrice': price,
+            'previousClose': previous,
+            'open': year['Open'].iloc[-1],
+            'dayHigh': year['High'].iloc[-1],
+            'dayLow': year['Low'].iloc[-1],
+            'regularMarketChange': price - previous,
+            'regularMarketChangePercent': (price - previous) / previous * 100,
+            'volume': year['Volume'].iloc[-1],
+            'averageVolume': year['Volume'].mean(),
+            'averageDailyVolume10Day': year['Volume'].iloc[-10:].mean(),
+            'marketCap': price * shares,
+            'trailingEps': eps,
+            'forwardEps': eps * rng.uniform(0.9, 1.3),
+            'trailingPE': price / eps,
+            'forwardPE': price / eps / rng.uniform(0.9, 1.3),
+            'pegRatio': rng.uniform(0.5, 3),
+            'priceToBook': rng.uniform(0.8, 15),
+            'beta': rng.uniform(0.4, 2.2),
+            'dividendRate': annual_dividend or None,
+            'dividendYield': annual_dividend / price if annual_dividend else None,
+            'fiftyTwoWeekHigh': year['High'].max(),
+            'fiftyTwoWeekLow': year['Low'].min(),
+            'targetMeanPrice': price * rng.uniform(0.85, 1.35),
+            'targetHighPrice': price * 1.5,
+            'targetLowPrice': price * 0.7,
+            'recommendationKey': self.RATINGS[rng.integers(len(self.RATINGS))],
+            'numberOfAnalystOpinions': int(rng.integers(0, 40)),
+            'profitMargins': rng.uniform(-0.1, 0.35),
+            'revenueGrowth': rng.uniform(-0.2, 0.5),
+            'debtToEquity': rng.uniform(0, 250),
+            'shortRatio': rng.uniform(0.5, 8),
+            'shortPercentOfFloat': rng.uniform(0, 0.25),
+        }
+    
+    def options(self, symbol: str) -> Tuple[str, ...]:
+        if DataFetcher.is_crypto(symbol):
+            return ()
+        friday = date.today() + timedelta(days=(4 - date.today().weekday()) % 7 or 7)
+        return tuple((friday + timedelta(weeks=i)).isoformat() for i in range(8))
+    
+    def option_chain(self, symbol: str, expiry: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        spot = self._bars(symbol)['Close'].iloc[-1]
+        rng = self._rng(symbol, expiry)
+        years = max((date.fromisoformat(expiry) - date.today()).days, 1) / 365
+        vol = rng.uniform(0.2, 0.6)
+        step = 10 ** np.floor(np.log10(spot)) / 20
+        strikes = np.round(spot / step) * step + step * np.arange(-60, 61)
+        strikes = strikes[strikes > 0]
+        
+        # Time value peaks at the money and decays with distance from it
+        spread = spot * vol * np.sqrt(years)
+        time_value = 0.4 * spread * np.exp(-0.5 * ((strikes - spot) / spread) ** 2)
+        
+        def side(kind: str, intrinsic: np.ndarray) -> pd.DataFrame:
+            price = np.round(intrinsic + time_value, 2)
+            return pd.DataFrame({
+                'contractSymbol': [f"{symbol}{expiry.replace('-', '')[2:]}{kind}{int(k * 1000):08d}" for k in strikes],
+                'strike': strikes,
+                'lastPrice': price,
+                'bid': np.maximum(price - 0.05, 0),
+                'ask': price + 0.05,
+                'volume': rng.integers(0, 5000, len(strikes)),
+                'openInterest': rng.integers(0, 20000, len(strikes)),
+                'impliedVolatility': vol + rng.normal(0, 0.02, len(strikes)),
+                'inTheMoney': intrinsic > 0,
+            })
+        
+        return side('C', np.maximum(spot - strikes, 0)), side('P', np.maximum(strikes - spot, 0))
+    
+    def news(self, symbol: str) -> List[Dict]:
+        """Headlines in yfinance's nested layout; the daily market wrap is returned for every symbol"""
+        
+        today = datetime.combine(date.today(), datetime.min.time(), timezone.utc)
+        rng = self._rng(symbol, f"news:{today.date()}")
+        
+        def story(story_id: str, title: str, published: datetime) -> Dict:
+            return {'id': story_id, 'content': {
+                'title': title,
+                'pubDate': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'provider': {'displayName': 'Synthetic Wire'},
+                'canonicalUrl': {'url': f"https://example.com/news/{story_id}"},
+                'contentType': 'STORY',
+            }}
+        
+        items = [
+            story(f"{symbol}-{today.date()}-{i}", f"{symbol} {self.HEADLINES[rng.integers(len(self.HEADLINES))]}",
+                  today - timedelta(hours=int(rng.integers(0, 72))))
+            for i in range(5)
+        ]
+        items.append(story(f"wrap-{today.date()}", "Markets close mixed in synthetic session", today))
+        return items
+    
+    def _rng(self, symbol: str, salt: str = '') -> np.random.Generator:
+        digest = hashlib.sha256(f"{self.seed}:{symbol}:{salt}".encode()).digest()
+        return np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+    
+    def _bars(self, symbol: str) -> pd.DataFrame:
+        """The symbol's full series from START to today"""
+        
+        crypto = DataFetcher.is_crypto(symbol)
+        key = (crypto, date.today())
+        index = self._calendars.get(key)
+        if index is None:
+            index = pd.date_range(self.START, pd.Timestamp(key[1]), freq='D' if crypto else 'B', name='Date')
+            self._calendars = {key: index, **{k: v for k, v in self._calendars.items() if k[1] == key[1]}}
+        
+        rng = self._rng(symbol)
+        n = len(index)
+        
+        vol = rng.uniform(0.008, 0.04)
+        close = 10 ** rng.uniform(0.5, 3) * np.exp(np.cumsum(rng.normal(0.0003, vol, n)))
+        open_ = close * (1 + rng.normal(0, vol / 4, n))
+        
+        dividends = np.zeros(n)
+        if not crypto and rng.random() < 0.5:
+            dividends[20::63] = np.round(close[20::63] * rng.uniform(0.002, 0.012), 2)
+        
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n))),
+            'Low': np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n))),
+            'Close': close,
+            'Volume': np.round(rng.lognormal(13, 1, n)),
+            'Dividends': dividends,
+            'Stock Splits': 0.0,
+        }, index=index)
+    
+    def _period_start(self, period: str, last: pd.Timestamp) -> pd.Timestamp:
+        """First bar date of a yfinance period string ('5d', '6mo', '1y', 'ytd', 'max')"""
+        
+        if period == 'max':
+            return self.START
+        if period == 'ytd':
+            return pd.Timestamp(last.year, 1, 1)
+        
+        amount, unit = re.fullmatch(r'(\d+)(d|wk|mo|y)', period).groups()
+        amount = int(amount)
+        if unit == 'd':
+            # Counted in trading days, like the chart API
+            return last - pd.offsets.BDay(amount - 1)
+        
+        return last - {
+            'wk': pd.DateOffset(weeks=amount),
+            'mo': pd.DateOffset(months=amount),
+            'y': pd.DateOffset(years=amount),
+        }[unit]
+
+
+@st.cache_resource
+def get_provider() -> MarketDataProvider:
+    """Pick the market data provider from PORTFOLIO_DATA_PROVIDER once per process.
+    
+    yfinance (default), synthetic, record (yfinance, saving every response) or
+    replay (saved responses only, no network).
+    """
+    
+    choice = os.environ.get('PORTFOLIO_DATA_PROVIDER', 'yfinance').lower()
+    replay_dir = os.environ.get(
+        'PORTFOLIO_REPLAY_DIR', os.path.join(os.environ.get('PORTFOLIO_DATA_DIR', '.portfolio_cache'), 'replay')
+    )
+    
+    if choice == 'synthetic':
+        return SyntheticProvider(int(os.environ.get('PORTFOLIO_SYNTHETIC_SEED', 0)))
+    if choice == 'record':
+        return RecordReplayProvider(replay_dir, inner=YFinanceProvider())
+    if choice == 'replay':
+        return RecordReplayProvider(replay_dir)
+    return YFinanceProvider()
+
+
+PROVIDER = get_provider()
+
+# ============================================================================
+# UPSTREAM PROTECTION
+# ============================================================================
+
+class UpstreamError(Exception):
+    """An upstream call that failed after retries, was throttled, or was refused by the breaker"""
+    
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class UpstreamGuard:
+    """Shared rate limiter, retry policy and circuit breaker for market data calls.
+    
+    Every request takes a token from a bucket refilled at RATE per second. Throttling
+    and network failures are retried with jittered exponential backoff; after
+    FAILURE_THRESHOLD consecutive failures the breaker opens and calls fail fast for
+    COOLDOWN seconds, so callers fall back to cached data instead of hammering upstream.
+    """
+    
+    RATE = 5.0  # requests per second
+    BURST = 10  # bucket capacity
+    MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5  # seconds, doubled per retry
+    BACKOFF_MAX = 8.0
+    FAILURE_THRESHOLD = 5
+    COOLDOWN = 30  # seconds the breaker stays open
+    MAX_TOKEN_WAIT = 10  # seconds a caller may queue for a token
+    
+    def __init__(self, rate_limited: bool = True):
+        self.rate_limited = rate_limited
+        self._lock = threading.Lock()
+        self._tokens = float(self.BURST)
+        self._refilled_at = time.monotonic()
+        self._failures = 0
+        self._open_until = 0.0
+        self.counters = {'requests': 0, 'throttled': 0, 'errors': 0, 'retries': 0, 'rejected': 0}
+    
+    def call(self, fn, *args, cost: int = 1, **kwargs) -> Any:
+        """Run an upstream request under the rate limit, retry policy and breaker"""
+        
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._admit(cost)
             
-            # Base data structure
-            data = {
-                # Identity
-                'ticker': original_ticker,
-                'normalized_ticker': normalized_ticker,
-                'is_crypto': is_crypto,
-                'asset_type': 'crypto' if is_crypto else 'stock',
-                
-                # Price data
-                'price': current_price,
-                'previous_close': info.get('previousClose') or info.get('regularMarketPreviousClose', current_price),
-                'open': info.get('open') or info.get('regularMarketOpen', current_price),
-                'day_high': info.get('dayHigh') or info.get('regularMarketDayHigh', current_price),
-                'day_low': info.get('dayLow') or info.get('regularMarketDayLow', current_price),
-                'change': info.get('regularMarketChange', 0),
-                'change_pct': info.get('regularMarketChangePercent', 0),
-                
-                # Company/Asset info
-                'name': info.get('shortName') or info.get('name', original_ticker),
-                'sector': info.get('sector', 'Crypto' if is_crypto else 'Unknown'),
-                'industry': info.get('industry', 'Cryptocurrency' if is_crypto else 'Unknown'),
-                'market_cap': info.get('marketCap', 0),
-                'description': info.get('longBusinessSummary', ''),
-                'website': info.get('website', ''),
-                'country': info.get('country', ''),
-                'employees': info.get('fullTimeEmployees', 0),
-                
-                # 52-week data
-                'week_52_high': info.get('fiftyTwoWeekHigh', current_price),
-                'week_52_low': info.get('fiftyTwoWeekLow', current_price),
-                'week_52_change': info.get('52WeekChange', 0),
-                
-                # Volume
-                'volume': info.get('volume') or info.get('regularMarketVolume', 0),
-                'avg_volume': info.get('averageVolume', 0),
-                'avg_volume_10d': info.get('averageDailyVolume10Day', 0),
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                reason = self.classify(e)
+                if reason is None:
+                    # Not an upstream health problem (bad symbol, parsing); let the caller handle it
+                    self._record(success=True)
+                    raise
                 
-                # Valuation (stocks only)
-                'pe_ratio': info.get('trailingPE'),
-                'forward_pe': info.get('forwardPE'),
-                'peg_ratio': info.get('pegRatio'),
-                'price_to_book': info.get('priceToBook'),
-                'price_to_sales': info.get('priceToSalesTrailing12Months'),
-                'enterprise_value': info.get('enterpriseValue'),
-                'ev_to_revenue': info.get('enterpriseToRevenue'),
-                'ev_to_ebitda': info.get('enterpriseToEbitda'),
+                self._record(success=False, throttled=reason == 'throttled')
+                if attempt == self.MAX_RETRIES or self.is_open():
+                    raise UpstreamError(reason) from e
                 
-                # Dividends
-                'dividend_yield': (info.get('dividendYield') or 0) * 100,
-                'dividend_rate': info.get('dividendRate', 0),
-                'ex_dividend_date': info.get('exDividendDate'),
-                'payout_ratio': info.get('payoutRatio'),
-                'five_year_avg_dividend_yield': info.get('fiveYearAvgDividendYield'),
+                with self._lock:
+                    self.counters['retries'] += 1
+                delay = min(self.BACKOFF_BASE * 2 ** attempt, self.BACKOFF_MAX)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                continue
+            
+            self._record(success=True)
+            return result
+    
+    @staticmethod
+    def classify(error: Exception) -> Optional[str]:
+        """'throttled' or 'network' for upstream trouble worth retrying, None otherwise"""
+        
+        message = str(error)
+        if isinstance(error, YFRateLimitError) or 'Too Many Requests' in message or '429' in message:
+            return 'throttled'
+        if isinstance(error, (requests.exceptions.RequestException, ConnectionError, TimeoutError)):
+            return 'network'
+        if type(error).__module__.startswith('curl_cffi'):
+            return 'network'
+        return None
+    
+    def is_open(self) -> bool:
+        """Whether the breaker is currently refusing calls"""
+        with self._lock:
+            return time.monotonic() < self._open_until
+    
+    def stats(self) -> Dict:
+        """Request, throttle and error counters plus breaker state for monitoring"""
+        with self._lock:
+            return {
+                **self.counters,
+                'breaker': 'open' if time.monotonic() < self._open_until else 'closed',
+                'consecutive_failures': self._failures,
+            }
+    
+    def _admit(self, cost: int):
+        """Fail fast while the breaker is open, otherwise wait for tokens"""
+        
+        cost = min(max(cost, 1), self.BURST)
+        waited_until = time.monotonic() + self.MAX_TOKEN_WAIT
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._open_until:
+                    self.counters['rejected'] += 1
+                    raise UpstreamError('provider unavailable')
                 
-                # Analyst data
-                'target_low': info.get('targetLowPrice'),
-                'target_mean': info.get('targetMeanPrice'),
-                'target_median': info.get('targetMedianPrice'),
-                'target_high': info.get('targetHighPrice'),
-                'recommendation': info.get('recommendationKey', 'none'),
-                'recommendation_mean': info.get('recommendationMean'),
-                'num_analysts': info.get('numberOfAnalystOpinions', 0),
+                self._tokens = min(self.BURST, self._tokens + (now - self._refilled_at) * self.RATE)
+                self._refilled_at = now
+                if not self.rate_limited or self._tokens >= cost:
+                    self._tokens = max(self._tokens - cost, 0.0)
+                    self.counters['requests'] += 1
+                    return
                 
-                # Risk metrics
-                'beta': info.get('beta', 1.0 if not is_crypto else 2.0),
-                'short_ratio': info.get('shortRatio'),
-                'short_percent': info.get('shortPercentOfFloat'),
-                'held_percent_insiders': info.get('heldPercentInsiders'),
-                'held_percent_institutions': info.get('heldPercentInstitutions'),
+                wait_for = (cost - self._tokens) / self.RATE
+            
+            if now + wait_for > waited_until:
+                with self._lock:
+                    self.counters['rejected'] += 1
+                raise UpstreamError('rate limited')
+            time.sleep(wait_for)
+    
+    def _record(self, success: bool, throttled: bool = False):
+        with self._lock:
+            if success:
+                self._failures = 0
+                return
+            
+            self.counters['throttled' if throttled else 'errors'] += 1
+            self._failures += 1
+            if self._failures >= self.FAILURE_THRESHOLD:
+                self._open_until = time.monotonic() + self.COOLDOWN
+                self._failures = 0
+
+
+@st.cache_resource
+def get_upstream_guard() -> UpstreamGuard:
+    """Create the process-wide upstream guard once (local providers are not rate limited)"""
+    return UpstreamGuard(rate_limited=PROVIDER.remote)
+
+
+UPSTREAM = get_upstream_guard()
+
+# ============================================================================
+# PRICE HISTORY STORE
+# ============================================================================
+
+class HistoryDisk:
+    """On-disk daily OHLCV store that survives restarts.
+    
+    Each symbol gets its own directory holding one flat binary file per column
+    (int64 nanosecond dates, float64 prices) plus a small JSON meta file. Reads
+    are memory-mapped. Stored files are never changed in place: an update writes
+    the next version of every file (the kept bars followed by the new ones) and
+    publishes it by replacing the meta file, so a reader in any process maps one
+    whole version, and a mapped file that is later deleted stays readable.
+    """
+    
+    COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits')
+    
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+    
+    def read(self, symbol: str) -> Tuple[Optional[pd.DataFrame], float]:
+        """Return (history, expires_at wall-clock time), or (None, 0) if nothing is stored"""
+        
+        stored = self.read_columns(symbol)
+        if stored is None:
+            return None, 0
+        
+        dates, columns, expires_at = stored
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name='Date')), expires_at
+    
+    def read_columns(self, symbol: str, columns: Tuple[str, ...] = COLUMNS
+                     ) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray], float]]:
+        """Return (datetime64 dates, column -> float64 values, expires_at) without building a frame,
+        or None if nothing is stored
+        """
+        
+        path = self._path(symbol)
+        # A writer deletes the previous version once it has published the next, so a
+        # version gone between reading the meta file and opening its files is looked up again
+        for _ in range(3):
+            try:
+                with self._lock:
+                    with open(os.path.join(path, 'meta.json')) as f:
+                        meta = json.load(f)
+                    
+                    rows, version = meta['rows'], meta.get('version')
+                    if not rows:
+                        return None
+                    
+                    dates = np.memmap(self._file(path, 'index', version), dtype=np.int64, mode='r', shape=(rows,))
+                    values = {
+                        column: np.memmap(self._file(path, column, version), dtype=np.float64, mode='r', shape=(rows,))
+                        for column in columns
+                    }
+            except FileNotFoundError:
+                if not os.path.exists(os.path.join(path, 'meta.json')):
+                    return None
+                continue
+            except Exception:
+                return None
+            
+            return dates.astype('datetime64[ns]'), values, meta.get('expires_at', 0)
+        
+        return None
+    
+    def write(self, symbol: str, hist: pd.DataFrame, ttl: float):
+        """Replace everything stored for a symbol"""
+        self._save(symbol, hist, ttl, keep_before=None)
+    
+    def append(self, symbol: str, fresh: pd.DataFrame, ttl: float):
+        """Replace stored bars from the first fresh bar onwards and append the rest"""
+        self._save(symbol, fresh, ttl, keep_before=fresh.index[0])
+    
+    def clear(self):
+        """Delete every stored history"""
+        with self._lock:
+            for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+                path = os.path.join(self.root, name)
+                for file_name in os.listdir(path):
+                    os.remove(os.path.join(path, file_name))
+                os.rmdir(path)
+    
+    def _save(self, symbol: str, hist: pd.DataFrame, ttl: float, keep_before: Optional[pd.Timestamp]):
+        if hist.empty:
+            return
+        
+        path = self._path(symbol)
+        dates = hist.index.values.astype('datetime64[ns]').view(np.int64)
+        
+        try:
+            with self._lock:
+                os.makedirs(path, exist_ok=True)
+                meta_path = os.path.join(path, 'meta.json')
                 
-                # Financials
-                'revenue': info.get('totalRevenue', 0),
-                'revenue_per_share': info.get('revenuePerShare'),
-                'profit_margin': info.get('profitMargins'),
-                'operating_margin': info.get('operatingMargins'),
-                'gross_margin': info.get('grossMargins'),
-                'ebitda_margin': info.get('ebitdaMargins'),
-                'roe': info.get('returnOnEquity'),
-                'roa': info.get('returnOnAssets'),
-                'debt_to_equity': info.get('debtToEquity'),
-                'current_ratio': info.get('currentRatio'),
-                'quick_ratio': info.get('quickRatio'),
-                'free_cash_flow': info.get('freeCashflow'),
-                'operating_cash_flow': info.get('operatingCashflow'),
-                'total_cash': info.get('totalCash'),
-                'total_debt': info.get('totalDebt'),
-                'book_value': info.get('bookValue'),
-                'eps_trailing': info.get('trailingEps'),
-                'eps_forward': info.get('forwardEps'),
+                stored = None
+                if os.path.exists(meta_path):
+                    with open(meta_path) as f:
+                        stored = json.load(f)
+                previous = stored.get('version') if stored else None
+                version = (previous or 0) + 1
                 
-                # Earnings
-                'earnings_date': info.get('earningsTimestamp'),
-                'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth'),
-                'revenue_growth': info.get('revenueGrowth'),
+                keep = 0
+                if keep_before is not None and stored:
+                    stored_dates = np.fromfile(self._file(path, 'index', previous), dtype=np.int64, count=stored['rows'])
+                    keep = int(np.searchsorted(stored_dates, np.datetime64(keep_before, 'ns').view(np.int64)))
                 
-                # Technical indicators
-                'technicals': technicals,
+                files = [('index', dates)]
+                for column in self.COLUMNS:
+                    values = hist[column] if column in hist.columns else pd.Series(0.0, index=hist.index)
+                    files.append((column, values.to_numpy(dtype=np.float64)))
                 
-                # Historical data for charts
-                'history': hist,
+                for name, values in files:
+                    with open(self._file(path, name, version), 'wb') as f:
+                        if keep:
+                            f.write(np.fromfile(self._file(path, name, previous), dtype=values.dtype, count=keep).tobytes())
+                        f.write(np.ascontiguousarray(values).tobytes())
                 
-                # Crypto specific
-                'circulating_supply': info.get('circulatingSupply'),
-                'max_supply': info.get('maxSupply'),
+                # Publish the new version last so readers never see a partial write
+                with open(meta_path + '.tmp', 'w') as f:
+                    json.dump({
+                        'symbol': symbol,
+                        'rows': keep + len(dates),
+                        'version': version,
+                        'updated_at': time.time(),
+                        'expires_at': time.time() + ttl,
+                    }, f)
+                os.replace(meta_path + '.tmp', meta_path)
                 
-                # Timestamp
-                'fetched_at': current_time.isoformat()
-            }
+                # Then drop older versions (and any left by an interrupted write)
+                current = {os.path.basename(self._file(path, name, version)) for name, _ in files}
+                for file_name in os.listdir(path):
+                    if file_name.endswith('.bin') and file_name not in current:
+                        try:
+                            os.remove(os.path.join(path, file_name))
+                        except OSError:
+                            pass
+        except OSError:
+            # A read-only or full disk only costs us the warm start
+            pass
+    
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9._-]', '_', symbol))
+    
+    @staticmethod
+    def _file(path: str, name: str, version: Optional[int]) -> str:
+        """File of one column ('index' for the dates) in a stored version; stores written
+        before versions existed have no version in their file names
+        """
+        name = name.replace(' ', '_').lower()
+        return os.path.join(path, f"{name}.bin" if version is None else f"{name}.{version}.bin")
+
+
+@st.cache_resource
+def get_history_disk() -> HistoryDisk:
+    """Open the on-disk history store once per process"""
+    # Offline providers get their own directory so their bars never mix with live ones
+    name = 'history' if PROVIDER.name == 'yfinance' else f"history-{PROVIDER.name}"
+    return HistoryDisk(os.path.join(os.environ.get('PORTFOLIO_DATA_DIR', '.portfolio_cache'), name))
+
+
+HISTORY_DISK = get_history_disk()
+
+
+class HistoryStore:
+    """Daily OHLCV history per symbol, extended with only the bars newer than the cached last bar"""
+    
+    PERIOD = "1y"  # window kept per symbol
+    WINDOW = pd.DateOffset(years=1)
+    MARKET_TZ = ZoneInfo('America/New_York')  # daily bars are final after the close here
+    ACTION_COLUMNS = ('Dividends', 'Stock Splits')
+    
+    @staticmethod
+    def update_many(symbols: List[str], errors: Optional[Dict[str, str]] = None) -> Dict[str, pd.DataFrame]:
+        """Bring the histories of these symbols up to date and cache them.
+        
+        Frames are looked up in memory first, then on disk; bars still within their
+        lifetime are served as-is. Otherwise a cached frame (even an expired one) only
+        downloads from its last bar onwards, which also rewrites a bar that was still
+        forming. New dividends or splits re-adjust past prices, so those symbols reload
+        in full. When upstream refuses a batch, the reason is recorded in `errors` for
+        each of its symbols left without a history.
+        """
+        
+        histories = {}
+        known = {}
+        full_reload = []
+        by_start = {}
+        
+        for symbol in symbols:
+            current = MARKET_CACHE.get(f"history:{symbol}")
+            if current is not None:
+                histories[symbol] = current
+                continue
             
-            # Cache the data
-            st.session_state.cached_data[cache_key] = data
-            st.session_state.cache_timestamp[cache_key] = current_time
+            # An expired frame is still the base for an incremental download
+            cached = MARKET_CACHE.peek(f"history:{symbol}")
             
-            return data
+            if cached is None:
+                cached, expires_at = HISTORY_DISK.read(symbol)
+                if cached is not None:
+                    cached = HistoryStore._trim(cached)
+                    if expires_at > time.time():
+                        histories[symbol] = cached
+                        MARKET_CACHE.set(f"history:{symbol}", cached, expires_at - time.time())
+                        continue
             
-        except Exception as e:
-            return None
+            if cached is None or cached.empty:
+                full_reload.append(symbol)
+            else:
+                known[symbol] = cached
+                by_start.setdefault(cached.index[-1].date(), []).append(symbol)
+        
+        # Symbols last updated on the same day share one batched request
+        for start, group in by_start.items():
+            try:
+                fresh = HistoryStore._download(group, start=start)
+            except UpstreamError:
+                fresh = {}
+            for symbol in group:
+                if symbol not in fresh:
+                    # Serve the old bars this time but leave them expired so the next load retries
+                    histories[symbol] = known[symbol]
+                    continue
+                
+                merged = HistoryStore._merge(known[symbol], fresh[symbol])
+                if merged is None:
+                    full_reload.append(symbol)
+                else:
+                    histories[symbol] = merged
+                    HistoryStore.store(symbol, merged, fresh[symbol])
+        
+        if full_reload:
+            try:
+                reloaded = HistoryStore._download(sorted(full_reload), period=HistoryStore.PERIOD)
+            except UpstreamError as e:
+                reloaded = {}
+                if errors is not None:
+                    errors.update(dict.fromkeys(full_reload, e.reason))
+            for symbol, hist in reloaded.items():
+                histories[symbol] = hist
+                HistoryStore.store(symbol, hist)
+        
+        return histories
+    
+    @staticmethod
+    def fetch_one(symbol: str) -> pd.DataFrame:
+        """Full history for a single symbol, for when the batched download missed it"""
+        return HistoryStore._normalize(UPSTREAM.call(PROVIDER.history, symbol, HistoryStore.PERIOD))
     
     @staticmethod
-    def _calculate_technicals(hist: pd.DataFrame, current_price: float) -> Dict:
-        """Calculate comprehensive technical indicators"""
+    def store(symbol: str, hist: pd.DataFrame, fresh: Optional[pd.DataFrame] = None):
+        """Cache a history frame until its next daily bar is final and persist it to disk.
         
-        if hist.empty or len(hist) < 20:
-            return {'signals': [], 'score': 0}
+        When `fresh` is given only those bars are written, on top of what is already stored.
+        """
         
-        close = hist['Close']
-        high = hist['High']
-        low = hist['Low']
-        volume = hist['Volume']
+        ttl = HistoryStore.refresh_ttl(DataFetcher.is_crypto(symbol))
+        MARKET_CACHE.set(f"history:{symbol}", hist, ttl)
         
-        technicals = {}
-        signals = []
+        if fresh is not None:
+            HISTORY_DISK.append(symbol, fresh, ttl)
+        else:
+            HISTORY_DISK.write(symbol, hist, ttl)
+    
+    @staticmethod
+    def refresh_ttl(is_crypto: bool) -> float:
+        """Seconds until the next daily bar is final: after the US close, or UTC midnight for crypto"""
         
-        # ===== MOVING AVERAGES =====
-        technicals['sma_5'] = close.rolling(window=5).mean().iloc[-1] if len(close) >= 5 else None
-        technicals['sma_10'] = close.rolling(window=10).mean().iloc[-1] if len(close) >= 10 else None
-        technicals['sma_20'] = close.rolling(window=20).mean().iloc[-1] if len(close) >= 20 else None
-        technicals['sma_50'] = close.rolling(window=50).mean().iloc[-1] if len(close) >= 50 else None
-        technicals['sma_100'] = close.rolling(window=100).mean().iloc[-1] if len(close) >= 100 else None
-        technicals['sma_200'] = close.rolling(window=200).mean().iloc[-1] if len(close) >= 200 else None
-        
-        technicals['ema_9'] = close.ewm(span=9, adjust=False).mean().iloc[-1]
-        technicals['ema_12'] = close.ewm(span=12, adjust=False).mean().iloc[-1]
-        technicals['ema_21'] = close.ewm(span=21, adjust=False).mean().iloc[-1]
-        technicals['ema_26'] = close.ewm(span=26, adjust=False).mean().iloc[-1]
-        technicals['ema_50'] = close.ewm(span=50, adjust=False).mean().iloc[-1] if len(close) >= 50 else None
+        if is_crypto:
+            now = datetime.now(timezone.utc)
+            refresh_at = now.replace(hour=0, minute=5, second=0, microsecond=0)
+        else:
+            now = datetime.now(HistoryStore.MARKET_TZ)
+            refresh_at = now.replace(hour=16, minute=30, second=0, microsecond=0)
         
-        # MA Signals
-        if technicals['sma_20']:
-            if current_price > technicals['sma_20']:
-                signals.append(('Above SMA20', 'bullish'))
-            else:
-                signals.append(('Below SMA20', 'bearish'))
+        if refresh_at <= now:
+            refresh_at += timedelta(days=1)
+        while not is_crypto and refresh_at.weekday() >= 5:
+            refresh_at += timedelta(days=1)
         
-        if technicals['sma_50']:
-            if current_price > technicals['sma_50']:
-                signals.append(('Above SMA50', 'bullish'))
-            else:
-                signals.append(('Below SMA50', 'bearish'))
+        return max((refresh_at - now).total_seconds(), DataFetcher.QUOTE_TTL)
+    
+    @staticmethod
+    def _merge(cached: pd.DataFrame, fresh: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Append fresh bars to the cached frame, or None if a full reload is needed"""
+        
+        if HistoryStore._has_new_actions(cached, fresh):
+            return None
+        
+        # Fresh rows replace any overlapping cached rows (the previously forming bar)
+        return HistoryStore._trim(pd.concat([cached[cached.index < fresh.index[0]], fresh]))
+    
+    @staticmethod
+    def _trim(hist: pd.DataFrame) -> pd.DataFrame:
+        """Keep only the bars inside the history window (the disk store keeps everything)"""
+        if hist.empty:
+            return hist
+        return hist[hist.index >= hist.index[-1] - HistoryStore.WINDOW]
+    
+    @staticmethod
+    def _has_new_actions(cached: pd.DataFrame, fresh: pd.DataFrame) -> bool:
+        """Check whether fresh bars carry a dividend or split the cached frame has not seen"""
+        
+        for column in HistoryStore.ACTION_COLUMNS:
+            if column not in fresh.columns:
+                continue
+            
+            actions = fresh[column].fillna(0)
+            actions = actions[actions != 0]
+            if actions.empty:
+                continue
+            
+            known = cached[column].reindex(actions.index).fillna(0) if column in cached.columns else 0
+            if (actions != known).any():
+                return True
+        
+        return False
+    
+    @staticmethod
+    def _download(symbols: List[str], **date_range) -> Dict[str, pd.DataFrame]:
+        """Download daily history for several symbols at once and split it per symbol.
+        
+        UpstreamError (throttled, failing or refused upstream) reaches the caller, so a
+        rejected batch is not retried symbol by symbol.
+        """
+        
+        try:
+            frame = UPSTREAM.call(PROVIDER.download, symbols, cost=len(symbols), **date_range)
+        except UpstreamError:
+            raise
+        except Exception:
+            logger.exception("Downloading history for %s failed", ', '.join(symbols))
+            return {}
+        
+        if frame is None or frame.empty:
+            return {}
+        
+        histories = {}
+        for symbol in symbols:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if symbol not in frame.columns.get_level_values(0):
+                    continue
+                hist = frame[symbol]
+            else:
+                hist = frame
+            
+            # Rows from other symbols' trading calendars (e.g. crypto weekends) are all-NaN here
+            hist = hist.dropna(subset=['Close'])
+            if not hist.empty:
+                histories[symbol] = HistoryStore._normalize(hist)
+        
+        return histories
+    
+    @staticmethod
+    def _normalize(hist: pd.DataFrame) -> pd.DataFrame:
+        """Index daily bars by naive date so batched and single-symbol frames merge cleanly"""
+        
+        if hist.empty:
+            return hist
+        
+        hist = hist.copy()
+        hist.columns.name = None
+        if getattr(hist.index, 'tz', None) is not None:
+            hist.index = hist.index.tz_localize(None)
+        hist.index = hist.index.normalize()
+        return hist
+
+# ============================================================================
+# MARKET DATA RECORDS
+# ============================================================================
+
+class FundamentalsTable:
+    """Columnar fundamentals for the symbols in the cache: one row per symbol, one array per field.
+    
+    Numeric fields are float64 arrays with a validity mask, so portfolio-wide
+    aggregations read them as vectors; text fields are object arrays of interned
+    strings. Fields that only ever held integers read back as ints. A row lives as
+    long as the symbol's fundamentals cache entry; freed rows are reused.
+    """
+    
+    INITIAL_ROWS = 64
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}  # symbol -> row
+        self._owners = {}  # row -> symbol
+        self._free = []  # rows released by removed symbols
+        self._capacity = self.INITIAL_ROWS
+        self._columns = {}  # field -> float64 or object array
+        self._valid = {}  # field -> bool array, False where the value is None
+        self._present = {}  # field -> bool array, False where the symbol has no such field
+        self._kinds = {}  # field -> 'i' (int), 'f' (float) or 'o' (anything else)
+    
+    def upsert(self, symbol: str, values: Dict) -> int:
+        """Store a symbol's fundamentals, replacing any previous ones; returns its row"""
+        
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                row = self._free.pop() if self._free else len(self._rows)
+                self._rows[symbol] = row
+                self._owners[row] = symbol
+                if row >= self._capacity:
+                    self._grow(self._capacity * 2)
+            
+            for field in self._columns.keys() - values.keys():
+                self._clear(field, row)
+            for field, value in values.items():
+                self._write(field, row, value)
+            
+            return row
+    
+    def remove(self, symbol: str):
+        """Drop a symbol's row so it can be reused"""
+        
+        with self._lock:
+            row = self._rows.pop(symbol, None)
+            if row is None:
+                return
+            del self._owners[row]
+            for field in self._columns:
+                self._clear(field, row)
+            self._free.append(row)
+    
+    def lookup(self, row: int, field: str, symbol: str) -> Any:
+        """One of a symbol's values (None if unset); KeyError if the symbol has no such field
+        or its row has since been removed
+        """
+        
+        with self._lock:
+            if self._owners.get(row) != symbol or field not in self._columns or not self._present[field][row]:
+                raise KeyError(field)
+            if not self._valid[field][row]:
+                return None
+            value = self._columns[field][row]
+            kind = self._kinds[field]
+        
+        if kind == 'i':
+            return int(value)
+        if kind == 'f':
+            return float(value)
+        return value
+    
+    def owns(self, row: int, symbol: str) -> bool:
+        """Whether the row still holds this symbol's fundamentals"""
+        with self._lock:
+            return self._owners.get(row) == symbol
+    
+    def fields(self, row: int, symbol: str) -> List[str]:
+        """The fields a symbol's row holds"""
+        with self._lock:
+            if self._owners.get(row) != symbol:
+                return []
+            return [field for field, present in self._present.items() if present[row]]
+    
+    def row_nbytes(self, symbol: str) -> int:
+        """Memory held by one symbol's row"""
+        
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                return 0
+            size = 0
+            for field, column in self._columns.items():
+                size += column.itemsize + 2  # value plus its two mask bytes
+                if column.dtype == object and self._valid[field][row]:
+                    size += sys.getsizeof(column[row])
+            return size
+    
+    def column(self, field: str, symbols: List[str]) -> np.ndarray:
+        """A field for many symbols at once: float64 with NaN for numeric fields, else objects with None"""
+        
+        with self._lock:
+            rows = np.array([self._rows.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+            known = rows >= 0
+            numeric = self._kinds.get(field, 'f') != 'o'
+            out = np.full(len(rows), np.nan if numeric else None, dtype=np.float64 if numeric else object)
+            
+            if field in self._columns:
+                present = known.copy()
+                present[known] = self._valid[field][rows[known]]
+                out[present] = self._columns[field][rows[present]]
+        
+        return out
+    
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(c.nbytes + self._valid[f].nbytes + self._present[f].nbytes for f, c in self._columns.items())
+    
+    def _clear(self, field: str, row: int):
+        """Unset one value and mark the field absent for the row (lock held)"""
+        self._valid[field][row] = False
+        self._present[field][row] = False
+        if self._columns[field].dtype == object:
+            self._columns[field][row] = None
+    
+    def _write(self, field: str, row: int, value: Any):
+        """Store one value, widening the column's type if needed (lock held)"""
+        
+        if isinstance(value, float) and math.isnan(value):
+            value = None
+        
+        if value is None:
+            kind = None
+        elif isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)):
+            kind = 'i'
+        elif isinstance(value, (float, np.floating)):
+            kind = 'f'
+        else:
+            kind = 'o'
+        
+        if field not in self._columns:
+            numeric = kind in (None, 'i', 'f')
+            self._columns[field] = np.full(self._capacity, np.nan if numeric else None,
+                                           dtype=np.float64 if numeric else object)
+            self._valid[field] = np.zeros(self._capacity, dtype=bool)
+            self._present[field] = np.zeros(self._capacity, dtype=bool)
+            self._kinds[field] = kind or 'i'
+        
+        current = self._kinds[field]
+        if kind == 'o' and current != 'o':
+            column = self._columns[field].astype(object)
+            if current == 'i':
+                column[self._valid[field]] = [int(v) for v in column[self._valid[field]]]
+            column[~self._valid[field]] = None
+            self._columns[field] = column
+            self._kinds[field] = 'o'
+        elif kind == 'f' and current == 'i':
+            self._kinds[field] = 'f'
+        
+        self._present[field][row] = True
+        self._valid[field][row] = value is not None
+        if value is not None:
+            self._columns[field][row] = sys.intern(value) if isinstance(value, str) else value
+    
+    def _grow(self, capacity: int):
+        for field, column in self._columns.items():
+            grown = np.full(capacity, None if column.dtype == object else np.nan, dtype=column.dtype)
+            grown[:self._capacity] = column
+            self._columns[field] = grown
+            
+            for masks in (self._valid, self._present):
+                mask = np.zeros(capacity, dtype=bool)
+                mask[:self._capacity] = masks[field]
+                masks[field] = mask
+        self._capacity = capacity
+
+
+@st.cache_resource
+def get_fundamentals_table() -> FundamentalsTable:
+    """Create the process-wide fundamentals table once"""
+    table = FundamentalsTable()
+    # Rows live as long as their cache entries and count against the cache's memory budget
+    MARKET_CACHE.attach('fundamentals:', table.row_nbytes, table.remove)
+    return table
+
+
+FUNDAMENTALS = get_fundamentals_table()
+
+
+class MarketRecord(Mapping):
+    """Per-ticker market data with read-only dict-style access.
+    
+    Quote, technicals and history are held directly; fundamentals are read from the
+    ticker's row in FUNDAMENTALS. Keys resolve in the order the data dict used to be
+    built: record fields, then fundamentals, then quote.
+    """
+    
+    __slots__ = ('ticker', 'normalized_ticker', 'is_crypto', 'quote', 'row',
+                 'technicals', 'history', 'fetched_at', 'is_stale')
+    
+    OWN_KEYS = ('ticker', 'normalized_ticker', 'is_crypto', 'asset_type',
+                'technicals', 'indicators', 'history', 'fetched_at', 'is_stale')
+    
+    def __init__(self, ticker: str, normalized_ticker: str, is_crypto: bool, quote: Dict, row: int,
+                 technicals: Dict, history: pd.DataFrame, fetched_at: str, is_stale: bool = False):
+        self.ticker = ticker
+        self.normalized_ticker = normalized_ticker
+        self.is_crypto = is_crypto
+        self.quote = quote
+        self.row = row
+        self.technicals = technicals
+        self.history = history
+        self.fetched_at = fetched_at
+        self.is_stale = is_stale
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in MarketRecord.OWN_KEYS:
+            if key == 'asset_type':
+                return 'crypto' if self.is_crypto else 'stock'
+            if key == 'indicators':
+                # Full indicator series, shared per history version and computed on first use
+                return IndicatorGraph.series(self.normalized_ticker, self.history) if not self.history.empty else None
+            return getattr(self, key)
+        
+        try:
+            return FUNDAMENTALS.lookup(self.row, key, self.normalized_ticker)
+        except KeyError:
+            return self.quote[key]
+    
+    def __iter__(self):
+        seen = set(MarketRecord.OWN_KEYS)
+        yield from MarketRecord.OWN_KEYS
+        for key in FUNDAMENTALS.fields(self.row, self.normalized_ticker) + list(self.quote):
+            if key not in seen:
+                seen.add(key)
+                yield key
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def intact(self) -> bool:
+        """False once the fundamentals cache entry behind this record's row was dropped"""
+        return FUNDAMENTALS.owns(self.row, self.normalized_ticker)
+    
+    def stale(self) -> 'MarketRecord':
+        """A copy marked as expired, sharing all of its data"""
+        return MarketRecord(self.ticker, self.normalized_ticker, self.is_crypto, self.quote, self.row,
+                            self.technicals, self.history, self.fetched_at, is_stale=True)
+    
+    def nbytes(self) -> int:
+        """Memory held by this record itself (fundamentals live in the shared table)"""
+        return sys.getsizeof(self) + sum(
+            MarketDataCache.sizeof(part) for part in (self.quote, self.technicals, self.history)
+        )
+
+
+class OptionChain(Mapping):
+    """A ticker's option chains by expiry, each {'calls': DataFrame, 'puts': DataFrame}.
+    
+    Only the expiration list is known up front; an expiry's chain is downloaded the first
+    time it is read and then served from the shared cache. A chain that could not be
+    loaded reads as None.
+    """
+    
+    def __init__(self, ticker: str, expirations: Tuple[str, ...]):
+        self.ticker = ticker
+        self.expirations = list(expirations)
+    
+    def __getitem__(self, expiry: str) -> Optional[Dict[str, pd.DataFrame]]:
+        if expiry not in self.expirations:
+            raise KeyError(expiry)
+        return DataFetcher._load_option_chain(self.ticker, expiry)
+    
+    def __iter__(self):
+        return iter(self.expirations)
+    
+    def __len__(self) -> int:
+        return len(self.expirations)
+    
+    def strike_range(self, expiry: str, low: float, high: float) -> Optional[Dict[str, pd.DataFrame]]:
+        """Contracts with low <= strike <= high, sliced from the sorted chain without copying rows"""
+        
+        chain = self[expiry]
+        if chain is None:
+            return None
+        
+        window = {}
+        for side, contracts in chain.items():
+            if contracts.empty:
+                window[side] = contracts
+                continue
+            strikes = contracts['strike'].to_numpy()
+            start = np.searchsorted(strikes, low, side='left')
+            stop = np.searchsorted(strikes, high, side='right')
+            window[side] = contracts.iloc[start:stop]
+        return window
+    
+    @staticmethod
+    def by_strike(contracts: pd.DataFrame) -> pd.DataFrame:
+        """Sort a calls or puts table by strike so ranges can be found by bisection"""
+        if contracts.empty or contracts['strike'].is_monotonic_increasing:
+            return contracts.reset_index(drop=True)
+        return contracts.sort_values('strike', ignore_index=True, kind='stable')
+
+# ============================================================================
+# TECHNICAL INDICATORS
+# ============================================================================
+
+class TechnicalEngine:
+    """Technical indicators computed directly on OHLCV arrays, for one ticker or thousands.
+    
+    Bars are held as tickers x days matrices, right-aligned so every row ends on its
+    latest bar (shorter histories are NaN-padded on the left), and each indicator is a
+    column operation across all rows at once. Each value only touches the bars it
+    depends on: moving averages are means of their trailing window, every EMA is one
+    weighted sum, and the rolling windows several indicators share (14-bar high/low,
+    true range, 20-bar closes) are built once.
+    """
+    
+    SMA_WINDOWS = (5, 10, 20, 50, 100, 200)
+    EMA_SPANS = (9, 12, 21, 26, 50)
+    
+    @staticmethod
+    def compute(hist: pd.DataFrame, current_price: float) -> Dict:
+        """Indicator values, signals and overall score for a daily OHLCV history"""
+        return TechnicalEngine.batch({'': hist}, {'': current_price})['']
+    
+    @staticmethod
+    def batch(histories: Dict[str, pd.DataFrame], prices: Dict[str, float]) -> Dict[str, Dict]:
+        """Technicals for many tickers in one pass (ticker -> history, ticker -> current price)"""
+        
+        tickers = list(histories)
+        close, high, low, volume, lengths = TechnicalEngine.stack([histories[t] for t in tickers])
+        results = TechnicalEngine.from_matrix(
+            close, high, low, volume, lengths, np.array([prices[t] for t in tickers], dtype=float)
+        )
+        return dict(zip(tickers, results))
+    
+    @staticmethod
+    def stack(histories: List[pd.DataFrame]) -> Tuple[np.ndarray, ...]:
+        """Right-aligned close, high, low and volume matrices plus the number of bars per row"""
+        
+        lengths = np.array([len(hist) for hist in histories], dtype=int)
+        shape = (len(histories), max(lengths.max(initial=0), 20))
+        matrices = [np.full(shape, np.nan) for _ in range(4)]
+        
+        for row, hist in enumerate(histories):
+            if lengths[row]:
+                for matrix, column in zip(matrices, ('Close', 'High', 'Low', 'Volume')):
+                    matrix[row, -lengths[row]:] = hist[column].to_numpy(dtype=float)
+        
+        return (*matrices, lengths)
+    
+    @staticmethod
+    def from_matrix(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                    lengths: np.ndarray, prices: np.ndarray) -> List[Dict]:
+        """Technicals per row of right-aligned tickers x days matrices, in row order.
+        
+        Rows with fewer than 20 bars get no indicators, only an empty signal list.
+        """
+        
+        if close.shape[1] < 20:
+            # Every row is too short; widen so the fixed lookbacks below stay in range
+            close, high, low, volume = (
+                np.concatenate((np.full((len(m), 20 - m.shape[1]), np.nan), m), axis=1)
+                for m in (close, high, low, volume)
+            )
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns, extras = TechnicalEngine._values(close, high, low, volume, lengths, prices)
+        
+        names = list(columns)
+        rows = np.column_stack(list(columns.values()))
+        results = []
+        
+        for i, (n, current_price) in enumerate(zip(lengths.tolist(), prices)):
+            if n < 20:
+                results.append({'signals': [], 'score': 0})
+                continue
+            
+            technicals = dict(zip(names, rows[i]))
+            
+            # Values the row is too short for, and the original fallbacks
+            for window in TechnicalEngine.SMA_WINDOWS:
+                if n < window:
+                    technicals[f'sma_{window}'] = None
+            if n < 50:
+                technicals['ema_50'] = None
+            if np.isnan(technicals['adx']):
+                technicals['adx'] = 25
+            if not extras['avg_volume_20'][i] > 0:
+                technicals['volume_ratio'] = 1
+            
+            results.append(TechnicalEngine.score(
+                technicals, {name: values[i] for name, values in extras.items()}, current_price
+            ))
+        
+        return results
+    
+    @staticmethod
+    def fingerprint(hist: pd.DataFrame) -> str:
+        """Cheap version tag of a non-empty history: last bar date, last close and bar count"""
+        return f"{hist.index.values[-1]}:{hist['Close'].iat[-1]!r}:{len(hist)}"
+    
+    @staticmethod
+    def reprice(technicals: Dict, extras: Dict, current_price: float) -> Dict:
+        """Fill in the values that depend on the current price, then the signals and score.
+        
+        `technicals` holds everything else (as IndicatorState.values returns it) and is
+        left untouched, so memoized values can be repriced on every quote.
+        """
+        
+        technicals = dict(technicals)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            technicals['atr_percent'] = (technicals['atr'] / current_price) * 100
+            technicals['momentum_10'] = ((current_price / extras['close_10_ago']) - 1) * 100
+            technicals['momentum_20'] = ((current_price / extras['close_20_ago']) - 1) * 100
+        
+        return TechnicalEngine.score(technicals, extras, current_price)
+    
+    @staticmethod
+    def score(technicals: Dict, extras: Dict, current_price: float) -> Dict:
+        """Add the signals, their counts and the overall score to a ticker's indicator values"""
+        
+        signals = TechnicalEngine._signals(technicals, extras, current_price)
+        
+        # ===== CALCULATE OVERALL SCORE =====
+        bullish_count = sum(1 for s in signals if s[1] == 'bullish')
+        bearish_count = sum(1 for s in signals if s[1] == 'bearish')
+        total_signals = bullish_count + bearish_count
+        
+        if total_signals > 0:
+            technicals['score'] = ((bullish_count - bearish_count) / total_signals) * 100
+        else:
+            technicals['score'] = 0
+        
+        technicals['signals'] = signals
+        technicals['bullish_count'] = bullish_count
+        technicals['bearish_count'] = bearish_count
+        
+        return technicals
+    
+    @staticmethod
+    def _values(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                lengths: np.ndarray, prices: np.ndarray) -> Tuple[Dict, Dict]:
+        """Indicator columns (one value per row), plus the intermediates the signal rules use"""
+        
+        rows, days = close.shape
+        padding = np.arange(days) < (days - lengths)[:, None]
+        technicals = {}
+        
+        # ===== MOVING AVERAGES =====
+        # Every window's trailing sum from one running sum back from the newest bar
+        longest = min(max(TechnicalEngine.SMA_WINDOWS), days)
+        trailing = np.cumsum(close[:, :-longest - 1:-1], axis=1)
+        close_run = TechnicalEngine.trailing_run(close)
+        for window in TechnicalEngine.SMA_WINDOWS:
+            technicals[f'sma_{window}'] = np.where(
+                close_run >= window, close[:, -1], trailing[:, min(window, longest) - 1] / window
+            )
+        
+        # Padding with each row's first close leaves its EMAs exactly as they were
+        first_close = close[np.arange(rows), np.minimum(days - lengths, days - 1)]
+        seeded = np.where(padding, first_close[:, None], close)
+        emas = TechnicalEngine.ema_last(seeded, TechnicalEngine.EMA_SPANS)
+        for span, ema in zip(TechnicalEngine.EMA_SPANS, emas):
+            technicals[f'ema_{span}'] = ema
+        
+        # ===== MACD =====
+        # The signal line is the 9-period EMA of the close
+        technicals['macd_line'] = technicals['ema_12'] - technicals['ema_26']
+        technicals['macd_signal'] = technicals['ema_9']
+        technicals['macd_histogram'] = technicals['macd_line'] - technicals['macd_signal']
+        
+        # Per-bar inputs of RSI (gains/losses, the first bar counting as no change),
+        # ATR and ADX (true range, directional movement)
+        bars = np.stack((close, high, low))
+        previous = np.concatenate((np.full((3, rows, 1), np.nan), bars[:, :, :-1]), axis=2)
+        delta, plus_dm, minus_dm = bars - previous
+        previous_close = previous[0]
+        
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        gain[padding] = np.nan
+        loss[padding] = np.nan
+        
+        tr = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+        
+        minus_dm = -minus_dm
+        plus_dm[plus_dm < 0] = 0
+        minus_dm[minus_dm < 0] = 0
+        
+        # 14-bar windows ending at each of the last 14 bars, built once for all of them
+        rolling = TechnicalEngine.windows(np.stack((gain, loss, tr, plus_dm, minus_dm, low, high)), 14, 14)
+        sums = rolling[:5].sum(axis=-1)
+        
+        # ===== RSI =====
+        rsi = 100 - (100 / (1 + (sums[0] / 14) / (sums[1] / 14)))  # the last 14 bars
+        
+        technicals['rsi'] = rsi[:, -1]
+        technicals['rsi_prev'] = rsi[:, -2]
+        
+        # ===== STOCHASTIC =====
+        lowest_low = rolling[5, :, -3:].min(axis=-1)
+        highest_high = rolling[6, :, -3:].max(axis=-1)
+        stoch_k = (close[:, -3:] - lowest_low) / (highest_high - lowest_low) * 100
+        
+        technicals['stoch_k'] = stoch_k[:, -1]
+        technicals['stoch_d'] = np.where(
+            TechnicalEngine.trailing_run(stoch_k) >= 3, stoch_k[:, -1], stoch_k.sum(axis=1) / 3
+        )
+        
+        # ===== BOLLINGER BANDS =====
+        # Shares one pass with the CCI's typical-price deviation
+        typical_price = (high[:, -20:] + low[:, -20:] + close[:, -20:]) / 3
+        tp_flat = TechnicalEngine.trailing_run(typical_price) >= 20
+        bb_std, tp_std = np.stack((close[:, -20:], typical_price)).std(axis=-1, ddof=1)
+        bb_std = np.where(close_run >= 20, 0.0, bb_std)
+        tp_std = np.where(tp_flat, 0.0, tp_std)
+        technicals['bb_middle'] = technicals['sma_20']
+        technicals['bb_upper'] = technicals['bb_middle'] + (bb_std * 2)
+        technicals['bb_lower'] = technicals['bb_middle'] - (bb_std * 2)
+        technicals['bb_width'] = (technicals['bb_upper'] - technicals['bb_lower']) / technicals['bb_middle'] * 100
+        
+        # ===== ATR (AVERAGE TRUE RANGE) =====
+        technicals['atr'] = np.where(
+            TechnicalEngine.trailing_run(tr) >= 14, tr[:, -1], sums[2, :, -1] / 14
+        )
+        technicals['atr_percent'] = (technicals['atr'] / prices) * 100
+        
+        # ===== ADX (TREND STRENGTH) =====
+        plus_di = 100 * (sums[3] / sums[2])
+        minus_di = 100 * (sums[4] / sums[2])
+        
+        technicals['adx'] = (100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)).sum(axis=1) / 14
+        technicals['plus_di'] = plus_di[:, -1]
+        technicals['minus_di'] = minus_di[:, -1]
+        
+        # ===== VOLUME ANALYSIS =====
+        avg_volume_20 = np.where(
+            TechnicalEngine.trailing_run(volume) >= 20, volume[:, -1], volume[:, -20:].sum(axis=1) / 20
+        )
+        technicals['volume_ratio'] = volume[:, -1] / avg_volume_20
+        
+        # On-Balance Volume, undefined on the first bar
+        obv = np.sign(delta) * volume
+        missing = np.isnan(obv)
+        obv = np.cumsum(np.where(missing, 0.0, obv), axis=1)
+        obv[missing] = np.nan
+        
+        # ===== SUPPORT & RESISTANCE =====
+        # fmax/fmin skip missing bars
+        technicals['resistance_1'] = np.fmax.reduce(high[:, -20:], axis=1)
+        technicals['support_1'] = np.fmin.reduce(low[:, -20:], axis=1)
+        technicals['resistance_2'] = np.where(
+            lengths >= 50, np.fmax.reduce(high[:, -50:], axis=1), technicals['resistance_1']
+        )
+        technicals['support_2'] = np.where(
+            lengths >= 50, np.fmin.reduce(low[:, -50:], axis=1), technicals['support_1']
+        )
+        
+        # Pivot Points
+        pivot = (high[:, -1] + low[:, -1] + close[:, -1]) / 3
+        technicals['pivot'] = pivot
+        technicals['r1'] = 2 * pivot - low[:, -1]
+        technicals['s1'] = 2 * pivot - high[:, -1]
+        technicals['r2'] = pivot + (high[:, -1] - low[:, -1])
+        technicals['s2'] = pivot - (high[:, -1] - low[:, -1])
+        
+        # ===== MOMENTUM =====
+        technicals['momentum_10'] = ((prices / close[:, -10]) - 1) * 100
+        technicals['momentum_20'] = ((prices / close[:, -20]) - 1) * 100
+        
+        # ===== WILLIAMS %R =====
+        technicals['williams_r'] = (
+            -100 * (highest_high[:, -1] - close[:, -1]) / (highest_high[:, -1] - lowest_low[:, -1])
+        )
+        
+        # ===== CCI (COMMODITY CHANNEL INDEX) =====
+        tp_mean = np.where(tp_flat, typical_price[:, -1], typical_price.sum(axis=1) / 20)
+        technicals['cci'] = (typical_price[:, -1] - tp_mean) / (0.015 * tp_std)
+        
+        extras = {
+            'price_higher': close[:, -1] > close[:, -14],
+            'rsi_14_ago': rsi[:, 0],
+            'obv': obv[:, -1],
+            'obv_sma': np.where(
+                TechnicalEngine.trailing_run(obv) >= 20, obv[:, -1], obv[:, -20:].sum(axis=1) / 20
+            ),
+            'avg_volume_20': avg_volume_20,
+        }
+        
+        return technicals, extras
+    
+    @staticmethod
+    def _signals(technicals: Dict, extras: Dict, current_price: float) -> List[Tuple[str, str]]:
+        """Bullish, bearish and neutral signals from the indicator values"""
+        
+        signals = []
+        
+        # MA Signals
+        if technicals['sma_20']:
+            if current_price > technicals['sma_20']:
+                signals.append(('Above SMA20', 'bullish'))
+            else:
+                signals.append(('Below SMA20', 'bearish'))
+        
+        if technicals['sma_50']:
+            if current_price > technicals['sma_50']:
+                signals.append(('Above SMA50', 'bullish'))
+            else:
+                signals.append(('Below SMA50', 'bearish'))
         
         if technicals['sma_200']:
             if current_price > technicals['sma_200']:
@@ -876,36 +2391,19 @@ class DataFetcher:
             else:
                 signals.append(('Death Cross', 'bearish'))
         
-        # ===== MACD =====
-        macd_line = technicals['ema_12'] - technicals['ema_26']
-        signal_line = close.ewm(span=9, adjust=False).mean().iloc[-1]
-        macd_histogram = macd_line - signal_line
-        
-        technicals['macd_line'] = macd_line
-        technicals['macd_signal'] = signal_line
-        technicals['macd_histogram'] = macd_histogram
-        
-        if macd_histogram > 0:
+        # MACD
+        if technicals['macd_histogram'] > 0:
             signals.append(('MACD Bullish', 'bullish'))
         else:
             signals.append(('MACD Bearish', 'bearish'))
         
         # MACD Zero Line Cross
-        if macd_line > 0:
+        if technicals['macd_line'] > 0:
             signals.append(('MACD Above Zero', 'bullish'))
         else:
             signals.append(('MACD Below Zero', 'bearish'))
         
-        # ===== RSI =====
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        technicals['rsi'] = rsi.iloc[-1]
-        technicals['rsi_prev'] = rsi.iloc[-2] if len(rsi) > 1 else rsi.iloc[-1]
-        
+        # RSI
         if technicals['rsi'] > 80:
             signals.append(('RSI Extremely Overbought', 'bearish'))
         elif technicals['rsi'] > 70:
@@ -918,24 +2416,15 @@ class DataFetcher:
             signals.append(('RSI Neutral', 'neutral'))
         
         # RSI Divergence (simple check)
-        if len(close) >= 14:
-            price_higher = close.iloc[-1] > close.iloc[-14]
-            rsi_higher = technicals['rsi'] > rsi.iloc[-14]
-            
-            if price_higher and not rsi_higher:
-                signals.append(('Bearish RSI Divergence', 'bearish'))
-            elif not price_higher and rsi_higher:
-                signals.append(('Bullish RSI Divergence', 'bullish'))
+        price_higher = extras['price_higher']
+        rsi_higher = technicals['rsi'] > extras['rsi_14_ago']
         
-        # ===== STOCHASTIC =====
-        lowest_low = low.rolling(window=14).min()
-        highest_high = high.rolling(window=14).max()
-        stoch_k = ((close - lowest_low) / (highest_high - lowest_low) * 100)
-        stoch_d = stoch_k.rolling(window=3).mean()
-        
-        technicals['stoch_k'] = stoch_k.iloc[-1]
-        technicals['stoch_d'] = stoch_d.iloc[-1]
+        if price_higher and not rsi_higher:
+            signals.append(('Bearish RSI Divergence', 'bearish'))
+        elif not price_higher and rsi_higher:
+            signals.append(('Bullish RSI Divergence', 'bullish'))
         
+        # Stochastic
         if technicals['stoch_k'] > 80 and technicals['stoch_d'] > 80:
             signals.append(('Stochastic Overbought', 'bearish'))
         elif technicals['stoch_k'] < 20 and technicals['stoch_d'] < 20:
@@ -947,14 +2436,6 @@ class DataFetcher:
         else:
             signals.append(('Stoch K < D', 'bearish'))
         
-        # ===== BOLLINGER BANDS =====
-        bb_period = 20
-        bb_std = close.rolling(window=bb_period).std()
-        technicals['bb_middle'] = technicals['sma_20']
-        technicals['bb_upper'] = technicals['bb_middle'] + (bb_std.iloc[-1] * 2)
-        technicals['bb_lower'] = technicals['bb_middle'] - (bb_std.iloc[-1] * 2)
-        technicals['bb_width'] = (technicals['bb_upper'] - technicals['bb_lower']) / technicals['bb_middle'] * 100
-        
         # Bollinger Band position
         if current_price > technicals['bb_upper']:
             signals.append(('Above Upper BB', 'bearish'))
@@ -971,44 +2452,13 @@ class DataFetcher:
         if technicals['bb_width'] < 5:  # Tight bands
             signals.append(('BB Squeeze', 'neutral'))
         
-        # ===== ATR (AVERAGE TRUE RANGE) =====
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        technicals['atr'] = tr.rolling(window=14).mean().iloc[-1]
-        technicals['atr_percent'] = (technicals['atr'] / current_price) * 100
-        
-        # ===== ADX (TREND STRENGTH) =====
-        try:
-            plus_dm = high.diff()
-            minus_dm = -low.diff()
-            plus_dm[plus_dm < 0] = 0
-            minus_dm[minus_dm < 0] = 0
-            
-            tr_smooth = tr.rolling(window=14).sum()
-            plus_di = 100 * (plus_dm.rolling(window=14).sum() / tr_smooth)
-            minus_di = 100 * (minus_dm.rolling(window=14).sum() / tr_smooth)
-            
-            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-            adx = dx.rolling(window=14).mean()
-            
-            technicals['adx'] = adx.iloc[-1] if not np.isnan(adx.iloc[-1]) else 25
-            technicals['plus_di'] = plus_di.iloc[-1]
-            technicals['minus_di'] = minus_di.iloc[-1]
-            
-            if technicals['adx'] > 40:
-                signals.append(('Strong Trend', 'neutral'))
-            elif technicals['adx'] < 20:
-                signals.append(('Weak Trend', 'neutral'))
-        except:
-            technicals['adx'] = 25
-        
-        # ===== VOLUME ANALYSIS =====
-        avg_volume_20 = volume.rolling(window=20).mean().iloc[-1]
-        technicals['volume_ratio'] = volume.iloc[-1] / avg_volume_20 if avg_volume_20 > 0 else 1
+        # ADX
+        if technicals['adx'] > 40:
+            signals.append(('Strong Trend', 'neutral'))
+        elif technicals['adx'] < 20:
+            signals.append(('Weak Trend', 'neutral'))
         
+        # Volume
         if technicals['volume_ratio'] > 3:
             signals.append(('Extreme Volume', 'neutral'))
         elif technicals['volume_ratio'] > 2:
@@ -1017,141 +2467,1850 @@ class DataFetcher:
             signals.append(('Low Volume', 'neutral'))
         
         # On-Balance Volume trend
-        obv = (np.sign(close.diff()) * volume).cumsum()
-        obv_sma = obv.rolling(window=20).mean()
-        if obv.iloc[-1] > obv_sma.iloc[-1]:
+        if extras['obv'] > extras['obv_sma']:
             signals.append(('OBV Bullish', 'bullish'))
         else:
             signals.append(('OBV Bearish', 'bearish'))
         
-        # ===== SUPPORT & RESISTANCE =====
-        technicals['resistance_1'] = high.tail(20).max()
-        technicals['support_1'] = low.tail(20).min()
-        technicals['resistance_2'] = high.tail(50).max() if len(high) >= 50 else technicals['resistance_1']
-        technicals['support_2'] = low.tail(50).min() if len(low) >= 50 else technicals['support_1']
-        
-        # Pivot Points
-        pivot = (high.iloc[-1] + low.iloc[-1] + close.iloc[-1]) / 3
-        technicals['pivot'] = pivot
-        technicals['r1'] = 2 * pivot - low.iloc[-1]
-        technicals['s1'] = 2 * pivot - high.iloc[-1]
-        technicals['r2'] = pivot + (high.iloc[-1] - low.iloc[-1])
-        technicals['s2'] = pivot - (high.iloc[-1] - low.iloc[-1])
-        
-        # ===== MOMENTUM =====
-        technicals['momentum_10'] = ((current_price / close.iloc[-10]) - 1) * 100 if len(close) >= 10 else 0
-        technicals['momentum_20'] = ((current_price / close.iloc[-20]) - 1) * 100 if len(close) >= 20 else 0
-        
-        # ===== WILLIAMS %R =====
-        williams_r = -100 * (highest_high - close) / (highest_high - lowest_low)
-        technicals['williams_r'] = williams_r.iloc[-1]
-        
+        # Williams %R
         if technicals['williams_r'] > -20:
             signals.append(('Williams %R Overbought', 'bearish'))
         elif technicals['williams_r'] < -80:
             signals.append(('Williams %R Oversold', 'bullish'))
         
-        # ===== CCI (COMMODITY CHANNEL INDEX) =====
-        typical_price = (high + low + close) / 3
-        cci = (typical_price - typical_price.rolling(window=20).mean()) / (0.015 * typical_price.rolling(window=20).std())
-        technicals['cci'] = cci.iloc[-1]
-        
+        # CCI
         if technicals['cci'] > 100:
             signals.append(('CCI Overbought', 'bearish'))
         elif technicals['cci'] < -100:
             signals.append(('CCI Oversold', 'bullish'))
         
-        # ===== CALCULATE OVERALL SCORE =====
-        bullish_count = sum(1 for s in signals if s[1] == 'bullish')
-        bearish_count = sum(1 for s in signals if s[1] == 'bearish')
-        total_signals = bullish_count + bearish_count
+        return signals
+    
+    @staticmethod
+    def ema_last(values: np.ndarray, spans: Tuple[int, ...]) -> np.ndarray:
+        """Final value of each span's EMA (adjust=False, seeded with the first value) as one weighted sum.
         
-        if total_signals > 0:
-            technicals['score'] = ((bullish_count - bearish_count) / total_signals) * 100
+        Takes a tickers x days matrix; the result has one row per span and one column
+        per ticker. Rows with missing bars follow pandas' ewm, which re-weights around gaps.
+        """
+        
+        alpha = 2 / (np.asarray(spans, dtype=float)[:, None] + 1)
+        weights = (1 - alpha) ** np.arange(values.shape[-1] - 1, -1, -1)
+        weights[:, 1:] *= alpha
+        emas = weights @ values.T
+        
+        # The weights only sum to 1 up to rounding; a flat row is its own EMA, as in pandas
+        flat = (values == values[:, :1]).all(axis=1)
+        emas[:, flat] = values[flat, 0]
+        
+        for row in np.flatnonzero(np.isnan(values).any(axis=1)):
+            series = pd.Series(values[row])
+            emas[:, row] = [series.ewm(span=span, adjust=False).mean().iloc[-1] for span in spans]
+        
+        return emas
+    
+    @staticmethod
+    def trailing_run(values: np.ndarray) -> np.ndarray:
+        """How many bars at the end of each row equal its last one.
+        
+        pandas returns a rolling mean exactly, and a deviation of 0, for a window whose
+        values are all the same; windows no longer than this run get the same here.
+        """
+        
+        same = values == values[:, -1:]
+        return np.where(same.all(axis=1), values.shape[1], np.argmin(same[:, ::-1], axis=1))
+    
+    @staticmethod
+    def windows(values: np.ndarray, window: int, count: int) -> np.ndarray:
+        """The trailing `window` bars ending at each of the last `count` bars.
+        
+        Works on the last axis, adding one of length `count` before it. Windows for bars
+        without enough history before them are NaN, like a rolling result.
+        """
+        
+        n = values.shape[-1]
+        missing = window + count - 1 - n
+        if missing > 0:
+            values = np.concatenate((np.full(values.shape[:-1] + (missing,), np.nan), values), axis=-1)
+            n += missing
+        
+        index = np.arange(n - count - window + 1, n - window + 1)[:, None] + np.arange(window)
+        return values[..., index]
+
+
+class IndicatorState:
+    """Running indicator state for one ticker, updated in constant time per bar or tick.
+    
+    The bars are split into committed bars and the still-forming last bar, which
+    `update` replaces until a new bar starts. Everything the committed bars contribute
+    is kept as running values: each EMA, running sums for the moving averages, the OBV
+    total, and short rings of the per-bar inputs (gains/losses, true range, directional
+    movement, typical price, volume) and of the per-bar RSI, %K and DX the signals look
+    back on. `technicals` combines them with the forming bar into the same dict
+    TechnicalEngine returns for those bars. RSI and ATR keep the engine's plain 14-bar
+    averages, held as ring sums. The EMAs step like pandas' ewm(adjust=False), skipping
+    missing closes, and flat windows give exact means as pandas' rolling ones do.
+    """
+    
+    ALPHAS = tuple((span, 2 / (span + 1)) for span in TechnicalEngine.EMA_SPANS)
+    
+    def __init__(self):
+        self.count = 0  # committed bars
+        self.bar = None  # forming bar: (high, low, close, volume)
+        self.emas = dict.fromkeys(TechnicalEngine.EMA_SPANS, math.nan)
+        self.ema_gap = 0  # missing closes since the last one the EMAs took
+        self.sums = dict.fromkeys(TechnicalEngine.SMA_WINDOWS, 0.0)  # last window - 1 closes
+        self.close_run = 0  # committed closes at the end equal to the last one
+        self.obv_total = 0.0
+        
+        self.closes = deque(maxlen=max(TechnicalEngine.SMA_WINDOWS) - 1)
+        self.highs, self.lows = deque(maxlen=49), deque(maxlen=49)
+        self.typicals, self.volumes, self.obvs = deque(maxlen=19), deque(maxlen=19), deque(maxlen=19)
+        self.gains, self.losses = deque(maxlen=14), deque(maxlen=14)
+        self.trs, self.plus_dms, self.minus_dms = deque(maxlen=14), deque(maxlen=14), deque(maxlen=14)
+        self.rsis, self.dxs, self.stoch_ks = deque(maxlen=13), deque(maxlen=13), deque(maxlen=2)
+        self.extremes = (np.nan,) * 6  # highest/lowest of the last 13, 19 and 49 committed bars
+    
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame) -> 'IndicatorState':
+        """State for a non-empty daily OHLCV history, its last bar left forming"""
+        return cls.from_matrix(*TechnicalEngine.stack([hist]))[0]
+    
+    @classmethod
+    def from_matrix(cls, close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                    lengths: np.ndarray) -> List['IndicatorState']:
+        """States seeded from right-aligned tickers x days matrices (as TechnicalEngine.stack
+        builds them) in one pass, each row's last bar left forming. Rows need at least one bar.
+        """
+        
+        rows, days = close.shape
+        counts = lengths - 1
+        forming = np.column_stack((high[:, -1], low[:, -1], close[:, -1], volume[:, -1])).tolist()
+        close, high, low, volume = close[:, :-1], high[:, :-1], low[:, :-1], volume[:, :-1]
+        days -= 1
+        padding = np.arange(days) < (days - counts)[:, None]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bars = np.stack((close, high, low))
+            previous = np.concatenate((np.full((3, rows, 1), np.nan), bars[:, :, :-1]), axis=2)
+            delta, plus_dm, minus_dm = bars - previous
+            minus_dm = -minus_dm
+            plus_dm[plus_dm < 0] = 0
+            minus_dm[minus_dm < 0] = 0
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+            gain[padding] = np.nan
+            loss[padding] = np.nan
+            tr = np.fmax(high - low, np.fmax(np.abs(high - previous[0]), np.abs(low - previous[0])))
+            typical = (high + low + close) / 3
+            
+            obv = np.sign(delta) * volume
+            missing = np.isnan(obv)
+            obv = np.cumsum(np.where(missing, 0.0, obv), axis=1)
+            obv_total = obv[:, -1].tolist()
+            obv[missing] = np.nan
+            
+            # Per-bar RSI, %K and DX of the last committed bars
+            sums = TechnicalEngine.windows(np.stack((gain, loss, tr, plus_dm, minus_dm)), 14, 13).sum(axis=-1)
+            rsi = 100 - (100 / (1 + (sums[0] / 14) / (sums[1] / 14)))
+            plus_di = 100 * (sums[3] / sums[2])
+            minus_di = 100 * (sums[4] / sums[2])
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            
+            lowest_low = TechnicalEngine.windows(low, 14, 2).min(axis=-1)
+            highest_high = TechnicalEngine.windows(high, 14, 2).max(axis=-1)
+            stoch_k = (close[:, -2:] - lowest_low) / (highest_high - lowest_low) * 100
+            
+            # EMAs as in the engine; running sums of the last window - 1 closes
+            first_close = close[np.arange(rows), np.minimum(days - counts, days - 1)]
+            emas = TechnicalEngine.ema_last(
+                np.where(padding, first_close[:, None], close), TechnicalEngine.EMA_SPANS
+            ).T.tolist()
+            trailing = np.cumsum(np.where(padding, 0.0, close)[:, ::-1], axis=1)
+            close_sums = trailing[:, [min(window - 1, days) - 1 for window in TechnicalEngine.SMA_WINDOWS]].tolist()
+            close_runs = TechnicalEngine.trailing_run(close).tolist() if days else [0] * rows
+            ema_gaps = TechnicalEngine.trailing_run(np.isnan(close)).tolist() if days else [0] * rows
+        
+        states = []
+        for i, count in enumerate(counts.tolist()):
+            state = cls()
+            state.bar = tuple(forming[i])
+            states.append(state)
+            if not count:
+                continue
+            
+            state.count = count
+            state.obv_total = obv_total[i]
+            state.emas = dict(zip(TechnicalEngine.EMA_SPANS, emas[i]))
+            state.sums = dict(zip(TechnicalEngine.SMA_WINDOWS, close_sums[i]))
+            state.close_run = min(close_runs[i], count)
+            state.ema_gap = min(ema_gaps[i], count) if math.isnan(close[i, -1]) else 0
+            
+            for ring, values in (
+                (state.closes, close), (state.highs, high), (state.lows, low), (state.volumes, volume),
+                (state.typicals, typical), (state.obvs, obv),
+                (state.gains, gain), (state.losses, loss), (state.trs, tr),
+                (state.plus_dms, plus_dm), (state.minus_dms, minus_dm),
+                (state.rsis, rsi), (state.dxs, dx), (state.stoch_ks, stoch_k),
+            ):
+                ring.extend(values[i, values.shape[1] - min(count, ring.maxlen):].tolist())
+            
+            state._remember_extremes()
+        
+        return states
+    
+    def update(self, high: float, low: float, close: float, volume: float, new_bar: bool = False):
+        """Replace the forming bar, or commit it and start a new one if `new_bar`"""
+        if new_bar and self.bar is not None:
+            self._commit(*self.bar)
+        self.bar = (float(high), float(low), float(close), float(volume))
+    
+    def technicals(self, current_price: float) -> Dict:
+        """Indicator values, signals and overall score with the forming bar as the latest"""
+        
+        values = self.values()
+        if values is None:
+            return {'signals': [], 'score': 0}
+        return TechnicalEngine.reprice(*values, current_price)
+    
+    def values(self) -> Optional[Tuple[Dict, Dict]]:
+        """Indicator values that do not depend on the current price, plus the intermediates
+        the signal rules use (see TechnicalEngine.reprice); None below 20 bars.
+        """
+        
+        n = self.count + 1
+        if self.bar is None or n < 20:
+            return None
+        
+        high, low, close, volume = self.bar
+        gain, loss, tr, plus_dm, minus_dm, obv_step = self._inputs(high, low, close, volume)
+        highest_13, lowest_13, highest_19, lowest_19, highest_49, lowest_49 = self.extremes
+        technicals = {}
+        
+        # ===== MOVING AVERAGES =====
+        close_run = self.close_run + 1 if self.count and close == self.closes[-1] else 1
+        for window in TechnicalEngine.SMA_WINDOWS:
+            if n < window:
+                technicals[f'sma_{window}'] = None
+            else:
+                technicals[f'sma_{window}'] = close if close_run >= window else (self.sums[window] + close) / window
+        for span, alpha in self.ALPHAS:
+            technicals[f'ema_{span}'] = self._ema_step(self.emas[span], alpha, close, self.ema_gap)
+        
+        # ===== MACD =====
+        technicals['macd_line'] = technicals['ema_12'] - technicals['ema_26']
+        technicals['macd_signal'] = technicals['ema_9']
+        technicals['macd_histogram'] = technicals['macd_line'] - technicals['macd_signal']
+        
+        # ===== RSI =====
+        gains, losses = list(self.gains), list(self.losses)
+        technicals['rsi'] = self._rsi(sum(gains[1:]) + gain, sum(losses[1:]) + loss)
+        technicals['rsi_prev'] = self.rsis[-1]
+        
+        # ===== STOCHASTIC =====
+        lowest_low, highest_high = self._nanmin(lowest_13, low), self._nanmax(highest_13, high)
+        stoch_k = self._divide(close - lowest_low, highest_high - lowest_low) * 100
+        technicals['stoch_k'] = stoch_k
+        technicals['stoch_d'] = self._mean([self.stoch_ks[0], self.stoch_ks[1], stoch_k])
+        
+        # ===== BOLLINGER BANDS =====
+        typical_price = (high + low + close) / 3
+        typicals = list(self.typicals) + [typical_price]
+        technicals['bb_middle'] = technicals['sma_20']
+        bb_std = self._std(list(self.closes)[-19:] + [close])
+        tp_std = self._std(typicals)
+        technicals['bb_upper'] = technicals['bb_middle'] + (bb_std * 2)
+        technicals['bb_lower'] = technicals['bb_middle'] - (bb_std * 2)
+        technicals['bb_width'] = self._divide(technicals['bb_upper'] - technicals['bb_lower'], technicals['bb_middle']) * 100
+        
+        # ===== ATR (AVERAGE TRUE RANGE) =====
+        trs = list(self.trs)[1:] + [tr]
+        tr_sum = sum(trs)
+        technicals['atr'] = self._mean(trs)
+        technicals['atr_percent'] = None  # priced in TechnicalEngine.reprice
+        
+        # ===== ADX (TREND STRENGTH) =====
+        plus_di, minus_di, dx = self._directional(
+            sum(list(self.plus_dms)[1:]) + plus_dm, sum(list(self.minus_dms)[1:]) + minus_dm, tr_sum
+        )
+        adx = (sum(self.dxs) + dx) / 14
+        technicals['adx'] = 25 if math.isnan(adx) else adx
+        technicals['plus_di'] = plus_di
+        technicals['minus_di'] = minus_di
+        
+        # ===== VOLUME ANALYSIS =====
+        avg_volume_20 = self._mean(list(self.volumes) + [volume])
+        technicals['volume_ratio'] = self._divide(volume, avg_volume_20) if avg_volume_20 > 0 else 1
+        obv = self.obv_total + obv_step if not math.isnan(obv_step) else math.nan
+        
+        # ===== SUPPORT & RESISTANCE =====
+        technicals['resistance_1'] = self._fmax(highest_19, high)
+        technicals['support_1'] = self._fmin(lowest_19, low)
+        technicals['resistance_2'] = self._fmax(highest_49, high) if n >= 50 else technicals['resistance_1']
+        technicals['support_2'] = self._fmin(lowest_49, low) if n >= 50 else technicals['support_1']
+        
+        # Pivot Points
+        pivot = (high + low + close) / 3
+        technicals['pivot'] = pivot
+        technicals['r1'] = 2 * pivot - low
+        technicals['s1'] = 2 * pivot - high
+        technicals['r2'] = pivot + (high - low)
+        technicals['s2'] = pivot - (high - low)
+        
+        # ===== MOMENTUM =====
+        technicals['momentum_10'] = None
+        technicals['momentum_20'] = None
+        
+        # ===== WILLIAMS %R =====
+        technicals['williams_r'] = self._divide(-100 * (highest_high - close), highest_high - lowest_low)
+        
+        # ===== CCI (COMMODITY CHANNEL INDEX) =====
+        technicals['cci'] = self._divide(typical_price - self._mean(typicals), 0.015 * tp_std)
+        
+        if n < 50:
+            technicals['ema_50'] = None
+        
+        extras = {
+            'price_higher': close > self.closes[-13],
+            'rsi_14_ago': self.rsis[0],
+            'obv': obv,
+            'obv_sma': self._mean(list(self.obvs) + [obv]),
+            'avg_volume_20': avg_volume_20,
+            'close_10_ago': np.float64(self.closes[-9]),
+            'close_20_ago': np.float64(self.closes[-19]),
+        }
+        
+        # NumPy scalars, as the engine returns, so downstream arithmetic behaves the same
+        for name, value in technicals.items():
+            if isinstance(value, float):
+                technicals[name] = np.float64(value)
+        
+        return technicals, extras
+    
+    def _commit(self, high: float, low: float, close: float, volume: float):
+        """Fold a finished bar into the running values and rings"""
+        
+        gain, loss, tr, plus_dm, minus_dm, obv_step = self._inputs(high, low, close, volume)
+        
+        # A missing close leaves the EMAs as they are; the next close is weighted across the gap
+        if math.isnan(close):
+            self.ema_gap += 1
         else:
-            technicals['score'] = 0
+            for span, alpha in self.ALPHAS:
+                self.emas[span] = self._ema_step(self.emas[span], alpha, close, self.ema_gap)
+            self.ema_gap = 0
+        
+        self.close_run = self.close_run + 1 if self.count and close == self.closes[-1] else 1
+        
+        for window in TechnicalEngine.SMA_WINDOWS:
+            keep = window - 1
+            total = self.sums[window] + close
+            if len(self.closes) >= keep:
+                total -= self.closes[-keep]
+            if not math.isfinite(total):
+                # A missing close poisons the running sum; rebuild it from the ring
+                total = sum(list(self.closes)[-keep + 1:] + [close])
+            self.sums[window] = total
+        
+        if not math.isnan(obv_step):
+            self.obv_total += obv_step
+        
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.volumes.append(volume)
+        self.typicals.append((high + low + close) / 3)
+        self.obvs.append(self.obv_total if not math.isnan(obv_step) else math.nan)
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.trs.append(tr)
+        self.plus_dms.append(plus_dm)
+        self.minus_dms.append(minus_dm)
+        self.count += 1
+        
+        # Per-bar values of the bar just committed, once its 14-bar window is complete
+        full = self.count >= 14
+        self.rsis.append(self._rsi(sum(self.gains), sum(self.losses)) if full else math.nan)
+        self.dxs.append(self._directional(sum(self.plus_dms), sum(self.minus_dms), sum(self.trs))[2] if full else math.nan)
+        lowest, highest = self._nanmin(*list(self.lows)[-14:]), self._nanmax(*list(self.highs)[-14:])
+        self.stoch_ks.append(self._divide(close - lowest, highest - lowest) * 100 if full else math.nan)
+        
+        self._remember_extremes()
+    
+    def _remember_extremes(self):
+        """Highest highs and lowest lows of the committed bars the window indicators reuse"""
+        highs, lows = list(self.highs), list(self.lows)
+        self.extremes = (
+            self._nanmax(*highs[-13:]), self._nanmin(*lows[-13:]),
+            self._fmax(*highs[-19:]), self._fmin(*lows[-19:]), self._fmax(*highs), self._fmin(*lows),
+        )
+    
+    def _inputs(self, high: float, low: float, close: float, volume: float) -> Tuple[float, ...]:
+        """Gain, loss, true range, directional movement and OBV step of a bar after the committed ones"""
+        
+        if not self.count:
+            # The first bar counts as no change
+            return 0.0, 0.0, high - low, math.nan, math.nan, math.nan
+        
+        previous_close = self.closes[-1]
+        delta = close - previous_close
+        plus_dm = high - self.highs[-1]
+        minus_dm = self.lows[-1] - low
+        direction = math.nan if math.isnan(delta) else (delta > 0) - (delta < 0)
+        
+        return (
+            delta if delta > 0 else 0.0,
+            -delta if delta < 0 else 0.0,
+            self._fmax(high - low, self._fmax(abs(high - previous_close), abs(low - previous_close))),
+            0.0 if plus_dm < 0 else plus_dm,
+            0.0 if minus_dm < 0 else minus_dm,
+            direction * volume,
+        )
+    
+    @staticmethod
+    def _rsi(gain_sum: float, loss_sum: float) -> float:
+        """RSI of one 14-bar window from its summed gains and losses"""
+        return 100 - (100 / (1 + IndicatorState._divide(gain_sum / 14, loss_sum / 14)))
+    
+    @staticmethod
+    def _directional(plus_dm_sum: float, minus_dm_sum: float, tr_sum: float) -> Tuple[float, float, float]:
+        """+DI, -DI and DX of one 14-bar window"""
+        plus_di = 100 * IndicatorState._divide(plus_dm_sum, tr_sum)
+        minus_di = 100 * IndicatorState._divide(minus_dm_sum, tr_sum)
+        return plus_di, minus_di, IndicatorState._divide(100 * abs(plus_di - minus_di), plus_di + minus_di)
+    
+    @staticmethod
+    def _ema_step(ema: float, alpha: float, close: float, gap: int = 0) -> float:
+        """One step of pandas' ewm(adjust=False): `gap` missing closes since `ema` last moved"""
+        
+        if math.isnan(close):
+            return ema
+        if math.isnan(ema):
+            return close
+        if ema == close:
+            return ema
+        
+        old_weight = 1.0
+        for _ in range(gap + 1):
+            old_weight *= 1 - alpha
+        return (old_weight * ema + alpha * close) / (old_weight + alpha)
+    
+    @staticmethod
+    def _mean(values: List[float]) -> float:
+        """Mean of one window, exact when its values are all the same (as pandas' rolling mean)"""
+        if all(value == values[-1] for value in values):
+            return values[-1]
+        return sum(values) / len(values)
+    
+    @staticmethod
+    def _std(values: List[float]) -> float:
+        """Sample standard deviation (ddof=1), 0 for a window of one repeated value"""
+        if all(value == values[-1] for value in values):
+            return 0.0
+        mean = sum(values) / len(values)
+        return math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1))
+    
+    @staticmethod
+    def _divide(numerator: float, denominator: float) -> float:
+        """Float division that gives inf/nan on a zero denominator, like NumPy"""
+        if denominator:
+            return numerator / denominator
+        if math.isnan(numerator) or numerator == 0:
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1, denominator)
+    
+    @staticmethod
+    def _nanmax(*values: float) -> float:
+        """Largest value, nan if any is missing (like a rolling max over a window with a gap)"""
+        return math.nan if not values or any(math.isnan(value) for value in values) else max(values)
+    
+    @staticmethod
+    def _nanmin(*values: float) -> float:
+        """Smallest value, nan if any is missing (like a rolling min over a window with a gap)"""
+        return math.nan if not values or any(math.isnan(value) for value in values) else min(values)
+    
+    @staticmethod
+    def _fmax(*values: float) -> float:
+        """Largest value, skipping missing ones (nan if all are missing)"""
+        return max((value for value in values if not math.isnan(value)), default=math.nan)
+    
+    @staticmethod
+    def _fmin(*values: float) -> float:
+        """Smallest value, skipping missing ones (nan if all are missing)"""
+        return min((value for value in values if not math.isnan(value)), default=math.nan)
+
+
+class IndicatorStates:
+    """Streaming indicator state per ticker, kept in step with its cached daily history.
+    
+    A state is reused while the history still ends on the same bars: a changed last
+    bar replaces the forming bar, a few new bars are pushed onto it, and anything else
+    (a first look, a gap, revised older bars) seeds a fresh state. During the session
+    the latest quote is merged into today's bar, so a quote refresh costs one forming-bar
+    update per ticker rather than a pass over the year of bars.
+    """
+    
+    MAX_TICKERS = 5000  # least recently used states are dropped beyond this
+    MAX_NEW_BARS = 5  # more bars than this since the last sync reseed instead
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = OrderedDict()  # normalized ticker -> (state, history it follows, its last date and bar)
+    
+    def technicals_many(self, histories: Dict[str, pd.DataFrame], quotes: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Technicals per ticker (normalized ticker -> non-empty daily history, -> quote).
+        
+        Once a ticker's last bar is final, its price-independent values are memoized in
+        the shared cache under a fingerprint of the history, so later refreshes from any
+        session only reprice them against the current quote. Those values are always taken
+        from a state freshly seeded from that history: a streamed one also remembers bars
+        from before it (EMA seeds, the OBV total), so its values depend on its past.
+        """
+        
+        sessions = {is_crypto: self._session_date(is_crypto) for is_crypto in (False, True)}
+        results, memo_keys = {}, {}
+        
+        for normalized_ticker, hist in histories.items():
+            if hist.index.values[-1] != sessions[DataFetcher.is_crypto(normalized_ticker)]:
+                memo_keys[normalized_ticker] = self._memo_key(normalized_ticker, hist)
+                memoized = MARKET_CACHE.get(memo_keys[normalized_ticker])
+                if memoized is not None:
+                    results[normalized_ticker] = TechnicalEngine.reprice(*memoized, quotes[normalized_ticker]['price'])
+        
+        pending = [normalized_ticker for normalized_ticker in histories if normalized_ticker not in results]
+        with self._lock:
+            entries = {normalized_ticker: self._states.pop(normalized_ticker, None) for normalized_ticker in pending}
+        
+        states = {
+            normalized_ticker: None if normalized_ticker in memo_keys
+            else self._advance(entries[normalized_ticker], histories[normalized_ticker])
+            for normalized_ticker in pending
+        }
         
-        technicals['signals'] = signals
-        technicals['bullish_count'] = bullish_count
-        technicals['bearish_count'] = bearish_count
+        # Tickers without a usable state are seeded together
+        reseed = [normalized_ticker for normalized_ticker, state in states.items() if state is None]
+        if reseed:
+            seeded = IndicatorState.from_matrix(*TechnicalEngine.stack([histories[t] for t in reseed]))
+            states.update(zip(reseed, seeded))
         
-        return technicals
+        for normalized_ticker, state in states.items():
+            hist = histories[normalized_ticker]
+            bar = state.bar
+            price = quotes[normalized_ticker]['price']
+            
+            if normalized_ticker not in memo_keys:
+                # Today's bar is still forming; bring it up to the live quote
+                high, low, _, volume = bar
+                state.update(
+                    IndicatorState._fmax(high, price), IndicatorState._fmin(low, price), price,
+                    IndicatorState._fmax(volume, float(quotes[normalized_ticker].get('volume') or 0))
+                )
+            
+            values = state.values()
+            if values is None:
+                results[normalized_ticker] = {'signals': [], 'score': 0}
+            else:
+                if normalized_ticker in memo_keys:
+                    MARKET_CACHE.set(
+                        memo_keys[normalized_ticker], values,
+                        HistoryStore.refresh_ttl(DataFetcher.is_crypto(normalized_ticker))
+                    )
+                results[normalized_ticker] = TechnicalEngine.reprice(*values, price)
+            
+            with self._lock:
+                self._states[normalized_ticker] = (state, weakref.ref(hist), hist.index.values[-1], bar)
+                while len(self._states) > self.MAX_TICKERS:
+                    self._states.popitem(last=False)
+        
+        return results
     
     @staticmethod
-    def get_benchmark_data(symbol: str = 'SPY') -> Optional[pd.DataFrame]:
-        """Fetch benchmark data for comparison"""
+    def _memo_key(normalized_ticker: str, hist: pd.DataFrame) -> str:
+        """Cache key for a ticker's indicator values under this version of its history"""
+        return f"technicals:{normalized_ticker}:{TechnicalEngine.fingerprint(hist)}"
+    
+    @staticmethod
+    def _advance(entry: Optional[Tuple], hist: pd.DataFrame) -> Optional[IndicatorState]:
+        """Bring a stored state up to the history's bars, its forming bar set to the last one.
         
-        current_time = datetime.now()
+        Returns None when the state cannot follow the history and has to be reseeded.
+        """
         
-        # Check cache
-        if st.session_state.benchmark_data is not None:
-            if st.session_state.benchmark_timestamp:
-                age = (current_time - st.session_state.benchmark_timestamp).seconds
-                if age < 300:  # 5 minute cache
-                    return st.session_state.benchmark_data
+        if entry is None:
+            return None
         
-        try:
-            benchmark = yf.Ticker(symbol)
-            hist = benchmark.history(period="1y")
+        state, followed, synced_date, bar = entry
+        if followed() is hist:
+            # Same cached history as last time: only the live quote may have moved
+            state.update(*bar)
+            return state
+        
+        position = hist.index.get_indexer([synced_date])[0]
+        new_bars = len(hist) - 1 - position
+        if position < 1 or new_bars > IndicatorStates.MAX_NEW_BARS or not state.count:
+            return None
+        
+        columns = [hist[column].to_numpy(dtype=float) for column in ('High', 'Low', 'Close', 'Volume')]
+        
+        # The bar before the forming one must still be the one the state committed last
+        if columns[2][position - 1] != state.closes[-1]:
+            return None
+        
+        for offset in range(new_bars + 1):
+            state.update(*(values[position + offset] for values in columns), new_bar=offset > 0)
+        return state
+    
+    @staticmethod
+    def _session_date(is_crypto: bool) -> np.datetime64:
+        """Date of the bar currently forming: today in New York, or in UTC for crypto"""
+        tz = timezone.utc if is_crypto else HistoryStore.MARKET_TZ
+        return np.datetime64(datetime.now(tz).date(), 'ns')
+
+
+@st.cache_resource
+def get_indicator_states() -> IndicatorStates:
+    """Create the process-wide streaming indicator states once"""
+    return IndicatorStates()
+
+
+INDICATORS = get_indicator_states()
+
+
+class IndicatorGraph:
+    """Full-length indicator series, declared as a graph of named nodes.
+    
+    Each node lists the nodes it is computed from and a function of their arrays; the
+    bar columns (open, high, low, close, volume) are the roots. Series are evaluated
+    lazily per ticker and history version and kept in the shared cache, so every chart
+    overlay or rule reading a node gets the same array, computed once. Their last values
+    agree with TechnicalEngine's. Add indicators with `register`.
+    """
+    
+    INPUTS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+    
+    NODES = {
+        **{f'sma_{window}': (('close',), lambda close, window=window: IndicatorGraph.rolling(close, window, np.mean))
+           for window in TechnicalEngine.SMA_WINDOWS},
+        **{f'ema_{span}': (('close',), lambda close, span=span: IndicatorGraph.ema(close, span))
+           for span in TechnicalEngine.EMA_SPANS},
+        'macd_line': (('ema_12', 'ema_26'), lambda fast, slow: fast - slow),
+        'std_20': (('close',), lambda close: IndicatorGraph.std(close, 20)),
+        'bb_upper': (('sma_20', 'std_20'), lambda middle, std: middle + (std * 2)),
+        'bb_lower': (('sma_20', 'std_20'), lambda middle, std: middle - (std * 2)),
+        'delta': (('close',), lambda close: np.concatenate(([np.nan], np.diff(close)))),
+        'gain': (('delta',), lambda delta: np.where(delta > 0, delta, 0.0)),
+        'loss': (('delta',), lambda delta: np.where(delta < 0, -delta, 0.0)),
+        'rsi': (('gain', 'loss'), lambda gain, loss: 100 - (100 / (
+            1 + IndicatorGraph.rolling(gain, 14, np.mean) / IndicatorGraph.rolling(loss, 14, np.mean)
+        ))),
+        'macd_histogram': (('macd_line', 'ema_9'), lambda line, signal: line - signal),
+        'lowest_14': (('low',), lambda low: IndicatorGraph.rolling(low, 14, np.min)),
+        'highest_14': (('high',), lambda high: IndicatorGraph.rolling(high, 14, np.max)),
+        'stoch_k': (('close', 'lowest_14', 'highest_14'),
+                    lambda close, lowest, highest: (close - lowest) / (highest - lowest) * 100),
+        'stoch_d': (('stoch_k',), lambda stoch_k: IndicatorGraph.rolling(stoch_k, 3, np.mean)),
+        'williams_r': (('close', 'lowest_14', 'highest_14'),
+                       lambda close, lowest, highest: -100 * (highest - close) / (highest - lowest)),
+        'typical_price': (('high', 'low', 'close'), lambda high, low, close: (high + low + close) / 3),
+        'cci': (('typical_price',), lambda tp: (tp - IndicatorGraph.rolling(tp, 20, np.mean)) / (
+            0.015 * IndicatorGraph.std(tp, 20)
+        )),
+        'obv': (('delta', 'volume'), lambda delta, volume: IndicatorGraph.obv(delta, volume)),
+        'obv_sma': (('obv',), lambda obv: IndicatorGraph.rolling(obv, 20, np.mean)),
+        'week_52_high': (('high',), lambda high: pd.Series(high).rolling(252, min_periods=1).max().to_numpy()),
+        'week_52_low': (('low',), lambda low: pd.Series(low).rolling(252, min_periods=1).min().to_numpy()),
+        'score': (('close', 'sma_20', 'sma_50', 'sma_200', 'macd_line', 'macd_histogram', 'rsi',
+                   'stoch_k', 'stoch_d', 'bb_upper', 'bb_lower', 'obv', 'obv_sma', 'williams_r', 'cci'),
+                  lambda *series: IndicatorGraph.score(*series)),
+    }
+    
+    @staticmethod
+    def register(name: str, inputs: Tuple[str, ...], fn):
+        """Add (or replace) a node computed as fn(*arrays of inputs)"""
+        unknown = [node for node in inputs if node not in IndicatorGraph.NODES and node not in IndicatorGraph.INPUTS]
+        if unknown:
+            raise KeyError(f"unknown inputs for indicator {name}: {', '.join(unknown)}")
+        IndicatorGraph.NODES[name] = (tuple(inputs), fn)
+    
+    @staticmethod
+    def series(ticker: str, hist: pd.DataFrame) -> 'IndicatorSeries':
+        """The shared lazily evaluated series of a ticker's non-empty daily history"""
+        
+        normalized_ticker = DataFetcher.normalize_ticker(ticker)
+        key = f"series:{normalized_ticker}:{TechnicalEngine.fingerprint(hist)}"
+        series = MARKET_CACHE.get(key)
+        if series is None:
+            series = IndicatorSeries(hist, cache_key=key)
+            MARKET_CACHE.set(key, series, HistoryStore.refresh_ttl(DataFetcher.is_crypto(normalized_ticker)))
+        return series
+    
+    @staticmethod
+    def rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+        """reducer(window, axis=-1) over each trailing window, NaN until the first full one"""
+        
+        result = np.full(len(values), np.nan)
+        if len(values) < window:
+            return result
+        
+        if reducer is np.mean:
+            # Running sums: one pass whatever the window; windows holding a missing value stay NaN
+            missing = np.isnan(values)
+            sums = np.cumsum(np.where(missing, 0.0, values))
+            counts = np.cumsum(missing)
+            sums[window:] -= sums[:-window].copy()
+            counts[window:] -= counts[:-window].copy()
+            result[window - 1:] = np.where(counts[window - 1:] > 0, np.nan, sums[window - 1:] / window)
+            # A window of one repeated value averages to exactly that value, as in pandas
+            flat = IndicatorGraph.flat(values, window)
+            result[flat] = values[flat]
+        else:
+            result[window - 1:] = reducer(np.lib.stride_tricks.sliding_window_view(values, window), axis=-1)
+        return result
+    
+    @staticmethod
+    def std(values: np.ndarray, window: int) -> np.ndarray:
+        """Rolling sample standard deviation (ddof=1), exactly 0 over a window of one repeated value"""
+        result = IndicatorGraph.rolling(values, window, functools.partial(np.std, ddof=1))
+        result[IndicatorGraph.flat(values, window)] = 0.0
+        return result
+    
+    @staticmethod
+    def flat(values: np.ndarray, window: int) -> np.ndarray:
+        """Whether each bar ends a window of one repeated value"""
+        bars = np.arange(len(values))
+        repeated = np.r_[False, values[1:] == values[:-1]]
+        run_starts = np.maximum.accumulate(np.where(repeated, 0, bars))
+        return bars - run_starts + 1 >= window
+    
+    @staticmethod
+    def ema(values: np.ndarray, span: int) -> np.ndarray:
+        """EMA series (adjust=False, seeded with the first value)"""
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    
+    @staticmethod
+    def obv(delta: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        """On-Balance Volume, undefined on the first bar"""
+        steps = np.sign(delta) * volume
+        missing = np.isnan(steps)
+        obv = np.cumsum(np.where(missing, 0.0, steps))
+        obv[missing] = np.nan
+        return obv
+    
+    @staticmethod
+    def score(close: np.ndarray, sma_20: np.ndarray, sma_50: np.ndarray, sma_200: np.ndarray,
+              macd_line: np.ndarray, macd_histogram: np.ndarray, rsi: np.ndarray,
+              stoch_k: np.ndarray, stoch_d: np.ndarray, bb_upper: np.ndarray, bb_lower: np.ndarray,
+              obv: np.ndarray, obv_sma: np.ndarray, williams_r: np.ndarray, cci: np.ndarray) -> np.ndarray:
+        """TechnicalEngine's overall score at every bar, taking each bar's close as the price.
+        
+        The bullish and bearish rules of TechnicalEngine._signals as array comparisons
+        (neutral signals do not count towards the score).
+        """
+        
+        bars = np.arange(1, len(close) + 1)
+        votes = []  # (bullish, bearish) per rule
+        
+        # MA Signals and Golden/Death Cross, where the average exists
+        has = {}
+        for window, sma in ((20, sma_20), (50, sma_50), (200, sma_200)):
+            has[window] = (bars >= window) & (sma != 0)
+            votes.append((has[window] & (close > sma), has[window] & ~(close > sma)))
+        cross = has[50] & has[200]
+        votes.append((cross & (sma_50 > sma_200), cross & ~(sma_50 > sma_200)))
+        
+        # MACD and its zero line
+        votes.append((macd_histogram > 0, ~(macd_histogram > 0)))
+        votes.append((macd_line > 0, ~(macd_line > 0)))
+        
+        # RSI and its divergence from price over 13 bars
+        votes.append((rsi < 30, rsi > 70))
+        price_higher = np.zeros(len(close), dtype=bool)
+        rsi_higher = np.zeros(len(close), dtype=bool)
+        price_higher[13:] = close[13:] > close[:-13]
+        rsi_higher[13:] = rsi[13:] > rsi[:-13]
+        votes.append((~price_higher & rsi_higher, price_higher & ~rsi_higher))
+        
+        # Stochastic levels and crossover
+        votes.append(((stoch_k < 20) & (stoch_d < 20), (stoch_k > 80) & (stoch_d > 80)))
+        votes.append((stoch_k > stoch_d, ~(stoch_k > stoch_d)))
+        
+        # Bollinger Band position
+        above, below = close > bb_upper, close < bb_lower
+        inside = ~above & ~below
+        bb_position = (close - bb_lower) / (bb_upper - bb_lower)
+        votes.append((below | (inside & (bb_position < 0.2)), above | (inside & (bb_position > 0.8))))
+        
+        # OBV trend, Williams %R and CCI
+        votes.append((obv > obv_sma, ~(obv > obv_sma)))
+        votes.append((williams_r < -80, williams_r > -20))
+        votes.append((cci < -100, cci > 100))
+        
+        bullish = np.sum([bull for bull, _ in votes], axis=0)
+        bearish = np.sum([bear for _, bear in votes], axis=0)
+        total = bullish + bearish
+        score = np.where(total > 0, (bullish - bearish) / np.where(total > 0, total, 1) * 100, 0.0)
+        score[bars < 20] = 0
+        return score
+
+
+class IndicatorSeries(Mapping):
+    """One history's indicator series by node name, each computed on first access.
+    
+    When the series is cached under `cache_key`, the entry's size is re-estimated after
+    each new node so the cache's memory budget sees the arrays computed since it was stored.
+    """
+    
+    def __init__(self, hist: pd.DataFrame, cache_key: Optional[str] = None):
+        self.index = hist.index
+        self.cache_key = cache_key
+        self._values = {
+            name: hist[column].to_numpy(dtype=float) for name, column in IndicatorGraph.INPUTS.items()
+        }
+        self._lock = threading.RLock()
+    
+    def __getitem__(self, name: str) -> np.ndarray:
+        values = self._values.get(name)
+        if values is not None:
+            return values
+        if name not in IndicatorGraph.NODES:
+            raise KeyError(name)
+        
+        computed = False
+        with self._lock:
+            if name not in self._values:
+                inputs, fn = IndicatorGraph.NODES[name]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    self._values[name] = fn(*(self[node] for node in inputs))
+                computed = True
+            values = self._values[name]
+        
+        if computed and self.cache_key is not None:
+            MARKET_CACHE.resize(self.cache_key)
+        return values
+    
+    def __iter__(self):
+        return iter({**self._values, **IndicatorGraph.NODES})
+    
+    def __len__(self) -> int:
+        return len({**self._values, **IndicatorGraph.NODES})
+    
+    def nbytes(self) -> int:
+        """Bytes held by the series computed so far"""
+        return sum(values.nbytes for values in list(self._values.values()))
+
+# ============================================================================
+# DATA FETCHING & CACHING
+# ============================================================================
+
+class DataFetcher:
+    """Unified data fetcher for stocks, crypto, and options"""
+    
+    # Cache tiers, each refreshed on its own schedule
+    TIERS = ('quote', 'history', 'fundamentals')
+    QUOTE_TTL = 15  # seconds: price, change, volume
+    OPTIONS_TTL = 300  # seconds: one expiry's option quotes
+    EXPIRATIONS_TTL = 3600  # seconds: listed option expirations
+    
+    # Benchmarks built from several symbols (weights), compared like a single ticker
+    BENCHMARK_PROXIES = {
+        '60/40': {'SPY': 0.6, 'AGG': 0.4},
+    }
+    BENCHMARK_PERIODS = {
+        '1mo': pd.DateOffset(months=1),
+        '3mo': pd.DateOffset(months=3),
+        '6mo': pd.DateOffset(months=6),
+        '1y': pd.DateOffset(years=1),
+    }
+    FUNDAMENTALS_TTL = 24 * 3600  # seconds: profile, valuation, analyst data
+    MAX_WORKERS = 8  # parallel upstream requests
+    # Seconds a failed lookup is answered from the negative cache, by failure reason
+    FAILURE_TTLS = {
+        'not found': 1800,
+        'timeout': 120,
+        'network': 60,
+        'throttled': 60,
+        'provider unavailable': 30,
+        'rate limited': 15,
+        'error': 300,
+    }
+    DEFAULT_FAILURE_TTL = 120
+    REQUEST_TIMEOUT = 20  # seconds per ticker
+    
+    # Crypto mapping for yfinance
+    CRYPTO_MAP = {
+        'BTC': 'BTC-USD',
+        'ETH': 'ETH-USD',
+        'SOL': 'SOL-USD',
+        'ADA': 'ADA-USD',
+        'DOT': 'DOT-USD',
+        'DOGE': 'DOGE-USD',
+        'XRP': 'XRP-USD',
+        'AVAX': 'AVAX-USD',
+        'MATIC': 'MATIC-USD',
+        'LINK': 'LINK-USD',
+        'UNI': 'UNI-USD',
+        'ATOM': 'ATOM-USD',
+        'LTC': 'LTC-USD',
+        'BCH': 'BCH-USD',
+        'SHIB': 'SHIB-USD',
+    }
+    
+    @staticmethod
+    def is_crypto(ticker: str) -> bool:
+        """Check if ticker is a cryptocurrency"""
+        return ticker.upper() in DataFetcher.CRYPTO_MAP or ticker.upper().endswith('-USD')
+    
+    @staticmethod
+    def normalize_ticker(ticker: str) -> str:
+        """Normalize ticker for yfinance"""
+        ticker = ticker.upper().strip()
+        if ticker in DataFetcher.CRYPTO_MAP:
+            return DataFetcher.CRYPTO_MAP[ticker]
+        return ticker
+    
+    @staticmethod
+    def get_data(ticker: str, force_refresh: bool = False) -> Optional[Dict]:
+        """Fetch comprehensive data for any asset type"""
+        return DataFetcher.get_data_many([ticker], force_refresh)[ticker]
+    
+    @staticmethod
+    def get_data_many(tickers: List[str], force_refresh: bool = False) -> Dict[str, Optional[Dict]]:
+        """Fetch data for many tickers, refreshing only the cache tiers that have expired.
+        
+        Tickers whose data expired are returned at once marked `is_stale` and refreshed
+        in the background; only tickers with nothing cached block on the network.
+        """
+        
+        results = {}
+        pending = {}
+        stale = {}
+        
+        for ticker in tickers:
+            normalized_ticker = DataFetcher.normalize_ticker(ticker)
             
-            if not hist.empty:
-                st.session_state.benchmark_data = hist
-                st.session_state.benchmark_timestamp = current_time
-                return hist
-        except:
-            pass
+            if force_refresh:
+                DataFetcher.invalidate([ticker])
+            
+            cached = DataFetcher._get_cached(normalized_ticker)
+            results[ticker] = cached
+            if cached:
+                continue
+            
+            previous = MARKET_CACHE.peek(f"data:{normalized_ticker}")
+            failure = DataFetcher.known_failure(normalized_ticker)
+            if previous and previous.intact():
+                results[ticker] = previous.stale()
+                stale[ticker] = normalized_ticker
+            elif failure:
+                # Failed recently: answer now instead of waiting on upstream again
+                st.session_state.fetch_errors[ticker] = failure
+            else:
+                pending[ticker] = normalized_ticker
         
-        return None
+        if stale:
+            st.session_state.awaiting_refresh.update(REFRESHER.submit(stale))
+        
+        if not pending:
+            return results
+        
+        settings = st.session_state.settings
+        fetched, errors = DataFetcher.refresh_many(
+            pending,
+            max_workers=settings.get('fetch_workers', DataFetcher.MAX_WORKERS),
+            timeout=settings.get('fetch_timeout', DataFetcher.REQUEST_TIMEOUT)
+        )
+        
+        for ticker in pending:
+            data = fetched.get(ticker)
+            if data:
+                st.session_state.fetch_errors.pop(ticker, None)
+            else:
+                st.session_state.fetch_errors[ticker] = errors.get(ticker, 'not found')
+            results[ticker] = data
+        
+        return results
+    
+    @staticmethod
+    def get_quote(ticker: str) -> Optional[Dict]:
+        """Fetch just the current quote for one ticker"""
+        return DataFetcher.get_quotes([ticker])[ticker]
+    
+    @staticmethod
+    def get_quotes(tickers: List[str]) -> Dict[str, Optional[Dict]]:
+        """Fetch price, previous close, change, volume and 52-week range for many tickers.
+        
+        Skips the info payload, the year of history and the technicals, so screens that
+        only show prices stay cheap. Missing quotes come from the 5-day chart endpoint,
+        fetched in parallel, and are shared with get_data_many through the quote tier.
+        """
+        
+        results = {}
+        missing = {}
+        
+        for ticker in tickers:
+            normalized_ticker = DataFetcher.normalize_ticker(ticker)
+            quote = MARKET_CACHE.get(f"quote:{normalized_ticker}")
+            failure = DataFetcher.known_failure(normalized_ticker) if quote is None else None
+            if quote is not None:
+                results[ticker] = DataFetcher._quote_record(ticker, quote)
+            elif failure:
+                results[ticker] = None
+                st.session_state.fetch_errors[ticker] = failure
+            else:
+                missing.setdefault(normalized_ticker, []).append(ticker)
+        
+        if missing:
+            settings = st.session_state.settings
+            fetched, errors = DataFetcher.fetch_parallel(
+                DataFetcher._fetch_quote, list(missing),
+                max_workers=settings.get('fetch_workers', DataFetcher.MAX_WORKERS),
+                timeout=settings.get('fetch_timeout', DataFetcher.REQUEST_TIMEOUT)
+            )
+            
+            for normalized_ticker, owners in missing.items():
+                quote = fetched.get(normalized_ticker)
+                if quote:
+                    MARKET_CACHE.set(f"quote:{normalized_ticker}", quote, DataFetcher.QUOTE_TTL)
+                else:
+                    DataFetcher._remember_failure(normalized_ticker, errors.get(normalized_ticker, 'not found'))
+                
+                for ticker in owners:
+                    if quote:
+                        results[ticker] = DataFetcher._quote_record(ticker, quote)
+                        st.session_state.fetch_errors.pop(ticker, None)
+                    else:
+                        results[ticker] = None
+                        st.session_state.fetch_errors[ticker] = errors.get(normalized_ticker, 'not found')
+        
+        return {ticker: results[ticker] for ticker in tickers}
+    
+    @staticmethod
+    def _quote_record(ticker: str, quote: Dict) -> Dict:
+        """A quote tagged with the ticker it was requested under"""
+        
+        original_ticker = ticker.upper().strip()
+        is_crypto = DataFetcher.is_crypto(original_ticker)
+        
+        return {
+            'ticker': original_ticker,
+            'normalized_ticker': DataFetcher.normalize_ticker(original_ticker),
+            'is_crypto': is_crypto,
+            'asset_type': 'crypto' if is_crypto else 'stock',
+            **quote,
+            'name': quote.get('name') or original_ticker,
+        }
     
     @staticmethod
-    def get_options_chain(ticker: str) -> Optional[Dict]:
-        """Fetch options chain data"""
+    def refresh_many(pending: Dict[str, str], max_workers: int = MAX_WORKERS,
+                     timeout: float = REQUEST_TIMEOUT) -> Tuple[Dict[str, Optional[Dict]], Dict[str, str]]:
+        """Download and cache the expired tiers of these tickers (ticker -> normalized ticker).
+        
+        Stale histories are updated incrementally in batched requests; stale fundamentals
+        (which also carry a quote) or stale quotes are fetched per ticker in parallel.
+        A ticker that another caller is already fetching is not requested again; this
+        call waits for that result instead. Does not touch session state, so it is safe
+        to run from a background thread.
+        Returns (assembled data per ticker, None if it failed; failure reasons).
+        """
+        
+        symbols = {}  # normalized ticker -> ticker it is assembled under
+        for ticker, normalized_ticker in pending.items():
+            symbols.setdefault(normalized_ticker, ticker)
+        
+        leading, waiting = FETCH_FLIGHTS.claim(list(symbols))
+        outcomes = {}  # normalized ticker -> (data, error)
+        
         try:
-            stock = yf.Ticker(ticker)
+            # Someone may have finished this ticker between our cache check and the claim
+            for normalized_ticker in list(leading):
+                cached = DataFetcher._get_cached(normalized_ticker)
+                if cached:
+                    outcomes[normalized_ticker] = (cached, None)
+                    leading.remove(normalized_ticker)
             
-            # Get available expiration dates
-            expirations = stock.options
+            if leading:
+                outcomes.update(DataFetcher._fetch_symbols(
+                    {n: symbols[n] for n in leading}, max_workers, timeout
+                ))
+        finally:
+            for normalized_ticker in symbols:
+                if normalized_ticker not in waiting:
+                    FETCH_FLIGHTS.resolve(
+                        normalized_ticker, outcomes.get(normalized_ticker, (None, 'not found'))
+                    )
+        
+        if waiting:
+            wait(list(waiting.values()), timeout=timeout)
+            for normalized_ticker, future in waiting.items():
+                outcomes[normalized_ticker] = future.result() if future.done() else (None, 'timeout')
+        
+        results, errors = {}, {}
+        for ticker, normalized_ticker in pending.items():
+            data, error = outcomes.get(normalized_ticker, (None, 'not found'))
+            results[ticker] = data
+            if not data:
+                errors[ticker] = error or 'not found'
+                DataFetcher._remember_failure(normalized_ticker, errors[ticker])
+        
+        return results, errors
+    
+    @staticmethod
+    def _fetch_symbols(symbols: Dict[str, str], max_workers: int,
+                       timeout: float) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        """Refresh and cache the expired tiers of claimed tickers (normalized -> ticker)"""
+        
+        # Look up each tier separately so only stale parts are refetched
+        tiers = {}
+        for normalized_ticker in symbols:
+            tiers[normalized_ticker] = {
+                tier: MARKET_CACHE.get(f"{tier}:{normalized_ticker}") for tier in DataFetcher.TIERS
+            }
+        
+        stale_histories = sorted(t for t, cached in tiers.items() if cached['history'] is None)
+        refused = {}
+        if stale_histories:
+            for normalized_ticker, hist in HistoryStore.update_many(stale_histories, refused).items():
+                tiers[normalized_ticker]['history'] = hist
+        
+        # Tickers whose batch upstream refused fail with its reason instead of one request each
+        fetched, errors = DataFetcher.fetch_parallel(
+            lambda normalized_ticker: DataFetcher._refresh_tiers(normalized_ticker, tiers[normalized_ticker]),
+            [t for t in symbols if t not in refused], max_workers=max_workers, timeout=timeout
+        )
+        errors.update(refused)
+        
+        complete = {}
+        for normalized_ticker, refreshed in fetched.items():
+            if refreshed is not None:
+                DataFetcher._store_tiers(normalized_ticker, refreshed)
+                complete[normalized_ticker] = {**tiers[normalized_ticker], **refreshed}
+        
+        # Score every ticker that has bars and a price from its streaming indicator state
+        scorable = {
+            normalized_ticker: merged for normalized_ticker, merged in complete.items()
+            if merged['quote'] is not None and merged['history'] is not None and not merged['history'].empty
+        }
+        technicals = INDICATORS.technicals_many(
+            {normalized_ticker: merged['history'] for normalized_ticker, merged in scorable.items()},
+            {normalized_ticker: merged['quote'] for normalized_ticker, merged in scorable.items()}
+        ) if scorable else {}
+        
+        outcomes = {}
+        for normalized_ticker in symbols:
+            data = None
+            if normalized_ticker in complete:
+                data = DataFetcher._assemble(
+                    symbols[normalized_ticker], complete[normalized_ticker], technicals.get(normalized_ticker)
+                )
+            
+            if data:
+                DataFetcher._set_cached(normalized_ticker, data)
+            outcomes[normalized_ticker] = (data, errors.get(normalized_ticker))
+        
+        return outcomes
+    
+    @staticmethod
+    def fetch_parallel(fetch_fn, items: List[str], max_workers: int = MAX_WORKERS,
+                       timeout: float = REQUEST_TIMEOUT) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run fetch_fn for each item on a bounded thread pool.
+        
+        Returns (results, errors): results keeps the order of items, with None for any
+        item that raised or exceeded its timeout, and errors maps those items to a reason:
+        'timeout', an UpstreamError's reason, or 'error' for any other exception.
+        Each item gets `timeout` seconds from the moment a worker picks it up.
+        """
+        
+        items = list(dict.fromkeys(items))
+        results = {}
+        errors = {}
+        
+        if not items:
+            return results, errors
+        
+        workers = max(1, min(int(max_workers), len(items)))
+        started = {}
+        
+        def run(item):
+            started[item] = time.monotonic()
+            return fetch_fn(item)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+        try:
+            futures = {item: executor.submit(run, item) for item in items}
+            # Upper bound for items still queued behind slow ones
+            deadline = time.monotonic() + timeout * math.ceil(len(items) / workers)
             
-            if not expirations:
+            for item, future in futures.items():
+                while True:
+                    now = time.monotonic()
+                    begin = started.get(item)
+                    limit = deadline if begin is None else min(begin + timeout, deadline)
+                    try:
+                        results[item] = future.result(timeout=max(0.0, limit - now))
+                        break
+                    except FutureTimeoutError:
+                        if started.get(item) == begin or time.monotonic() >= deadline:
+                            results[item] = None
+                            errors[item] = 'timeout'
+                            break
+                    except UpstreamError as e:
+                        results[item] = None
+                        errors[item] = e.reason
+                        break
+                    except Exception:
+                        # Anything else is a bug or an unexpected payload: keep the details
+                        # in the log and show a fixed reason
+                        logger.exception("Fetching %s failed", item)
+                        results[item] = None
+                        errors[item] = 'error'
+                        break
+        finally:
+            # Don't block the page on stragglers; they finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results, errors
+    
+    @staticmethod
+    def _refresh_tiers(normalized_ticker: str, cached: Dict) -> Dict:
+        """Download whichever tiers are missing from `cached` (runs on a worker thread)"""
+        
+        refreshed = {}
+        
+        if cached['history'] is None:
+            refreshed['history'] = HistoryStore.fetch_one(normalized_ticker)
+        
+        history = refreshed.get('history', cached['history'])
+        
+        if cached['fundamentals'] is None:
+            # The full info payload also carries a current quote
+            info = UPSTREAM.call(PROVIDER.info, normalized_ticker)
+            quote = DataFetcher._quote_from_info(info, history)
+            if quote:
+                refreshed['quote'] = quote
+                refreshed['fundamentals'] = FUNDAMENTALS.upsert(
+                    normalized_ticker,
+                    DataFetcher._fundamentals_from_info(normalized_ticker, info, quote['price'])
+                )
+        elif cached['quote'] is None:
+            quote = DataFetcher._fetch_quote(normalized_ticker)
+            if quote:
+                refreshed['quote'] = quote
+        
+        return refreshed
+    
+    @staticmethod
+    def _store_tiers(normalized_ticker: str, refreshed: Dict):
+        """Cache freshly downloaded tiers, each with its own lifetime"""
+        
+        ttls = {
+            'quote': DataFetcher.QUOTE_TTL,
+            'fundamentals': DataFetcher.FUNDAMENTALS_TTL,
+        }
+        
+        for tier, value in refreshed.items():
+            if tier == 'history':
+                HistoryStore.store(normalized_ticker, value)
+            else:
+                MARKET_CACHE.set(f"{tier}:{normalized_ticker}", value, ttls[tier])
+    
+    @staticmethod
+    def _get_cached(normalized_ticker: str) -> Optional[Dict]:
+        """Return the assembled data for a normalized ticker if its quote is still fresh.
+        
+        A record whose fundamentals row was evicted or expired is a miss, so the
+        fundamentals are downloaded again instead of reading as empty.
+        """
+        
+        data = MARKET_CACHE.get(f"data:{normalized_ticker}")
+        if data is not None and not data.intact():
+            MARKET_CACHE.invalidate([f"data:{normalized_ticker}"])
+            return None
+        return data
+    
+    @staticmethod
+    def _set_cached(normalized_ticker: str, data: Dict):
+        """Store assembled data in the shared cache until its quote goes stale"""
+        MARKET_CACHE.set(f"data:{normalized_ticker}", data, DataFetcher.QUOTE_TTL)
+    
+    @staticmethod
+    def invalidate(tickers: List[str], tiers: Tuple[str, ...] = TIERS):
+        """Force the next fetch of these tickers to re-download the given tiers"""
+        MARKET_CACHE.invalidate([
+            f"{tier}:{DataFetcher.normalize_ticker(ticker)}"
+            for ticker in tickers for tier in ('data', 'missing') + tuple(tiers)
+        ])
+    
+    @staticmethod
+    def known_failure(normalized_ticker: str) -> Optional[str]:
+        """Why this ticker failed to load recently, if it did"""
+        return MARKET_CACHE.get(f"missing:{normalized_ticker}")
+    
+    @staticmethod
+    def _remember_failure(normalized_ticker: str, reason: str):
+        """Cache a failed lookup so reruns fail fast instead of hitting upstream again"""
+        ttl = DataFetcher.FAILURE_TTLS.get(reason, DataFetcher.DEFAULT_FAILURE_TTL)
+        MARKET_CACHE.set(f"missing:{normalized_ticker}", reason, ttl)
+    
+    @staticmethod
+    def forget_failures(tickers: List[str]):
+        """Let these tickers be looked up again right away"""
+        MARKET_CACHE.invalidate([f"missing:{DataFetcher.normalize_ticker(ticker)}" for ticker in tickers])
+    
+    @staticmethod
+    def _price_from_info(info: Dict) -> Optional[float]:
+        """Pick the best available price from a yfinance info payload"""
+        return (
+            info.get('currentPrice') or
+            info.get('regularMarketPrice') or
+            info.get('previousClose') or
+            info.get('regularMarketPreviousClose')
+        )
+    
+    @staticmethod
+    def _quote_from_info(info: Dict, hist: Optional[pd.DataFrame]) -> Optional[Dict]:
+        """Extract the quote tier from a full info payload"""
+        
+        current_price = DataFetcher._price_from_info(info)
+        
+        if not current_price:
+            # Fall back to the last close
+            if hist is None or hist.empty:
                 return None
+            current_price = hist['Close'].iloc[-1]
+        
+        return {
+            'price': current_price,
+            'previous_close': info.get('previousClose') or info.get('regularMarketPreviousClose', current_price),
+            'open': info.get('open') or info.get('regularMarketOpen', current_price),
+            'day_high': info.get('dayHigh') or info.get('regularMarketDayHigh', current_price),
+            'day_low': info.get('dayLow') or info.get('regularMarketDayLow', current_price),
+            'change': info.get('regularMarketChange', 0),
+            'change_pct': info.get('regularMarketChangePercent', 0),
+            'volume': info.get('volume') or info.get('regularMarketVolume', 0),
+            'week_52_high': info.get('fiftyTwoWeekHigh', current_price),
+            'week_52_low': info.get('fiftyTwoWeekLow', current_price),
+            'name': info.get('shortName') or info.get('longName'),
+        }
+    
+    @staticmethod
+    def _fetch_quote(normalized_ticker: str) -> Optional[Dict]:
+        """Fetch just the quote tier from the lightweight 5-day chart endpoint"""
+        
+        bars, meta = UPSTREAM.call(PROVIDER.quote_bars, normalized_ticker)
+        if bars.empty:
+            return None
+        
+        last = bars.iloc[-1]
+        
+        current_price = meta.get('regularMarketPrice') or last['Close']
+        previous_close = bars['Close'].iloc[-2] if len(bars) > 1 else meta.get('chartPreviousClose', current_price)
+        change = current_price - previous_close
+        
+        return {
+            'price': current_price,
+            'previous_close': previous_close,
+            'open': last['Open'],
+            'day_high': meta.get('regularMarketDayHigh') or last['High'],
+            'day_low': meta.get('regularMarketDayLow') or last['Low'],
+            'change': change,
+            'change_pct': (change / previous_close * 100) if previous_close else 0,
+            'volume': meta.get('regularMarketVolume') or last['Volume'],
+            'week_52_high': meta.get('fiftyTwoWeekHigh', current_price),
+            'week_52_low': meta.get('fiftyTwoWeekLow', current_price),
+            'name': meta.get('shortName') or meta.get('longName'),
+        }
+    
+    @staticmethod
+    def _fundamentals_from_info(ticker: str, info: Dict, current_price: float) -> Dict:
+        """Extract the slow-moving fundamentals tier (profile, valuation, analyst data)"""
+        
+        is_crypto = DataFetcher.is_crypto(ticker)
+        
+        return {
+            # Company/Asset info
+            'name': info.get('shortName') or info.get('name', ticker),
+            'sector': info.get('sector', 'Crypto' if is_crypto else 'Unknown'),
+            'industry': info.get('industry', 'Cryptocurrency' if is_crypto else 'Unknown'),
+            'market_cap': info.get('marketCap', 0),
+            'description': info.get('longBusinessSummary', ''),
+            'website': info.get('website', ''),
+            'country': info.get('country', ''),
+            'employees': info.get('fullTimeEmployees', 0),
+            
+            # 52-week data
+            'week_52_high': info.get('fiftyTwoWeekHigh', current_price),
+            'week_52_low': info.get('fiftyTwoWeekLow', current_price),
+            'week_52_change': info.get('52WeekChange', 0),
             
-            options_data = {
-                'expirations': list(expirations),
-                'chains': {}
+            # Volume
+            'avg_volume': info.get('averageVolume', 0),
+            'avg_volume_10d': info.get('averageDailyVolume10Day', 0),
+            
+            # Valuation (stocks only)
+            'pe_ratio': info.get('trailingPE'),
+            'forward_pe': info.get('forwardPE'),
+            'peg_ratio': info.get('pegRatio'),
+            'price_to_book': info.get('priceToBook'),
+            'price_to_sales': info.get('priceToSalesTrailing12Months'),
+            'enterprise_value': info.get('enterpriseValue'),
+            'ev_to_revenue': info.get('enterpriseToRevenue'),
+            'ev_to_ebitda': info.get('enterpriseToEbitda'),
+            
+            # Dividends
+            'dividend_yield': (info.get('dividendYield') or 0) * 100,
+            'dividend_rate': info.get('dividendRate', 0),
+            'ex_dividend_date': info.get('exDividendDate'),
+            'payout_ratio': info.get('payoutRatio'),
+            'five_year_avg_dividend_yield': info.get('fiveYearAvgDividendYield'),
+            
+            # Analyst data
+            'target_low': info.get('targetLowPrice'),
+            'target_mean': info.get('targetMeanPrice'),
+            'target_median': info.get('targetMedianPrice'),
+            'target_high': info.get('targetHighPrice'),
+            'recommendation': info.get('recommendationKey', 'none'),
+            'recommendation_mean': info.get('recommendationMean'),
+            'num_analysts': info.get('numberOfAnalystOpinions', 0),
+            
+            # Risk metrics
+            'beta': info.get('beta', 1.0 if not is_crypto else 2.0),
+            'short_ratio': info.get('shortRatio'),
+            'short_percent': info.get('shortPercentOfFloat'),
+            'held_percent_insiders': info.get('heldPercentInsiders'),
+            'held_percent_institutions': info.get('heldPercentInstitutions'),
+            
+            # Financials
+            'revenue': info.get('totalRevenue', 0),
+            'revenue_per_share': info.get('revenuePerShare'),
+            'profit_margin': info.get('profitMargins'),
+            'operating_margin': info.get('operatingMargins'),
+            'gross_margin': info.get('grossMargins'),
+            'ebitda_margin': info.get('ebitdaMargins'),
+            'roe': info.get('returnOnEquity'),
+            'roa': info.get('returnOnAssets'),
+            'debt_to_equity': info.get('debtToEquity'),
+            'current_ratio': info.get('currentRatio'),
+            'quick_ratio': info.get('quickRatio'),
+            'free_cash_flow': info.get('freeCashflow'),
+            'operating_cash_flow': info.get('operatingCashflow'),
+            'total_cash': info.get('totalCash'),
+            'total_debt': info.get('totalDebt'),
+            'book_value': info.get('bookValue'),
+            'eps_trailing': info.get('trailingEps'),
+            'eps_forward': info.get('forwardEps'),
+            
+            # Earnings
+            'earnings_date': info.get('earningsTimestamp'),
+            'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth'),
+            'revenue_growth': info.get('revenueGrowth'),
+            
+            # Crypto specific
+            'circulating_supply': info.get('circulatingSupply'),
+            'max_supply': info.get('maxSupply'),
+        }
+    
+    @staticmethod
+    def _assemble(ticker: str, tiers: Dict, technicals: Optional[Dict] = None) -> Optional[MarketRecord]:
+        """Combine the cached tiers into the per-ticker market data record.
+        
+        Technicals are computed here unless they were already scored in a batch.
+        """
+        
+        row, quote, hist = tiers['fundamentals'], tiers['quote'], tiers['history']
+        
+        if row is None or quote is None:
+            return None
+        
+        original_ticker = ticker.upper().strip()
+        if hist is None:
+            hist = pd.DataFrame()
+        
+        # Calculate technical indicators
+        if technicals is None:
+            technicals = TechnicalEngine.compute(hist, quote['price']) if not hist.empty else {}
+        
+        return MarketRecord(
+            ticker=original_ticker,
+            normalized_ticker=DataFetcher.normalize_ticker(original_ticker),
+            is_crypto=DataFetcher.is_crypto(original_ticker),
+            quote=quote,
+            row=row,
+            technicals=technicals,
+            history=hist,
+            fetched_at=datetime.now().isoformat()
+        )
+    
+    @staticmethod
+    def get_benchmark_data(symbol: str = 'SPY', period: str = '1y') -> Optional[pd.DataFrame]:
+        """Fetch benchmark data for comparison"""
+        return DataFetcher.get_benchmarks([symbol], period).get(symbol)
+    
+    @staticmethod
+    def get_benchmarks(names: List[str], period: str = '1y') -> Dict[str, pd.DataFrame]:
+        """Daily bars for several benchmarks at once, keyed by name.
+        
+        Plain symbols come from the shared history store, so they are updated with only
+        their newest bars and shared with positions in the same symbols. Names in
+        BENCHMARK_PROXIES are built from their components. Each result is cached per
+        (name, period) until the next daily bar is final; names that could not be loaded
+        are left out and their reason recorded under `benchmark:<name>`.
+        Raises ValueError for a period other than 'ytd' or one of BENCHMARK_PERIODS.
+        """
+        
+        if period != 'ytd' and period not in DataFetcher.BENCHMARK_PERIODS:
+            raise ValueError(
+                f"Unsupported benchmark period {period!r}; "
+                f"use 'ytd' or one of {', '.join(DataFetcher.BENCHMARK_PERIODS)}"
+            )
+        
+        results = {}
+        pending = []
+        
+        for name in dict.fromkeys(names):
+            cached = MARKET_CACHE.get(f"benchmark:{name}:{period}")
+            if cached is not None:
+                results[name] = cached
+                st.session_state.fetch_errors.pop(f"benchmark:{name}", None)
+            else:
+                pending.append(name)
+        
+        if not pending:
+            return results
+        
+        components = {
+            name: {
+                DataFetcher.normalize_ticker(symbol): weight
+                for symbol, weight in DataFetcher.BENCHMARK_PROXIES.get(name, {name: 1.0}).items()
             }
+            for name in pending
+        }
+        symbols = sorted({symbol for weights in components.values() for symbol in weights})
+        
+        histories = {}
+        stale = []
+        for symbol in symbols:
+            hist = MARKET_CACHE.get(f"history:{symbol}")
+            if hist is None:
+                stale.append(symbol)
+            else:
+                histories[symbol] = hist
+        if stale:
+            histories.update(HistoryStore.update_many(stale))
+        
+        for name, weights in components.items():
+            if any(histories.get(symbol) is None or histories[symbol].empty for symbol in weights):
+                reason = 'provider unavailable' if UPSTREAM.is_open() else 'not found'
+                st.session_state.fetch_errors[f"benchmark:{name}"] = reason
+                continue
             
-            # Get chain for nearest expiration
-            for exp in expirations[:3]:  # First 3 expirations
-                try:
-                    chain = stock.option_chain(exp)
-                    options_data['chains'][exp] = {
-                        'calls': chain.calls.to_dict('records'),
-                        'puts': chain.puts.to_dict('records')
-                    }
-                except:
-                    continue
+            if len(weights) == 1:
+                bars = histories[next(iter(weights))]
+            else:
+                bars = DataFetcher._blend({symbol: histories[symbol] for symbol in weights}, weights)
             
-            return options_data
-        except:
+            bars = bars[bars.index >= DataFetcher._period_start(period, bars.index[-1])]
+            results[name] = bars
+            st.session_state.fetch_errors.pop(f"benchmark:{name}", None)
+            
+            # Histories served expired after a failed update must not pin the result for a day
+            if all(MARKET_CACHE.get(f"history:{symbol}") is not None for symbol in weights):
+                ttl = HistoryStore.refresh_ttl(any(DataFetcher.is_crypto(symbol) for symbol in weights))
+                MARKET_CACHE.set(f"benchmark:{name}:{period}", bars, ttl)
+        
+        return results
+    
+    @staticmethod
+    def _blend(histories: Dict[str, pd.DataFrame], weights: Dict[str, float]) -> pd.DataFrame:
+        """A daily-rebalanced mix of several symbols, as a Close series starting at 100"""
+        
+        closes = pd.concat({symbol: hist['Close'] for symbol, hist in histories.items()}, axis=1).dropna()
+        weights = pd.Series(weights)[closes.columns]
+        daily = closes.pct_change().fillna(0) @ (weights / weights.sum())
+        return pd.DataFrame({'Close': 100 * (1 + daily).cumprod()})
+    
+    @staticmethod
+    def _period_start(period: str, last: pd.Timestamp) -> pd.Timestamp:
+        """First bar date kept for a benchmark period ('1mo', '3mo', '6mo', 'ytd', '1y')"""
+        if period == 'ytd':
+            return pd.Timestamp(last.year, 1, 1)
+        return last - DataFetcher.BENCHMARK_PERIODS[period]
+    
+    @staticmethod
+    def get_options_chain(ticker: str) -> Optional['OptionChain']:
+        """List a ticker's option expirations; each expiry's chain is fetched when first read"""
+        
+        ticker = ticker.upper().strip()
+        normalized_ticker = DataFetcher.normalize_ticker(ticker)
+        key = f"expirations:{normalized_ticker}"
+        
+        expirations = MARKET_CACHE.get(key)
+        if expirations is None:
+            try:
+                expirations = tuple(UPSTREAM.call(PROVIDER.options, normalized_ticker))
+            except UpstreamError as e:
+                st.session_state.fetch_errors[f"options:{ticker}"] = e.reason
+                return None
+            except Exception:
+                logger.exception("Listing option expirations for %s failed", normalized_ticker)
+                st.session_state.fetch_errors[f"options:{ticker}"] = 'error'
+                return None
+            MARKET_CACHE.set(key, expirations, DataFetcher.EXPIRATIONS_TTL)
+        
+        if not expirations:
             return None
+        
+        return OptionChain(ticker, expirations)
+    
+    @staticmethod
+    def _load_option_chain(ticker: str, expiry: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Calls and puts for one expiry, sorted by strike and cached as DataFrames"""
+        
+        normalized_ticker = DataFetcher.normalize_ticker(ticker)
+        key = f"options:{normalized_ticker}:{expiry}"
+        
+        chain = MARKET_CACHE.get(key)
+        if chain is None:
+            try:
+                calls, puts = UPSTREAM.call(PROVIDER.option_chain, normalized_ticker, expiry)
+            except UpstreamError as e:
+                st.session_state.fetch_errors[f"options:{ticker}"] = e.reason
+                return None
+            except Exception:
+                logger.exception("Fetching the %s option chain for %s failed", expiry, normalized_ticker)
+                st.session_state.fetch_errors[f"options:{ticker}"] = 'error'
+                return None
+            
+            chain = {'calls': OptionChain.by_strike(calls), 'puts': OptionChain.by_strike(puts)}
+            MARKET_CACHE.set(key, chain, DataFetcher.OPTIONS_TTL)
+        
+        st.session_state.fetch_errors.pop(f"options:{ticker}", None)
+        return chain
     
     @staticmethod
     def get_news(ticker: str, limit: int = 10) -> List[Dict]:
-        """Fetch news for a ticker"""
+        """Recent news for a ticker, served from the shared news cache"""
+        DataFetcher.refresh_news([ticker])
+        return NEWS.page([ticker], 0, limit)[0]
+    
+    @staticmethod
+    def refresh_news(tickers: List[str]):
+        """Refetch news for any of these tickers whose cached headlines have expired"""
+        
+        settings = st.session_state.settings
+        errors = NEWS.refresh(
+            tickers,
+            max_workers=settings.get('fetch_workers', DataFetcher.MAX_WORKERS),
+            timeout=settings.get('fetch_timeout', DataFetcher.REQUEST_TIMEOUT)
+        )
+        
+        for ticker in tickers:
+            if ticker in errors:
+                st.session_state.fetch_errors[f"news:{ticker}"] = errors[ticker]
+            else:
+                st.session_state.fetch_errors.pop(f"news:{ticker}", None)
+
+
+class BackgroundRefresher:
+    """Refreshes expired tickers off the page's thread so cached data can render immediately"""
+    
+    RETRY_AFTER = 30  # seconds before a failed refresh is tried again
+    
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh')
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._failed_at = {}
+    
+    def submit(self, stale: Dict[str, str]) -> List[str]:
+        """Queue a refresh of these tickers (ticker -> normalized ticker).
+        
+        Returns the normalized tickers that are now being refreshed, including ones
+        another session already queued.
+        """
+        
+        with self._lock:
+            now = time.monotonic()
+            queued = {
+                ticker: normalized_ticker for ticker, normalized_ticker in stale.items()
+                if normalized_ticker not in self._in_flight
+                and now - self._failed_at.get(normalized_ticker, -math.inf) >= self.RETRY_AFTER
+            }
+            self._in_flight.update(queued.values())
+            refreshing = [t for t in set(stale.values()) if t in self._in_flight]
+        
+        if queued:
+            self._executor.submit(self._run, queued)
+        
+        return refreshing
+    
+    def is_refreshing(self, normalized_ticker: str) -> bool:
+        """Check whether a refresh for this ticker is queued or running"""
+        with self._lock:
+            return normalized_ticker in self._in_flight
+    
+    def _run(self, queued: Dict[str, str]):
         try:
-            stock = yf.Ticker(DataFetcher.normalize_ticker(ticker))
-            news = stock.news[:limit] if stock.news else []
-            
-            return [{
-                'title': item.get('title', ''),
-                'publisher': item.get('publisher', ''),
-                'link': item.get('link', ''),
-                'published': datetime.fromtimestamp(item.get('providerPublishTime', 0)),
-                'type': item.get('type', ''),
-                'thumbnail': item.get('thumbnail', {}).get('resolutions', [{}])[0].get('url', '') if item.get('thumbnail') else '',
-            } for item in news]
-        except:
-            return []
+            results, _ = DataFetcher.refresh_many(queued)
+        except Exception:
+            results = {}
+        
+        with self._lock:
+            for ticker, normalized_ticker in queued.items():
+                self._in_flight.discard(normalized_ticker)
+                if results.get(ticker):
+                    self._failed_at.pop(normalized_ticker, None)
+                else:
+                    self._failed_at[normalized_ticker] = time.monotonic()
+
+
+@st.cache_resource
+def get_background_refresher() -> BackgroundRefresher:
+    """Create the process-wide refresh worker once"""
+    return BackgroundRefresher()
+
+
+REFRESHER = get_background_refresher()
+
+
+class NewsAggregator:
+    """Headlines for many tickers, fetched in parallel and merged into one feed.
+    
+    Each ticker's news is refetched once TTL has passed. A story returned for several
+    tickers is stored once and tagged with all of them, and the feed index is kept
+    sorted newest first so a page is a slice of it.
+    """
+    
+    TTL = 600  # seconds before a ticker's headlines are refetched
+    MAX_STORIES = 2000  # oldest stories are dropped beyond this
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stories = {}  # story key -> story
+        self._feed = []  # (-published timestamp, story key), newest first
+        self._expires_at = {}  # normalized ticker -> monotonic time its news goes stale
+    
+    def refresh(self, tickers: List[str], max_workers: int = DataFetcher.MAX_WORKERS,
+                timeout: float = DataFetcher.REQUEST_TIMEOUT) -> Dict[str, str]:
+        """Fetch news for the tickers whose headlines have expired.
+        
+        Returns the reason for each ticker that could not be fetched; their previous
+        headlines stay in the feed.
+        """
+        
+        now = time.monotonic()
+        with self._lock:
+            due = {
+                ticker: DataFetcher.normalize_ticker(ticker) for ticker in tickers
+                if self._expires_at.get(DataFetcher.normalize_ticker(ticker), -math.inf) <= now
+            }
+        
+        if not due:
+            return {}
+        
+        fetched, errors = DataFetcher.fetch_parallel(
+            lambda ticker: UPSTREAM.call(PROVIDER.news, due[ticker]) or [],
+            list(due), max_workers=max_workers, timeout=timeout
+        )
+        
+        with self._lock:
+            for ticker, items in fetched.items():
+                if items is not None:
+                    self._merge(due[ticker], items)
+                    self._expires_at[due[ticker]] = now + self.TTL
+            # Failed tickers count as tried (already expired) so only a refresh retries them
+            for ticker in errors:
+                self._expires_at.setdefault(due[ticker], now)
+            self._prune()
+        
+        return errors
+    
+    def unfetched(self, tickers: List[str]) -> List[str]:
+        """The tickers whose news has never been requested"""
+        with self._lock:
+            return [ticker for ticker in tickers if DataFetcher.normalize_ticker(ticker) not in self._expires_at]
+    
+    def invalidate(self, tickers: List[str]):
+        """Make the next refresh refetch these tickers"""
+        with self._lock:
+            for ticker in tickers:
+                self._expires_at.pop(DataFetcher.normalize_ticker(ticker), None)
+    
+    def page(self, tickers: List[str], offset: int = 0, limit: int = 20) -> Tuple[List[Dict], int]:
+        """Stories mentioning any of the tickers, newest first: (page of stories, total matching)"""
+        
+        wanted = {DataFetcher.normalize_ticker(ticker) for ticker in tickers}
+        with self._lock:
+            matching = [
+                self._stories[key] for _, key in self._feed
+                if not wanted.isdisjoint(self._stories[key]['tickers'])
+            ]
+            stories = [
+                {**story, 'tickers': tuple(sorted(story['tickers']))}
+                for story in matching[offset:offset + limit]
+            ]
+        return stories, len(matching)
+    
+    def _merge(self, normalized_ticker: str, items: List[Dict]):
+        for item in items:
+            story = NewsAggregator.parse(item)
+            if story is None:
+                continue
+            
+            key = story['link'] or story['id'] or story['title']
+            existing = self._stories.get(key)
+            if existing is not None:
+                existing['tickers'].add(normalized_ticker)
+                continue
+            
+            story['tickers'] = {normalized_ticker}
+            self._stories[key] = story
+            bisect.insort(self._feed, (-story['published'].timestamp(), key))
+    
+    def _prune(self):
+        while len(self._feed) > self.MAX_STORIES:
+            _, key = self._feed.pop()
+            del self._stories[key]
+    
+    @staticmethod
+    def parse(item: Dict) -> Optional[Dict]:
+        """Normalize a news item from either the flat or the nested ('content') yfinance layout"""
+        
+        content = item.get('content') or item
+        title = content.get('title')
+        if not title:
+            return None
+        
+        if content.get('pubDate'):
+            published = datetime.fromisoformat(content['pubDate'].replace('Z', '+00:00'))
+            published = published.astimezone().replace(tzinfo=None)
+        else:
+            published = datetime.fromtimestamp(content.get('providerPublishTime', 0))
+        
+        thumbnail = content.get('thumbnail') or {}
+        resolutions = thumbnail.get('resolutions') or [{}]
+        
+        return {
+            'id': item.get('id') or item.get('uuid') or '',
+            'title': title,
+            'publisher': (content.get('provider') or {}).get('displayName') or content.get('publisher', ''),
+            'link': (
+                (content.get('canonicalUrl') or {}).get('url') or
+                (content.get('clickThroughUrl') or {}).get('url') or
+                content.get('link', '')
+            ),
+            'published': published,
+            'type': content.get('contentType') or content.get('type', ''),
+            'thumbnail': resolutions[0].get('url', ''),
+        }
+
+
+@st.cache_resource
+def get_news_aggregator() -> NewsAggregator:
+    """Create the process-wide news cache once"""
+    return NewsAggregator()
+
+
+NEWS = get_news_aggregator()
 
 # ============================================================================
 # POSITION & PORTFOLIO ANALYZERS
@@ -1670,45 +4829,39 @@ class PortfolioAnalyzer:
         if not portfolio or not analyses:
             return {}
         
-        total_value = 0
-        total_cost = 0
-        total_gain = 0
-        total_dividends_annual = 0
+        live = {ticker: analysis for ticker, analysis in analyses.items() if analysis}
+        symbols = [analysis['data']['normalized_ticker'] for analysis in live.values()]
         
-        sector_values = {}
-        position_weights = {}
-        asset_types = {'stock': 0, 'crypto': 0}
+        values = np.array([analysis['total_value'] for analysis in live.values()], dtype=float)
+        total_value = float(values.sum())
+        total_cost = float(sum(analysis['cost_basis'] for analysis in live.values()))
+        total_gain = float(sum(analysis['gain_loss_dollars'] for analysis in live.values()))
         
-        weighted_beta = 0
+        # Fundamentals come straight from the columnar table as vectors
+        dividend_yields = np.nan_to_num(FUNDAMENTALS.column('dividend_yield', symbols), nan=0.0)
+        betas = FUNDAMENTALS.column('beta', symbols)
+        betas = np.where(np.isnan(betas) | (betas == 0), 1.0, betas)
+        sectors = [sector if isinstance(sector, str) else 'Unknown'
+                   for sector in FUNDAMENTALS.column('sector', symbols)]
+        is_crypto = np.array([bool(analysis.get('is_crypto')) for analysis in live.values()], dtype=bool)
         
-        for ticker, analysis in analyses.items():
-            if not analysis:
-                continue
-            
-            total_value += analysis['total_value']
-            total_cost += analysis['cost_basis']
-            total_gain += analysis['gain_loss_dollars']
-            
-            # Sector allocation
-            sector = analysis['data'].get('sector', 'Unknown')
-            sector_values[sector] = sector_values.get(sector, 0) + analysis['total_value']
-            
-            # Asset type
-            asset_type = 'crypto' if analysis.get('is_crypto') else 'stock'
-            asset_types[asset_type] = asset_types.get(asset_type, 0) + analysis['total_value']
-            
-            # Dividends
-            div_yield = analysis['data'].get('dividend_yield', 0)
-            total_dividends_annual += analysis['total_value'] * (div_yield / 100)
+        total_dividends_annual = float((values * dividend_yields / 100).sum())
+        
+        # Sector allocation
+        sector_values = {}
+        for sector, value in zip(sectors, values.tolist()):
+            sector_values[sector] = sector_values.get(sector, 0) + value
+        
+        # Asset type
+        asset_types = {'stock': float(values[~is_crypto].sum()), 'crypto': float(values[is_crypto].sum())}
         
         # Calculate weights and weighted metrics
-        for ticker, analysis in analyses.items():
-            if analysis and total_value > 0:
-                weight = analysis['total_value'] / total_value
-                position_weights[ticker] = weight * 100
-                
-                beta = analysis['data'].get('beta', 1) or 1
-                weighted_beta += weight * beta
+        position_weights = {}
+        weighted_beta = 0
+        if total_value > 0:
+            weights = values / total_value
+            position_weights = dict(zip(live.keys(), (weights * 100).tolist()))
+            weighted_beta = float((weights * betas).sum())
         
         # Convert sector to percentages
         sector_allocation = {}
@@ -1893,6 +5046,310 @@ class TaxLotTracker:
             'total_lots': len(lots)
         }
 
+# ============================================================================
+# BACKTESTING
+# ============================================================================
+
+class Backtester:
+    """Replay the technical score and the position analyzer's actions over daily history.
+    
+    Every rule is evaluated for all bars at once from the indicator graph's series,
+    taking each bar's close as the current price. Only the walk from one trade to the
+    next is a loop, each step a vectorized search of the bars ahead. Trades are long
+    only, one at a time, entered and exited at the close of the bar that signals them.
+    """
+    
+    RULES = {
+        'score': 'Technical score',
+        'action': 'Position actions (STRONG BUY / STRONG SELL)',
+    }
+    
+    @staticmethod
+    def run_many(histories: Dict[str, pd.DataFrame], rule: str = 'score', **options) -> Dict[str, Dict]:
+        """Backtest every ticker's daily bars (ticker -> history); ones under 20 bars are left out"""
+        return {
+            ticker: Backtester.run(ticker, hist, rule, **options)
+            for ticker, hist in histories.items() if hist is not None and len(hist) >= 20
+        }
+    
+    @staticmethod
+    def run(ticker: str, hist: pd.DataFrame, rule: str = 'score', entry_score: float = 60,
+            exit_score: float = -60, settings: Optional[Dict] = None) -> Dict:
+        """Trades, equity curve and statistics of one rule over a ticker's daily history.
+        
+        'score' enters when the technical score reaches `entry_score` and exits when it
+        falls to `exit_score` (by default the analyzer's strong technicals levels).
+        'action' enters on STRONG BUY and exits on STRONG SELL, with the analyzer's
+        price-based rules: technical score, RSI, 52-week range, and the profit-taking and
+        stop-loss levels in `settings` against the entry price. Analyst, valuation,
+        dividend and volume rules have no history here and are left out.
+        """
+        
+        series = IndicatorGraph.series(ticker, hist)
+        close, score = series['close'], series['score']
+        
+        if rule == 'score':
+            entries = np.flatnonzero(score >= entry_score)
+            exits = np.flatnonzero(score <= exit_score)
+            
+            def exit_after(entry: int) -> Optional[int]:
+                k = np.searchsorted(exits, entry, side='right')
+                return exits[k] if k < len(exits) else None
+        else:
+            settings = settings or {}
+            take_profit = settings.get('take_profit_threshold', 50)
+            stop_loss = settings.get('stop_loss_threshold', -20)
+            buy, sell = Backtester.action_scores(series)
+            entries = np.flatnonzero(Backtester.actions(buy, sell)[0])
+            
+            def exit_after(entry: int) -> Optional[int]:
+                gain = (close[entry + 1:] / close[entry] - 1) * 100
+                held_sell = sell[entry + 1:] + np.select(
+                    [gain >= 100, gain >= 75, gain >= take_profit, gain >= 30], [45, 35, 30, 15], 0
+                ) + np.select([gain <= -50, gain <= -30, gain <= stop_loss], [50, 30, 20], 0)
+                hits = np.flatnonzero(Backtester.actions(buy[entry + 1:], held_sell)[1])
+                return entry + 1 + hits[0] if len(hits) else None
+        
+        trades = []
+        start = 0
+        while True:
+            k = np.searchsorted(entries, start)
+            if k == len(entries):
+                break
+            exit = exit_after(entries[k])
+            trades.append((int(entries[k]), None if exit is None else int(exit)))
+            if exit is None:
+                break
+            start = exit + 1
+        
+        return Backtester._evaluate(hist.index, close, score, trades)
+    
+    @staticmethod
+    def action_scores(series: 'IndicatorSeries') -> Tuple[np.ndarray, np.ndarray]:
+        """The analyzer's buy and sell scores at every bar from its price-based rules"""
+        
+        close, score = series['close'], series['score']
+        # Without 20 bars there are no technicals, and RSI reads as its neutral default
+        rsi = np.where(np.arange(1, len(close) + 1) >= 20, series['rsi'], 50)
+        pct_from_high = (series['week_52_high'] - close) / series['week_52_high'] * 100
+        pct_from_low = (close - series['week_52_low']) / series['week_52_low'] * 100
+        
+        buy = (
+            np.select([score >= 60, score >= 30], [30, 15], 0)
+            + np.select([rsi <= 20, rsi <= 30], [20, 10], 0)
+            + np.select([pct_from_low <= 5, pct_from_low <= 15], [25, 10], 0)
+        )
+        sell = (
+            np.select([score <= -60, score <= -30], [30, 15], 0)
+            + np.select([rsi >= 80, rsi >= 70], [20, 10], 0)
+            + np.select([pct_from_high <= 2, pct_from_high <= 5], [25, 10], 0)
+        )
+        return buy, sell
+    
+    @staticmethod
+    def actions(buy: np.ndarray, sell: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Where the analyzer's overall action would be STRONG BUY and STRONG SELL"""
+        strong_sell = (sell >= 60) & (sell > buy * 1.5)
+        consider_selling = (sell >= 40) & (sell > buy)
+        strong_buy = ~strong_sell & ~consider_selling & (buy >= 60) & (buy > sell * 1.5)
+        return strong_buy, strong_sell
+    
+    @staticmethod
+    def summary(results: Dict[str, Dict]) -> pd.DataFrame:
+        """One row of statistics per backtested ticker"""
+        return pd.DataFrame([{
+            'Ticker': ticker,
+            'Trades': result['trade_count'],
+            'Hit Rate %': result['hit_rate'],
+            'Return %': result['total_return'],
+            'Buy & Hold %': result['buy_hold_return'],
+            'Max Drawdown %': result['max_drawdown'],
+            'Exposure %': result['exposure'],
+        } for ticker, result in results.items()])
+    
+    @staticmethod
+    def _evaluate(index: pd.Index, close: np.ndarray, score: np.ndarray,
+                  trades: List[Tuple[int, Optional[int]]]) -> Dict:
+        """Trade list, equity curve and statistics for (entry bar, exit bar or None if open) pairs"""
+        
+        n = len(close)
+        held = np.zeros(n + 1)
+        rows = []
+        
+        for entry, exit in trades:
+            last = n - 1 if exit is None else exit
+            held[entry + 1] += 1
+            held[last + 1] -= 1
+            rows.append({
+                'entry_date': index[entry],
+                'entry_price': close[entry],
+                'exit_date': index[exit] if exit is not None else None,
+                'exit_price': close[last],
+                'return_pct': (close[last] / close[entry] - 1) * 100,
+                'bars': last - entry,
+                'open': exit is None,
+            })
+        
+        # Held from the bar after each entry through its exit bar
+        held = np.cumsum(held[:-1])
+        daily = np.zeros(n)
+        daily[1:] = np.nan_to_num(close[1:] / close[:-1] - 1)
+        equity = np.cumprod(1 + held * daily)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        returns = np.array([row['return_pct'] for row in rows])
+        
+        return {
+            'score': pd.Series(score, index=index),
+            'equity': pd.Series(equity, index=index),
+            'buy_hold': pd.Series(close / close[0], index=index),
+            'trades': pd.DataFrame(rows, columns=['entry_date', 'entry_price', 'exit_date', 'exit_price',
+                                                  'return_pct', 'bars', 'open']),
+            'trade_count': len(rows),
+            'hit_rate': float((returns > 0).mean() * 100) if len(rows) else None,
+            'total_return': float((equity[-1] - 1) * 100),
+            'buy_hold_return': float((close[-1] / close[0] - 1) * 100),
+            'max_drawdown': float(drawdown.min() * 100),
+            'exposure': float(held.mean() * 100),
+        }
+
+# ============================================================================
+# SCREENER
+# ============================================================================
+
+class Screener:
+    """Technical screen of a whole universe of symbols, read from the on-disk history store.
+    
+    The universe is split into chunks that worker processes scan independently: each
+    opens the disk store itself, reads its symbols' bars and scores them in one
+    TechnicalEngine batch, so nothing but the result rows crosses back. Prices are the
+    latest stored close; P/E, name and sector come from the fundamentals table for the
+    symbols the app has loaded.
+    """
+    
+    CHUNK = 100  # symbols per worker task
+    COLUMNS = ['Symbol', 'Price', 'Change %', 'Score', 'RSI', '52W Low', '52W High', '52W Position %', 'Bars']
+    
+    @staticmethod
+    def load_universe(path: str) -> List[str]:
+        """Symbols listed in a local file: a CSV with a Symbol or Ticker column, or plain symbols
+        separated by commas, spaces or lines ('#' starts a comment). OSError if it can't be read.
+        """
+        
+        with open(os.path.expanduser(path), newline='') as f:
+            lines = [line.split('#')[0] for line in f.read().splitlines()]
+        
+        rows = list(csv.reader(line for line in lines if line.strip()))
+        if not rows:
+            return []
+        
+        header = [cell.strip().lower() for cell in rows[0]]
+        column = next((header.index(name) for name in ('symbol', 'ticker') if name in header), None)
+        cells = [cell for row in rows for cell in row] if column is None else \
+            [row[column] for row in rows[1:] if len(row) > column]
+        
+        return list(dict.fromkeys(
+            symbol.upper() for cell in cells for symbol in cell.split()
+        ))
+    
+    @staticmethod
+    def run(symbols: List[str], workers: Optional[int] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """Screen these symbols; returns (one row per symbol, symbols with no stored history)"""
+        
+        normalized = list(dict.fromkeys(DataFetcher.normalize_ticker(symbol) for symbol in symbols))
+        chunks = [normalized[i:i + Screener.CHUNK] for i in range(0, len(normalized), Screener.CHUNK)]
+        workers = min(workers or os.cpu_count() or 1, len(chunks)) or 1
+        
+        rows = []
+        for chunk_rows in Screener._map(screen_chunk, HISTORY_DISK.root, chunks, workers):
+            rows.extend(chunk_rows)
+        
+        results = pd.DataFrame(rows, columns=Screener.COLUMNS)
+        found = set(results['Symbol'])
+        missing = [symbol for symbol in normalized if symbol not in found]
+        
+        # Fundamentals the app has already loaded, as whole columns
+        symbols = results['Symbol'].tolist()
+        results.insert(1, 'Name', FUNDAMENTALS.column('name', symbols))
+        results.insert(2, 'Sector', FUNDAMENTALS.column('sector', symbols))
+        results['P/E'] = FUNDAMENTALS.column('pe_ratio', symbols)
+        
+        return results, missing
+    
+    @staticmethod
+    def scan(root: str, symbols: List[str]) -> List[Tuple]:
+        """Result rows for the symbols stored under `root` (runs in a worker process)"""
+        
+        # A store of its own: readers need no lock shared with the writing process
+        disk = HistoryDisk(root)
+        stored = {}
+        for symbol in symbols:
+            columns = disk.read_columns(symbol, ('Close', 'High', 'Low', 'Volume'))
+            if columns is None:
+                continue
+            
+            # Only the window the app keeps per symbol (the disk store keeps everything)
+            dates, values, _ = columns
+            start = np.searchsorted(dates, (pd.Timestamp(dates[-1]) - HistoryStore.WINDOW).to_datetime64())
+            stored[symbol] = {column: series[start:] for column, series in values.items()}
+        
+        if not stored:
+            return []
+        
+        # Right-aligned matrices straight from the stored arrays, as TechnicalEngine.stack builds them
+        lengths = np.array([len(values['Close']) for values in stored.values()], dtype=int)
+        shape = (len(stored), max(lengths.max(), 20))
+        matrices = {column: np.full(shape, np.nan) for column in ('Close', 'High', 'Low', 'Volume')}
+        for row, (values, n) in enumerate(zip(stored.values(), lengths.tolist())):
+            for column, matrix in matrices.items():
+                matrix[row, -n:] = values[column]
+        
+        close = matrices['Close']
+        prices = close[:, -1]
+        technicals = TechnicalEngine.from_matrix(
+            close, matrices['High'], matrices['Low'], matrices['Volume'], lengths, prices
+        )
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            previous = close[:, -2]
+            change = np.where(previous != 0, (prices / previous - 1) * 100, np.nan)
+            week_low = np.nanmin(matrices['Low'], axis=1)
+            week_high = np.nanmax(matrices['High'], axis=1)
+            week_range = week_high - week_low
+            position = np.where(week_range > 0, (prices - week_low) / week_range * 100, 50.0)
+        
+        return list(zip(
+            stored,
+            prices.tolist(),
+            change.tolist(),
+            [float(values['score']) for values in technicals],
+            [float(values.get('rsi', np.nan)) for values in technicals],
+            week_low.tolist(),
+            week_high.tolist(),
+            position.tolist(),
+            lengths.tolist(),
+        ))
+    
+    @staticmethod
+    def _map(fn, root: str, chunks: List[List[str]], workers: int) -> List:
+        """fn(root, chunk) for every chunk on a pool of processes, or of threads where
+        processes can't be started or the pool breaks. `fn` must be a module-level function.
+        """
+        
+        # Never fork the threaded server itself: workers start from a clean interpreter
+        # (the forkserver imports this module once and forks them from there)
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as pool:
+                return list(pool.map(fn, [root] * len(chunks), chunks))
+        except (BrokenProcessPool, OSError):
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='screen') as pool:
+                return list(pool.map(fn, [root] * len(chunks), chunks))
+
+
+def screen_chunk(root: str, symbols: List[str]) -> List[Tuple]:
+    """Screener.scan as a worker process task, importable by name in a fresh interpreter"""
+    return Screener.scan(root, symbols)
+
 # ============================================================================
 # CHART BUILDERS
 # ============================================================================
@@ -1904,12 +5361,20 @@ class ChartBuilder:
     def price_chart(ticker: str, history: pd.DataFrame, 
                    avg_cost: Optional[float] = None,
                    technicals: Optional[Dict] = None,
-                   show_indicators: bool = True) -> go.Figure:
-        """Build comprehensive price chart"""
+                   show_indicators: bool = True,
+                   indicators: Optional[Mapping] = None) -> go.Figure:
+        """Build comprehensive price chart.
+        
+        `indicators` are the history's series from the technicals stage (a record's
+        'indicators'); they are looked up in the shared indicator graph if not given.
+        """
         
         if history.empty:
             return None
         
+        if indicators is None:
+            indicators = IndicatorGraph.series(ticker, history)
+        
         # Determine number of rows
         num_rows = 3 if show_indicators else 1
         row_heights = [0.6, 0.2, 0.2] if show_indicators else [1.0]
@@ -1941,7 +5406,7 @@ class ChartBuilder:
         
         # Moving averages
         if len(history) >= 20:
-            sma20 = history['Close'].rolling(window=20).mean()
+            sma20 = indicators['sma_20']
             fig.add_trace(
                 go.Scatter(x=history.index, y=sma20, name='SMA 20',
                           line=dict(color='#ff9800', width=1)),
@@ -1949,7 +5414,7 @@ class ChartBuilder:
             )
         
         if len(history) >= 50:
-            sma50 = history['Close'].rolling(window=50).mean()
+            sma50 = indicators['sma_50']
             fig.add_trace(
                 go.Scatter(x=history.index, y=sma50, name='SMA 50',
                           line=dict(color='#2196f3', width=1)),
@@ -1957,7 +5422,7 @@ class ChartBuilder:
             )
         
         if len(history) >= 200:
-            sma200 = history['Close'].rolling(window=200).mean()
+            sma200 = indicators['sma_200']
             fig.add_trace(
                 go.Scatter(x=history.index, y=sma200, name='SMA 200',
                           line=dict(color='#9c27b0', width=1)),
@@ -1966,10 +5431,8 @@ class ChartBuilder:
         
         # Bollinger Bands
         if len(history) >= 20:
-            bb_middle = history['Close'].rolling(window=20).mean()
-            bb_std = history['Close'].rolling(window=20).std()
-            bb_upper = bb_middle + (bb_std * 2)
-            bb_lower = bb_middle - (bb_std * 2)
+            bb_upper = indicators['bb_upper']
+            bb_lower = indicators['bb_lower']
             
             fig.add_trace(
                 go.Scatter(x=history.index, y=bb_upper, name='BB Upper',
@@ -2009,8 +5472,7 @@ class ChartBuilder:
         
         if show_indicators:
             # Volume
-            colors = ['#26a69a' if c >= o else '#ef5350' 
-                     for c, o in zip(history['Close'], history['Open'])]
+            colors = np.where(indicators['close'] >= indicators['open'], '#26a69a', '#ef5350')
             fig.add_trace(
                 go.Bar(x=history.index, y=history['Volume'], name='Volume',
                       marker_color=colors, showlegend=False),
@@ -2018,14 +5480,8 @@ class ChartBuilder:
             )
             
             # RSI
-            delta = history['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
             fig.add_trace(
-                go.Scatter(x=history.index, y=rsi, name='RSI',
+                go.Scatter(x=history.index, y=indicators['rsi'], name='RSI',
                           line=dict(color='#7c4dff', width=1.5)),
                 row=3, col=1
             )
@@ -2145,30 +5601,30 @@ class ChartBuilder:
         return fig
     
     @staticmethod
-    def benchmark_comparison(portfolio_return: float, benchmark_returns: Dict) -> go.Figure:
-        """Build benchmark comparison chart"""
+    def benchmark_comparison(portfolio_return: float, benchmark_returns: Dict[str, Dict]) -> go.Figure:
+        """Build benchmark comparison chart (benchmark name -> period -> return %)"""
         
         if not benchmark_returns:
             return None
         
-        periods = list(benchmark_returns.keys())
-        benchmark_values = list(benchmark_returns.values())
+        colors = ['#1a237e', '#00897b', '#8e24aa', '#f4511e', '#6d4c41', '#546e7a']
         
         # For simplicity, show portfolio YTD vs benchmark periods
         fig = go.Figure()
         
-        fig.add_trace(go.Bar(
-            name='S&P 500',
-            x=periods,
-            y=benchmark_values,
-            marker_color='#1a237e'
-        ))
+        for i, (name, returns) in enumerate(benchmark_returns.items()):
+            fig.add_trace(go.Bar(
+                name=name,
+                x=list(returns.keys()),
+                y=list(returns.values()),
+                marker_color=colors[i % len(colors)]
+            ))
         
         fig.add_hline(y=portfolio_return, line_dash="dash", line_color="#ff9800",
                      annotation_text=f"Your Portfolio: {portfolio_return:+.1f}%")
         
         fig.update_layout(
-            title=dict(text="S&P 500 Performance by Period", x=0.5),
+            title=dict(text="Benchmark Performance by Period", x=0.5),
             yaxis_title="Return %",
             height=350,
             template='plotly_white',
@@ -2177,6 +5633,70 @@ class ChartBuilder:
         
         return fig
     
+    @staticmethod
+    def backtest_chart(ticker: str, result: Dict, entry_score: Optional[float] = None,
+                       exit_score: Optional[float] = None) -> go.Figure:
+        """Build backtest chart: equity against buy & hold with trades, and the technical score"""
+        
+        fig = make_subplots(
+            rows=2, cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.05,
+            row_heights=[0.7, 0.3],
+            subplot_titles=(f'{ticker} Backtest Equity', 'Technical Score')
+        )
+        
+        equity = result['equity']
+        fig.add_trace(
+            go.Scatter(x=equity.index, y=(equity - 1) * 100, name='Strategy',
+                      line=dict(color='#1a237e', width=2)),
+            row=1, col=1
+        )
+        fig.add_trace(
+            go.Scatter(x=equity.index, y=(result['buy_hold'] - 1) * 100, name='Buy & Hold',
+                      line=dict(color='#9e9e9e', width=1, dash='dot')),
+            row=1, col=1
+        )
+        
+        # Trade markers sit on the equity curve
+        trades = result['trades']
+        if not trades.empty:
+            fig.add_trace(
+                go.Scatter(x=trades['entry_date'], y=(equity[trades['entry_date']] - 1) * 100,
+                          mode='markers', name='Entry',
+                          marker=dict(symbol='triangle-up', size=10, color='#26a69a')),
+                row=1, col=1
+            )
+            closed = trades[~trades['open']]
+            if not closed.empty:
+                fig.add_trace(
+                    go.Scatter(x=closed['exit_date'], y=(equity[closed['exit_date']] - 1) * 100,
+                              mode='markers', name='Exit',
+                              marker=dict(symbol='triangle-down', size=10, color='#ef5350')),
+                    row=1, col=1
+                )
+        
+        fig.add_trace(
+            go.Scatter(x=result['score'].index, y=result['score'], name='Score',
+                      line=dict(color='#7c4dff', width=1.5), showlegend=False),
+            row=2, col=1
+        )
+        if entry_score is not None:
+            fig.add_hline(y=entry_score, line_dash="dot", line_color="#26a69a", row=2, col=1)
+        if exit_score is not None:
+            fig.add_hline(y=exit_score, line_dash="dot", line_color="#ef5350", row=2, col=1)
+        
+        fig.update_layout(
+            height=550,
+            showlegend=True,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            yaxis_title="Return %",
+            template='plotly_white',
+            margin=dict(l=50, r=50, t=50, b=50)
+        )
+        
+        return fig
+    
     @staticmethod
     def risk_gauge(risk_score: float) -> go.Figure:
         """Build risk gauge chart"""
@@ -2234,8 +5754,11 @@ def render_header():
     
     with col2:
         if st.button("🔄 Refresh", type="primary", use_container_width=True):
-            st.session_state.cached_data = {}
-            st.session_state.cache_timestamp = {}
+            DataFetcher.invalidate(
+                list(st.session_state.portfolios[st.session_state.active_portfolio].keys()) +
+                st.session_state.watchlist,
+                tiers=('quote',)
+            )
             st.session_state.last_refresh = datetime.now()
             st.rerun()
     
@@ -2281,6 +5804,46 @@ def render_alert(signal: Dict, ticker: str = ""):
     """, unsafe_allow_html=True)
 
 
+def render_fetch_errors(tickers: List[str], key: str):
+    """Show which tickers failed to load and why, with a button to retry them now"""
+    
+    failed = [(t, st.session_state.fetch_errors[t]) for t in tickers if t in st.session_state.fetch_errors]
+    
+    if failed:
+        details = ", ".join(f"{t} ({reason})" for t, reason in failed)
+        col1, col2 = st.columns([5, 1])
+        col1.warning(f"⚠️ Could not load: {details}")
+        if col2.button("🔁 Retry", key=f"retry_{key}", use_container_width=True):
+            DataFetcher.forget_failures([t for t, _ in failed])
+            st.rerun()
+
+
+def render_refresh_status(data: Dict[str, Optional[Dict]]):
+    """Note when some of the shown prices are cached ones being refreshed"""
+    
+    stale = [t for t, d in data.items() if d and d.get('is_stale')]
+    
+    if stale:
+        st.caption(f"🔄 Updating {len(stale)} cached price{'s' if len(stale) != 1 else ''} in the background...")
+
+
+@st.fragment(run_every=2)
+def refresh_watcher():
+    """Rerun the page once the background refreshes it is waiting on have finished, and
+    every refresh interval while auto-refresh is on
+    """
+    
+    awaiting = st.session_state.awaiting_refresh
+    if awaiting and not any(REFRESHER.is_refreshing(t) for t in awaiting):
+        awaiting.clear()
+        st.rerun()
+    
+    last_refresh = st.session_state.last_refresh
+    if st.session_state.auto_refresh and last_refresh and \
+            (datetime.now() - last_refresh).total_seconds() >= st.session_state.refresh_interval:
+        st.rerun()
+
+
 def render_position_card(ticker: str, position: Dict, analysis: Dict):
     """Render comprehensive position card"""
     
@@ -2408,7 +5971,8 @@ def render_position_card(ticker: str, position: Dict, analysis: Dict):
                 chart = ChartBuilder.price_chart(
                     ticker, history, position['avg_cost'], 
                     data.get('technicals'), 
-                    st.session_state.settings['show_technicals']
+                    st.session_state.settings['show_technicals'],
+                    data.get('indicators')
                 )
                 if chart:
                     st.plotly_chart(chart, use_container_width=True)
@@ -2427,7 +5991,8 @@ def render_position_card(ticker: str, position: Dict, analysis: Dict):
                         </div>
                         """, unsafe_allow_html=True)
                 else:
-                    st.caption("No recent news")
+                    reason = st.session_state.fetch_errors.pop(f"news:{ticker}", None)
+                    st.caption(f"⚠️ News unavailable ({reason})" if reason else "No recent news")
         
         # Tax lot analysis
         if st.session_state.settings.get('enable_tax_loss_harvesting', True):
@@ -2555,7 +6120,9 @@ def main():
         "🪙 Crypto",
         "📋 Options",
         "👁️ Watchlist",
+        "📰 News",
         "📈 Analytics",
+        "🔎 Screener",
         "💰 Dividends",
         "📊 Tax Center",
         "🔔 Notifications",
@@ -2600,8 +6167,10 @@ def main():
             urgent_alerts = []
             
             with st.spinner("Loading portfolio..."):
+                portfolio_data = DataFetcher.get_data_many(list(active_portfolio.keys()))
+                
                 for ticker, position in active_portfolio.items():
-                    data = DataFetcher.get_data(ticker)
+                    data = portfolio_data.get(ticker)
                     if data:
                         analysis = PositionAnalyzer.analyze(
                             ticker, position, data, st.session_state.settings
@@ -2612,6 +6181,9 @@ def main():
                             if signal['priority'] <= 2:
                                 urgent_alerts.append((ticker, signal, analysis))
             
+            render_fetch_errors(list(active_portfolio.keys()), "portfolio")
+            render_refresh_status(portfolio_data)
+            
             # Portfolio metrics
             metrics = PortfolioAnalyzer.calculate_metrics(active_portfolio, analyses)
             
@@ -2656,21 +6228,22 @@ def main():
             col4.metric("Diversification", f"{metrics.get('diversification_score', 50)}/100")
             
             # Benchmark comparison
-            benchmark_data = DataFetcher.get_benchmark_data(st.session_state.settings['benchmark_symbol'])
+            benchmark_symbol = st.session_state.settings['benchmark_symbol']
+            benchmark_data = DataFetcher.get_benchmark_data(benchmark_symbol)
             if benchmark_data is not None:
                 benchmark_returns = PortfolioAnalyzer.calculate_benchmark_comparison(
                     active_portfolio, analyses, benchmark_data
                 )
                 if benchmark_returns and 'YTD' in benchmark_returns:
                     portfolio_return = metrics.get('total_return_pct', 0)
-                    spy_ytd = benchmark_returns.get('YTD', 0)
+                    bench_ytd = benchmark_returns.get('YTD', 0)
                     
-                    outperformance = portfolio_return - spy_ytd
+                    outperformance = portfolio_return - bench_ytd
                     
                     if outperformance >= 0:
-                        st.success(f"📈 **Outperforming S&P 500 by {outperformance:+.1f}%** (You: {portfolio_return:+.1f}% vs SPY: {spy_ytd:+.1f}%)")
+                        st.success(f"📈 **Outperforming {benchmark_symbol} by {outperformance:+.1f}%** (You: {portfolio_return:+.1f}% vs {benchmark_symbol} YTD: {bench_ytd:+.1f}%)")
                     else:
-                        st.warning(f"📉 **Underperforming S&P 500 by {abs(outperformance):.1f}%** (You: {portfolio_return:+.1f}% vs SPY: {spy_ytd:+.1f}%)")
+                        st.warning(f"📉 **Underperforming {benchmark_symbol} by {abs(outperformance):.1f}%** (You: {portfolio_return:+.1f}% vs {benchmark_symbol} YTD: {bench_ytd:+.1f}%)")
             
             st.divider()
             
@@ -2757,12 +6330,6 @@ def main():
                     render_position_card(ticker, active_portfolio[ticker], analyses[ticker])
             
             st.session_state.last_refresh = datetime.now()
-        
-        # Auto-refresh
-        if st.session_state.auto_refresh and active_portfolio:
-            time.sleep(st.session_state.refresh_interval)
-            st.session_state.cached_data = {}
-            st.rerun()
     
     # =========================================================================
     # TAB 2: ADD POSITION
@@ -2791,7 +6358,7 @@ def main():
             
             if submitted and ticker and shares > 0 and avg_cost > 0:
                 with st.spinner(f"Verifying {ticker}..."):
-                    data = DataFetcher.get_data(ticker, force_refresh=True)
+                    data = DataFetcher.get_quote(ticker)
                 
                 if data:
                     portfolio = st.session_state.portfolios[target_portfolio]
@@ -2823,7 +6390,11 @@ def main():
                     
                     st.rerun()
                 else:
-                    st.error(f"Could not find {ticker}")
+                    reason = st.session_state.fetch_errors.get(ticker)
+                    if reason and reason != 'not found':
+                        st.error(f"Could not load {ticker} ({reason}), please try again shortly")
+                    else:
+                        st.error(f"Could not find {ticker}")
         
         # Quick add buttons
         st.markdown("---")
@@ -2887,15 +6458,23 @@ def main():
                         st.success(f"Added {crypto_amount} {crypto_ticker.upper()}")
                         st.rerun()
                     else:
-                        st.error("Could not find cryptocurrency")
+                        reason = st.session_state.fetch_errors.get(crypto_ticker)
+                        if reason and reason != 'not found':
+                            st.error(f"Could not load {crypto_ticker.upper()} ({reason}), please try again shortly")
+                        else:
+                            st.error("Could not find cryptocurrency")
         
         st.markdown("---")
         
         # Show crypto positions
         if crypto_portfolio:
             analyses = {}
+            crypto_data = DataFetcher.get_data_many(list(crypto_portfolio.keys()))
+            render_fetch_errors(list(crypto_portfolio.keys()), "crypto")
+            render_refresh_status(crypto_data)
+            
             for ticker, pos in crypto_portfolio.items():
-                data = DataFetcher.get_data(ticker)
+                data = crypto_data.get(ticker)
                 if data:
                     analysis = PositionAnalyzer.analyze(ticker, pos, data, st.session_state.settings)
                     analyses[ticker] = analysis
@@ -2955,16 +6534,58 @@ def main():
                     st.success("Option position added!")
                     st.rerun()
         
+        # Browse a live chain
+        with st.expander("🔗 Option Chain"):
+            chain_ticker = st.text_input("Underlying", placeholder="AAPL", key="chain_ticker").upper().strip()
+            
+            if chain_ticker:
+                chain = DataFetcher.get_options_chain(chain_ticker)
+                
+                if chain is None:
+                    reason = st.session_state.fetch_errors.get(f"options:{chain_ticker}")
+                    st.warning(f"No options found for {chain_ticker}" + (f" ({reason})" if reason else ""))
+                else:
+                    col1, col2 = st.columns(2)
+                    chain_expiry = col1.selectbox("Expiration", list(chain), key="chain_expiry")
+                    strike_width = col2.slider("Strikes within % of price", 5, 100, 20, key="chain_width")
+                    
+                    quote = DataFetcher.get_quote(chain_ticker)
+                    if quote:
+                        low = quote['price'] * (1 - strike_width / 100)
+                        high = quote['price'] * (1 + strike_width / 100)
+                    else:
+                        low, high = 0, float('inf')
+                    
+                    window = chain.strike_range(chain_expiry, low, high)
+                    if window is None:
+                        reason = st.session_state.fetch_errors.get(f"options:{chain_ticker}")
+                        st.warning(f"Could not load the {chain_expiry} chain" + (f" ({reason})" if reason else ""))
+                    else:
+                        columns = ['contractSymbol', 'strike', 'lastPrice', 'bid', 'ask',
+                                   'volume', 'openInterest', 'impliedVolatility', 'inTheMoney']
+                        col1, col2 = st.columns(2)
+                        for col, side in ((col1, 'calls'), (col2, 'puts')):
+                            contracts = window[side]
+                            col.write(f"**{side.title()}** ({len(contracts)})")
+                            col.dataframe(
+                                contracts[[c for c in columns if c in contracts.columns]],
+                                hide_index=True, use_container_width=True
+                            )
+        
         st.markdown("---")
         
         # Display options
         if st.session_state.options_positions:
+            underlying_data = DataFetcher.get_quotes(
+                [opt['ticker'] for opt in st.session_state.options_positions]
+            )
+            
             for i, opt in enumerate(st.session_state.options_positions):
                 expiry = datetime.fromisoformat(opt['expiry'])
                 days_to_expiry = (expiry - datetime.now()).days
                 
                 # Get current underlying price
-                data = DataFetcher.get_data(opt['ticker'])
+                data = underlying_data.get(opt['ticker'])
                 underlying_price = data['price'] if data else 0
                 
                 # Calculate basic option status
@@ -3014,18 +6635,25 @@ def main():
                 if watch_input:
                     ticker = watch_input.upper().strip()
                     if ticker not in st.session_state.watchlist:
-                        data = DataFetcher.get_data(ticker)
+                        data = DataFetcher.get_quote(ticker)
                         if data:
                             st.session_state.watchlist.append(ticker)
                             st.rerun()
                         else:
-                            st.error("Ticker not found")
+                            reason = st.session_state.fetch_errors.get(ticker)
+                            if reason and reason != 'not found':
+                                st.error(f"Could not load {ticker} ({reason})")
+                            else:
+                                st.error("Ticker not found")
         
         st.markdown("---")
         
         if st.session_state.watchlist:
+            watchlist_data = DataFetcher.get_quotes(st.session_state.watchlist)
+            render_fetch_errors(st.session_state.watchlist, "watchlist")
+            
             for ticker in st.session_state.watchlist:
-                data = DataFetcher.get_data(ticker)
+                data = watchlist_data.get(ticker)
                 if data:
                     col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
                     
@@ -3048,9 +6676,59 @@ def main():
             st.info("Your watchlist is empty")
     
     # =========================================================================
-    # TAB 6: ANALYTICS
+    # TAB 6: NEWS
     # =========================================================================
     with tabs[5]:
+        st.subheader("📰 Portfolio News")
+        
+        news_tickers = list(dict.fromkeys(list(active_portfolio.keys()) + st.session_state.watchlist))
+        
+        if not news_tickers:
+            st.info("Add positions or watchlist tickers to see their news")
+        else:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                selected = st.multiselect("Tickers", news_tickers, default=news_tickers, key="news_tickers")
+            with col2:
+                refresh_clicked = st.button("🔄 Refresh", key="refresh_news", use_container_width=True)
+            
+            # Every tab renders on each rerun, so headlines are only fetched on request
+            # or for tickers that have none yet
+            if refresh_clicked:
+                NEWS.invalidate(news_tickers)
+                DataFetcher.refresh_news(news_tickers)
+            else:
+                DataFetcher.refresh_news(NEWS.unfetched(news_tickers))
+            failed = [
+                f"{t} ({st.session_state.fetch_errors[f'news:{t}']})"
+                for t in news_tickers if f"news:{t}" in st.session_state.fetch_errors
+            ]
+            if failed:
+                st.caption(f"⚠️ News unavailable for: {', '.join(failed)}")
+            
+            per_page = 10
+            _, total = NEWS.page(selected, 0, 0)
+            
+            if total == 0:
+                st.caption("No recent news")
+            else:
+                pages = math.ceil(total / per_page)
+                page = st.selectbox(f"Page (of {pages})", range(1, pages + 1), key="news_page")
+                stories, _ = NEWS.page(selected, (page - 1) * per_page, per_page)
+                
+                for item in stories:
+                    st.markdown(f"""
+                    <div class="news-card">
+                        <strong>{item['title']}</strong><br>
+                        <small>{' '.join(item['tickers'])} • {item['publisher']} • {item['published'].strftime('%b %d, %Y %H:%M')}</small><br>
+                        <a href="{item['link']}" target="_blank">Read more →</a>
+                    </div>
+                    """, unsafe_allow_html=True)
+    
+    # =========================================================================
+    # TAB 7: ANALYTICS
+    # =========================================================================
+    with tabs[6]:
         st.subheader("📈 Portfolio Analytics")
         
         if not active_portfolio:
@@ -3058,8 +6736,10 @@ def main():
         else:
             # Re-analyze
             analyses = {}
+            portfolio_data = DataFetcher.get_data_many(list(active_portfolio.keys()))
+            
             for ticker, pos in active_portfolio.items():
-                data = DataFetcher.get_data(ticker)
+                data = portfolio_data.get(ticker)
                 if data:
                     analysis = PositionAnalyzer.analyze(ticker, pos, data, st.session_state.settings)
                     analyses[ticker] = analysis
@@ -3088,18 +6768,87 @@ def main():
             st.markdown("---")
             st.subheader("📊 Benchmark Comparison")
             
-            benchmark_data = DataFetcher.get_benchmark_data()
-            if benchmark_data is not None:
-                bench_returns = PortfolioAnalyzer.calculate_benchmark_comparison(
+            benchmark_choices = list(dict.fromkeys(
+                [st.session_state.settings['benchmark_symbol'], 'SPY', 'QQQ', 'DIA', 'IWM']
+                + list(DataFetcher.BENCHMARK_PROXIES)
+            ))
+            selected_benchmarks = st.multiselect(
+                "Compare against", benchmark_choices,
+                default=benchmark_choices[:1], key="analytics_benchmarks"
+            )
+            
+            benchmarks = DataFetcher.get_benchmarks(selected_benchmarks)
+            bench_returns = {}
+            for name, benchmark_data in benchmarks.items():
+                returns = PortfolioAnalyzer.calculate_benchmark_comparison(
                     active_portfolio, analyses, benchmark_data
                 )
+                if returns:
+                    bench_returns[name] = returns
+            
+            if bench_returns:
+                bench_chart = ChartBuilder.benchmark_comparison(
+                    metrics.get('total_return_pct', 0), bench_returns
+                )
+                if bench_chart:
+                    st.plotly_chart(bench_chart, use_container_width=True)
+            
+            for name in selected_benchmarks:
+                if st.session_state.fetch_errors.get(f"benchmark:{name}"):
+                    st.caption(f"⚠️ {name} unavailable ({st.session_state.fetch_errors[f'benchmark:{name}']})")
+            
+            # Backtest
+            st.markdown("---")
+            st.subheader("🧪 Backtest")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                backtest_rule = st.selectbox(
+                    "Rule", list(Backtester.RULES), format_func=Backtester.RULES.get, key="backtest_rule"
+                )
+            with col2:
+                entry_score = st.slider("Enter at score ≥", 0, 100, 60, 5, key="backtest_entry",
+                                        disabled=backtest_rule != 'score')
+            with col3:
+                exit_score = st.slider("Exit at score ≤", -100, 0, -60, 5, key="backtest_exit",
+                                       disabled=backtest_rule != 'score')
+            
+            if st.button("🧪 Run Backtest", key="backtest_run"):
+                histories = {
+                    ticker: data['history'] for ticker, data in portfolio_data.items()
+                    if data and data.get('history') is not None
+                }
+                with st.spinner("Backtesting..."):
+                    st.session_state.backtest_results = {
+                        'backtests': Backtester.run_many(
+                            histories, backtest_rule, entry_score=entry_score, exit_score=exit_score,
+                            settings=st.session_state.settings
+                        ),
+                        'thresholds': (entry_score, exit_score) if backtest_rule == 'score' else (None, None),
+                    }
+            
+            backtest = st.session_state.get('backtest_results')
+            backtests = backtest['backtests'] if backtest else None
+            if backtests:
+                st.dataframe(
+                    Backtester.summary(backtests).style.format({
+                        'Hit Rate %': '{:.0f}%', 'Return %': '{:+.1f}%', 'Buy & Hold %': '{:+.1f}%',
+                        'Max Drawdown %': '{:.1f}%', 'Exposure %': '{:.0f}%'
+                    }, na_rep='-'),
+                    use_container_width=True, hide_index=True
+                )
                 
-                if bench_returns:
-                    bench_chart = ChartBuilder.benchmark_comparison(
-                        metrics.get('total_return_pct', 0), bench_returns
-                    )
-                    if bench_chart:
-                        st.plotly_chart(bench_chart, use_container_width=True)
+                backtest_ticker = st.selectbox("Chart", list(backtests), key="backtest_ticker")
+                result = backtests[backtest_ticker]
+                st.plotly_chart(
+                    ChartBuilder.backtest_chart(backtest_ticker, result, *backtest['thresholds']),
+                    use_container_width=True
+                )
+                if not result['trades'].empty:
+                    with st.expander(f"Trades ({result['trade_count']})"):
+                        st.dataframe(result['trades'], use_container_width=True, hide_index=True)
+            elif backtest:
+                st.info("Not enough price history to backtest")
             
             # Risk analysis
             st.markdown("---")
@@ -3126,9 +6875,108 @@ def main():
                         st.write(f"🔴 {ticker}: {analysis['risk_score']:.0f}/100")
     
     # =========================================================================
-    # TAB 7: DIVIDENDS
+    # TAB 8: SCREENER
     # =========================================================================
-    with tabs[6]:
+    with tabs[7]:
+        st.subheader("🔎 Screener")
+        
+        settings = st.session_state.settings
+        universe_path = st.text_input(
+            "Universe file", value=settings.get('screener_universe', ''), placeholder="sp500.csv",
+            key="screener_universe",
+            help="A CSV with a Symbol or Ticker column, or symbols separated by commas, spaces or lines"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            download_history = st.checkbox("Download missing or stale history first", key="screener_download")
+        with col2:
+            load_fundamentals = st.checkbox("Load P/E, name and sector (slow for large universes)",
+                                            key="screener_fundamentals")
+        
+        if st.button("🔎 Run Screen", type="primary", disabled=not universe_path, key="screener_run"):
+            settings['screener_universe'] = universe_path
+            try:
+                universe = Screener.load_universe(universe_path)
+            except OSError as e:
+                st.error(f"Could not read {universe_path} ({e.strerror or e})")
+            else:
+                with st.spinner(f"Screening {len(universe)} symbols..."):
+                    started = time.time()
+                    if download_history:
+                        HistoryStore.update_many(list(dict.fromkeys(
+                            DataFetcher.normalize_ticker(symbol) for symbol in universe
+                        )))
+                    if load_fundamentals:
+                        DataFetcher.get_data_many(universe)
+                    results, missing = Screener.run(universe)
+                    st.session_state.screener_results = {
+                        'results': results,
+                        'missing': missing,
+                        'universe_size': len(universe),
+                        'elapsed': time.time() - started,
+                    }
+        
+        screen = st.session_state.get('screener_results')
+        if screen:
+            results = screen['results']
+            st.caption(f"{len(results)} of {screen['universe_size']} symbols screened in {screen['elapsed']:.1f}s")
+            if screen['missing']:
+                missing = screen['missing']
+                st.caption(f"⚠️ No stored history for {len(missing)}: {', '.join(missing[:20])}"
+                           f"{'…' if len(missing) > 20 else ''}")
+            
+            st.markdown("---")
+            
+            # Filters
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                score_range = st.slider("Technical score", -100, 100, (-100, 100), 5, key="screener_score")
+            with col2:
+                rsi_range = st.slider("RSI", 0, 100, (0, 100), 1, key="screener_rsi")
+            with col3:
+                position_range = st.slider("52-week position %", 0, 100, (0, 100), 1, key="screener_position")
+            
+            col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+            with col1:
+                max_pe = st.number_input("Max P/E (0 = any)", min_value=0.0, value=0.0, step=5.0,
+                                         key="screener_max_pe")
+            with col2:
+                sectors = st.multiselect("Sector", sorted(results['Sector'].dropna().unique()),
+                                         key="screener_sectors")
+            with col3:
+                sort_by = st.selectbox("Sort by", ['Score', 'RSI', '52W Position %', 'P/E', 'Change %', 'Symbol'],
+                                       key="screener_sort")
+            with col4:
+                descending = st.checkbox("Descending", value=True, key="screener_descending")
+            
+            # Unfiltered ranges keep the symbols that have no value for them
+            mask = results['Score'].between(*score_range)
+            if rsi_range != (0, 100):
+                mask &= results['RSI'].between(*rsi_range)
+            if position_range != (0, 100):
+                mask &= results['52W Position %'].between(*position_range)
+            if max_pe:
+                mask &= results['P/E'] <= max_pe
+            if sectors:
+                mask &= results['Sector'].isin(sectors)
+            
+            shown = results[mask].sort_values(sort_by, ascending=not descending, na_position='last')
+            st.write(f"**{len(shown)} matches**")
+            st.dataframe(
+                shown.style.format({
+                    'Price': '${:,.2f}', 'Change %': '{:+.2f}%', 'Score': '{:+.0f}', 'RSI': '{:.0f}',
+                    '52W Low': '${:,.2f}', '52W High': '${:,.2f}', '52W Position %': '{:.0f}%', 'P/E': '{:.1f}'
+                }, na_rep='-'),
+                use_container_width=True, hide_index=True
+            )
+        else:
+            st.info("Pick a universe file and run a screen")
+    
+    # =========================================================================
+    # TAB 9: DIVIDENDS
+    # =========================================================================
+    with tabs[8]:
         st.subheader("💰 Dividend Center")
         
         if not active_portfolio:
@@ -3138,8 +6986,10 @@ def main():
             annual_income = 0
             dividend_positions = []
             
+            portfolio_data = DataFetcher.get_data_many(list(active_portfolio.keys()))
+            
             for ticker, pos in active_portfolio.items():
-                data = DataFetcher.get_data(ticker)
+                data = portfolio_data.get(ticker)
                 if data and data.get('dividend_yield', 0) > 0:
                     annual_div = pos['shares'] * data['price'] * (data['dividend_yield'] / 100)
                     dividend_positions.append({
@@ -3182,9 +7032,9 @@ def main():
                 st.info("No dividend-paying positions in your portfolio")
     
     # =========================================================================
-    # TAB 8: TAX CENTER
+    # TAB 10: TAX CENTER
     # =========================================================================
-    with tabs[7]:
+    with tabs[9]:
         st.subheader("📊 Tax Center")
         
         # Tax lot summary
@@ -3196,8 +7046,11 @@ def main():
         total_lt_loss = 0
         harvestable = []
         
+        lot_data = DataFetcher.get_data_many(list(st.session_state.tax_lots.keys()))
+        render_fetch_errors(list(st.session_state.tax_lots.keys()), "tax_lots")
+        
         for ticker, lots in st.session_state.tax_lots.items():
-            data = DataFetcher.get_data(ticker)
+            data = lot_data.get(ticker)
             if data:
                 analysis = TaxLotTracker.analyze_lots(ticker, data['price'])
                 if analysis:
@@ -3251,9 +7104,9 @@ def main():
                 st.write(f"🔴 **{h['ticker']}**: Harvest ${h['loss']:.2f} loss ({term}, held {h['days_held']} days)")
     
     # =========================================================================
-    # TAB 9: NOTIFICATIONS
+    # TAB 11: NOTIFICATIONS
     # =========================================================================
-    with tabs[8]:
+    with tabs[10]:
         st.subheader("🔔 Notification Settings")
         
         settings = st.session_state.notification_settings
@@ -3341,9 +7194,9 @@ def main():
             st.caption("No recent notifications")
     
     # =========================================================================
-    # TAB 10: SETTINGS
+    # TAB 12: SETTINGS
     # =========================================================================
-    with tabs[9]:
+    with tabs[11]:
         st.subheader("⚙️ Settings")
         
         settings = st.session_state.settings
@@ -3430,6 +7283,44 @@ def main():
         
         st.markdown("---")
         
+        # Data fetching
+        st.write("**📡 Data Fetching:**")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            settings['fetch_workers'] = st.slider(
+                "Parallel Requests",
+                1, 32, int(settings.get('fetch_workers', DataFetcher.MAX_WORKERS)), 1,
+                help="How many tickers are fetched at the same time"
+            )
+        
+        with col2:
+            settings['fetch_timeout'] = st.slider(
+                "Request Timeout (s)",
+                5, 60, int(settings.get('fetch_timeout', DataFetcher.REQUEST_TIMEOUT)), 5,
+                help="Tickers slower than this are reported and skipped"
+            )
+        
+        cache_stats = MARKET_CACHE.stats()
+        st.caption(
+            f"Shared market data cache: {cache_stats['entries']} entries • "
+            f"{cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB • "
+            f"{cache_stats['evictions']} evicted • "
+            f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0f}% hit rate)"
+        )
+        
+        upstream_stats = UPSTREAM.stats()
+        st.caption(
+            f"Upstream: {upstream_stats['requests']} requests • "
+            f"{upstream_stats['throttled']} throttled • {upstream_stats['errors']} errors • "
+            f"{upstream_stats['retries']} retries • {upstream_stats['rejected']} rejected • "
+            f"breaker {upstream_stats['breaker']}"
+        )
+        
+        st.markdown("---")
+        
         # Portfolio management
         st.write("**📁 Portfolio Management:**")
         
@@ -3518,7 +7409,7 @@ def main():
         with col1:
             if st.button("🗑️ Clear All Data", type="secondary"):
                 for key in ['portfolios', 'watchlist', 'options_positions', 'price_alerts', 
-                           'tax_lots', 'transaction_history', 'cached_data', 'cache_timestamp']:
+                           'tax_lots', 'transaction_history']:
                     if key == 'portfolios':
                         st.session_state[key] = {'Main Portfolio': {}}
                     elif key in ['watchlist', 'options_positions', 'transaction_history']:
@@ -3542,6 +7433,8 @@ def main():
                     'tax_rate_ltcg': 0.15,
                     'enable_tax_loss_harvesting': True,
                     'default_chart_period': '6mo',
+                    'fetch_workers': DataFetcher.MAX_WORKERS,
+                    'fetch_timeout': DataFetcher.REQUEST_TIMEOUT,
                 }
                 st.success("Settings reset")
                 st.rerun()
@@ -3556,6 +7449,10 @@ def main():
         ⚠️ This tool is for informational purposes only and is not financial advice.
         Always do your own research before making investment decisions.
         """)
+    
+    # Wake the page when prices shown from cache have been refreshed, or when auto-refresh is due
+    if st.session_state.awaiting_refresh or (st.session_state.auto_refresh and active_portfolio):
+        refresh_watcher()
 
 # ============================================================================
 # RUN APPLICATION
@@ -0,0 +1,48 @@
+"""Benchmark the technicals engine against the pandas implementation it replaced.
+
+Run with `python benchmark.py [tickers]`. Histories come from the offline synthetic
+provider, so every run times the same bars. Prints the time per ticker of the
+reference, of TechnicalEngine.compute and of one TechnicalEngine.batch pass, and
+checks that all three give the same score.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+os.environ['PORTFOLIO_DATA_DIR'] = tempfile.mkdtemp()
+os.environ['PORTFOLIO_DATA_PROVIDER'] = 'synthetic'
+
+import app
+from technicals_reference import reference_technicals
+
+
+def best_per_call(fn, number: int) -> float:
+    """Best of five timeit runs, in seconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main(tickers: int = 200):
+    histories = {f"S{i:04d}": app.PROVIDER.history(f"S{i:04d}", '1y') for i in range(tickers)}
+    prices = {ticker: float(hist['Close'].iloc[-1]) * 1.01 for ticker, hist in histories.items()}
+    bars = len(next(iter(histories.values())))
+    
+    reference = best_per_call(lambda: [reference_technicals(h, prices[t]) for t, h in histories.items()], 1)
+    single = best_per_call(lambda: [app.TechnicalEngine.compute(h, prices[t]) for t, h in histories.items()], 1)
+    batch = best_per_call(lambda: app.TechnicalEngine.batch(histories, prices), 1)
+    
+    results = app.TechnicalEngine.batch(histories, prices)
+    for ticker, hist in histories.items():
+        expected = reference_technicals(hist, prices[ticker])['score']
+        assert abs(app.TechnicalEngine.compute(hist, prices[ticker])['score'] - expected) < 1e-9, ticker
+        assert abs(results[ticker]['score'] - expected) < 1e-9, ticker
+    
+    print(f"{tickers} tickers x {bars} daily bars, ms per ticker")
+    print(f"  reference (pandas)        {reference / tickers * 1e3:8.3f}")
+    print(f"  TechnicalEngine.compute   {single / tickers * 1e3:8.3f}   {reference / single:6.1f}x")
+    print(f"  TechnicalEngine.batch     {batch / tickers * 1e3:8.3f}   {reference / batch:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,265 @@
+"""The pandas implementation of the technical indicators that TechnicalEngine replaced.
+
+Kept unchanged as the reference the tests and the benchmark compare the engine with.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def reference_technicals(hist: pd.DataFrame, current_price: float) -> Dict:
+    """Calculate comprehensive technical indicators"""
+    
+    if hist.empty or len(hist) < 20:
+        return {'signals': [], 'score': 0}
+    
+    close = hist['Close']
+    high = hist['High']
+    low = hist['Low']
+    volume = hist['Volume']
+    
+    technicals = {}
+    signals = []
+    
+    # ===== MOVING AVERAGES =====
+    technicals['sma_5'] = close.rolling(window=5).mean().iloc[-1] if len(close) >= 5 else None
+    technicals['sma_10'] = close.rolling(window=10).mean().iloc[-1] if len(close) >= 10 else None
+    technicals['sma_20'] = close.rolling(window=20).mean().iloc[-1] if len(close) >= 20 else None
+    technicals['sma_50'] = close.rolling(window=50).mean().iloc[-1] if len(close) >= 50 else None
+    technicals['sma_100'] = close.rolling(window=100).mean().iloc[-1] if len(close) >= 100 else None
+    technicals['sma_200'] = close.rolling(window=200).mean().iloc[-1] if len(close) >= 200 else None
+    
+    technicals['ema_9'] = close.ewm(span=9, adjust=False).mean().iloc[-1]
+    technicals['ema_12'] = close.ewm(span=12, adjust=False).mean().iloc[-1]
+    technicals['ema_21'] = close.ewm(span=21, adjust=False).mean().iloc[-1]
+    technicals['ema_26'] = close.ewm(span=26, adjust=False).mean().iloc[-1]
+    technicals['ema_50'] = close.ewm(span=50, adjust=False).mean().iloc[-1] if len(close) >= 50 else None
+    
+    # MA Signals
+    if technicals['sma_20']:
+        if current_price > technicals['sma_20']:
+            signals.append(('Above SMA20', 'bullish'))
+        else:
+            signals.append(('Below SMA20', 'bearish'))
+    
+    if technicals['sma_50']:
+        if current_price > technicals['sma_50']:
+            signals.append(('Above SMA50', 'bullish'))
+        else:
+            signals.append(('Below SMA50', 'bearish'))
+    
+    if technicals['sma_200']:
+        if current_price > technicals['sma_200']:
+            signals.append(('Above SMA200', 'bullish'))
+        else:
+            signals.append(('Below SMA200', 'bearish'))
+    
+    # Golden/Death Cross
+    if technicals['sma_50'] and technicals['sma_200']:
+        if technicals['sma_50'] > technicals['sma_200']:
+            signals.append(('Golden Cross', 'bullish'))
+        else:
+            signals.append(('Death Cross', 'bearish'))
+    
+    # ===== MACD =====
+    macd_line = technicals['ema_12'] - technicals['ema_26']
+    signal_line = close.ewm(span=9, adjust=False).mean().iloc[-1]
+    macd_histogram = macd_line - signal_line
+    
+    technicals['macd_line'] = macd_line
+    technicals['macd_signal'] = signal_line
+    technicals['macd_histogram'] = macd_histogram
+    
+    if macd_histogram > 0:
+        signals.append(('MACD Bullish', 'bullish'))
+    else:
+        signals.append(('MACD Bearish', 'bearish'))
+    
+    # MACD Zero Line Cross
+    if macd_line > 0:
+        signals.append(('MACD Above Zero', 'bullish'))
+    else:
+        signals.append(('MACD Below Zero', 'bearish'))
+    
+    # ===== RSI =====
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    
+    technicals['rsi'] = rsi.iloc[-1]
+    technicals['rsi_prev'] = rsi.iloc[-2] if len(rsi) > 1 else rsi.iloc[-1]
+    
+    if technicals['rsi'] > 80:
+        signals.append(('RSI Extremely Overbought', 'bearish'))
+    elif technicals['rsi'] > 70:
+        signals.append(('RSI Overbought', 'bearish'))
+    elif technicals['rsi'] < 20:
+        signals.append(('RSI Extremely Oversold', 'bullish'))
+    elif technicals['rsi'] < 30:
+        signals.append(('RSI Oversold', 'bullish'))
+    else:
+        signals.append(('RSI Neutral', 'neutral'))
+    
+    # RSI Divergence (simple check)
+    if len(close) >= 14:
+        price_higher = close.iloc[-1] > close.iloc[-14]
+        rsi_higher = technicals['rsi'] > rsi.iloc[-14]
+    
+        if price_higher and not rsi_higher:
+            signals.append(('Bearish RSI Divergence', 'bearish'))
+        elif not price_higher and rsi_higher:
+            signals.append(('Bullish RSI Divergence', 'bullish'))
+    
+    # ===== STOCHASTIC =====
+    lowest_low = low.rolling(window=14).min()
+    highest_high = high.rolling(window=14).max()
+    stoch_k = ((close - lowest_low) / (highest_high - lowest_low) * 100)
+    stoch_d = stoch_k.rolling(window=3).mean()
+    
+    technicals['stoch_k'] = stoch_k.iloc[-1]
+    technicals['stoch_d'] = stoch_d.iloc[-1]
+    
+    if technicals['stoch_k'] > 80 and technicals['stoch_d'] > 80:
+        signals.append(('Stochastic Overbought', 'bearish'))
+    elif technicals['stoch_k'] < 20 and technicals['stoch_d'] < 20:
+        signals.append(('Stochastic Oversold', 'bullish'))
+    
+    # Stochastic crossover
+    if technicals['stoch_k'] > technicals['stoch_d']:
+        signals.append(('Stoch K > D', 'bullish'))
+    else:
+        signals.append(('Stoch K < D', 'bearish'))
+    
+    # ===== BOLLINGER BANDS =====
+    bb_period = 20
+    bb_std = close.rolling(window=bb_period).std()
+    technicals['bb_middle'] = technicals['sma_20']
+    technicals['bb_upper'] = technicals['bb_middle'] + (bb_std.iloc[-1] * 2)
+    technicals['bb_lower'] = technicals['bb_middle'] - (bb_std.iloc[-1] * 2)
+    technicals['bb_width'] = (technicals['bb_upper'] - technicals['bb_lower']) / technicals['bb_middle'] * 100
+    
+    # Bollinger Band position
+    if current_price > technicals['bb_upper']:
+        signals.append(('Above Upper BB', 'bearish'))
+    elif current_price < technicals['bb_lower']:
+        signals.append(('Below Lower BB', 'bullish'))
+    else:
+        bb_position = (current_price - technicals['bb_lower']) / (technicals['bb_upper'] - technicals['bb_lower'])
+        if bb_position > 0.8:
+            signals.append(('Near Upper BB', 'bearish'))
+        elif bb_position < 0.2:
+            signals.append(('Near Lower BB', 'bullish'))
+    
+    # BB Squeeze
+    if technicals['bb_width'] < 5:  # Tight bands
+        signals.append(('BB Squeeze', 'neutral'))
+    
+    # ===== ATR (AVERAGE TRUE RANGE) =====
+    tr1 = high - low
+    tr2 = abs(high - close.shift())
+    tr3 = abs(low - close.shift())
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    
+    technicals['atr'] = tr.rolling(window=14).mean().iloc[-1]
+    technicals['atr_percent'] = (technicals['atr'] / current_price) * 100
+    
+    # ===== ADX (TREND STRENGTH) =====
+    try:
+        plus_dm = high.diff()
+        minus_dm = -low.diff()
+        plus_dm[plus_dm < 0] = 0
+        minus_dm[minus_dm < 0] = 0
+    
+        tr_smooth = tr.rolling(window=14).sum()
+        plus_di = 100 * (plus_dm.rolling(window=14).sum() / tr_smooth)
+        minus_di = 100 * (minus_dm.rolling(window=14).sum() / tr_smooth)
+    
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = dx.rolling(window=14).mean()
+    
+        technicals['adx'] = adx.iloc[-1] if not np.isnan(adx.iloc[-1]) else 25
+        technicals['plus_di'] = plus_di.iloc[-1]
+        technicals['minus_di'] = minus_di.iloc[-1]
+    
+        if technicals['adx'] > 40:
+            signals.append(('Strong Trend', 'neutral'))
+        elif technicals['adx'] < 20:
+            signals.append(('Weak Trend', 'neutral'))
+    except:
+        technicals['adx'] = 25
+    
+    # ===== VOLUME ANALYSIS =====
+    avg_volume_20 = volume.rolling(window=20).mean().iloc[-1]
+    technicals['volume_ratio'] = volume.iloc[-1] / avg_volume_20 if avg_volume_20 > 0 else 1
+    
+    if technicals['volume_ratio'] > 3:
+        signals.append(('Extreme Volume', 'neutral'))
+    elif technicals['volume_ratio'] > 2:
+        signals.append(('High Volume', 'neutral'))
+    elif technicals['volume_ratio'] < 0.5:
+        signals.append(('Low Volume', 'neutral'))
+    
+    # On-Balance Volume trend
+    obv = (np.sign(close.diff()) * volume).cumsum()
+    obv_sma = obv.rolling(window=20).mean()
+    if obv.iloc[-1] > obv_sma.iloc[-1]:
+        signals.append(('OBV Bullish', 'bullish'))
+    else:
+        signals.append(('OBV Bearish', 'bearish'))
+    
+    # ===== SUPPORT & RESISTANCE =====
+    technicals['resistance_1'] = high.tail(20).max()
+    technicals['support_1'] = low.tail(20).min()
+    technicals['resistance_2'] = high.tail(50).max() if len(high) >= 50 else technicals['resistance_1']
+    technicals['support_2'] = low.tail(50).min() if len(low) >= 50 else technicals['support_1']
+    
+    # Pivot Points
+    pivot = (high.iloc[-1] + low.iloc[-1] + close.iloc[-1]) / 3
+    technicals['pivot'] = pivot
+    technicals['r1'] = 2 * pivot - low.iloc[-1]
+    technicals['s1'] = 2 * pivot - high.iloc[-1]
+    technicals['r2'] = pivot + (high.iloc[-1] - low.iloc[-1])
+    technicals['s2'] = pivot - (high.iloc[-1] - low.iloc[-1])
+    
+    # ===== MOMENTUM =====
+    technicals['momentum_10'] = ((current_price / close.iloc[-10]) - 1) * 100 if len(close) >= 10 else 0
+    technicals['momentum_20'] = ((current_price / close.iloc[-20]) - 1) * 100 if len(close) >= 20 else 0
+    
+    # ===== WILLIAMS %R =====
+    williams_r = -100 * (highest_high - close) / (highest_high - lowest_low)
+    technicals['williams_r'] = williams_r.iloc[-1]
+    
+    if technicals['williams_r'] > -20:
+        signals.append(('Williams %R Overbought', 'bearish'))
+    elif technicals['williams_r'] < -80:
+        signals.append(('Williams %R Oversold', 'bullish'))
+    
+    # ===== CCI (COMMODITY CHANNEL INDEX) =====
+    typical_price = (high + low + close) / 3
+    cci = (typical_price - typical_price.rolling(window=20).mean()) / (0.015 * typical_price.rolling(window=20).std())
+    technicals['cci'] = cci.iloc[-1]
+    
+    if technicals['cci'] > 100:
+        signals.append(('CCI Overbought', 'bearish'))
+    elif technicals['cci'] < -100:
+        signals.append(('CCI Oversold', 'bullish'))
+    
+    # ===== CALCULATE OVERALL SCORE =====
+    bullish_count = sum(1 for s in signals if s[1] == 'bullish')
+    bearish_count = sum(1 for s in signals if s[1] == 'bearish')
+    total_signals = bullish_count + bearish_count
+    
+    if total_signals > 0:
+        technicals['score'] = ((bullish_count - bearish_count) / total_signals) * 100
+    else:
+        technicals['score'] = 0
+    
+    technicals['signals'] = signals
+    technicals['bullish_count'] = bullish_count
+    technicals['bearish_count'] = bearish_count
+    
+    return technicals
@@ -0,0 +1,1056 @@
+"""Tests for app.py, grouped by the part of the app they cover.
+
+Run with `python -m pytest`. The app loads with the offline synthetic data provider
+and a temporary data directory, so nothing touches the network or the real cache.
+"""
+
+import os
+import tempfile
+
+os.environ['PORTFOLIO_DATA_DIR'] = tempfile.mkdtemp()
+os.environ['PORTFOLIO_DATA_PROVIDER'] = 'synthetic'
+
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+import app
+from technicals_reference import reference_technicals
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def same(expected, actual) -> bool:
+    """Whether two indicator values agree (to 1e-9 relative for numbers, NaN matching NaN)"""
+    
+    if expected is None or actual is None:
+        return expected is actual
+    if isinstance(expected, (list, str)):
+        return expected == actual
+    expected, actual = float(expected), float(actual)
+    if math.isnan(expected):
+        return math.isnan(actual)
+    if math.isinf(expected):
+        return expected == actual
+    return abs(expected - actual) <= 1e-9 * max(1.0, abs(expected))
+
+
+def mismatches(expected: Dict, actual: Dict) -> Dict:
+    """Fields whose values differ, with (expected, actual)"""
+    return {key: (value, actual.get(key)) for key, value in expected.items() if not same(value, actual.get(key))}
+
+
+class RecordingProvider(app.MarketDataProvider):
+    """The synthetic provider, logging every call and raising for chosen symbols"""
+    
+    name = 'synthetic'
+    remote = False
+    
+    def __init__(self):
+        self.inner = app.SyntheticProvider()
+        self.calls = []  # (method, symbols)
+        self.date_ranges = []  # keyword arguments of each download
+        self.failing = {}  # symbol -> exception its calls raise
+    
+    def count(self, method: str) -> int:
+        return sum(1 for called, _ in self.calls if called == method)
+    
+    def _call(self, method: str, symbols: List[str], *args, **kwargs):
+        self.calls.append((method, tuple(symbols)))
+        for symbol in symbols:
+            if symbol in self.failing:
+                raise self.failing[symbol]
+        return getattr(self.inner, method)(*args, **kwargs)
+    
+    def download(self, symbols, **date_range):
+        self.date_ranges.append(date_range)
+        return self._call('download', symbols, symbols, **date_range)
+    
+    def history(self, symbol, period):
+        return self._call('history', [symbol], symbol, period)
+    
+    def quote_bars(self, symbol):
+        return self._call('quote_bars', [symbol], symbol)
+    
+    def info(self, symbol):
+        return self._call('info', [symbol], symbol)
+    
+    def options(self, symbol):
+        return self._call('options', [symbol], symbol)
+    
+    def option_chain(self, symbol, expiry):
+        return self._call('option_chain', [symbol], symbol, expiry)
+    
+    def news(self, symbol):
+        return self._call('news', [symbol], symbol)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """A recording provider behind empty caches, a fresh upstream guard and session state"""
+    
+    recording = RecordingProvider()
+    monkeypatch.setattr(app, 'PROVIDER', recording)
+    monkeypatch.setattr(app, 'UPSTREAM', app.UpstreamGuard(rate_limited=False))
+    monkeypatch.setattr(app, 'INDICATORS', app.IndicatorStates())
+    app.MARKET_CACHE.clear()
+    app.HISTORY_DISK.clear()
+    st.session_state.fetch_errors = {}
+    st.session_state.awaiting_refresh = set()
+    yield recording
+    app.MARKET_CACHE.clear()
+    app.HISTORY_DISK.clear()
+
+
+# ============================================================================
+# HISTORIES
+# ============================================================================
+
+def flat_history(bars: int, price: float) -> pd.DataFrame:
+    index = pd.bdate_range('2024-01-02', periods=bars)
+    return pd.DataFrame({'Open': price, 'High': price, 'Low': price, 'Close': price, 'Volume': 1000.0}, index=index)
+
+
+def histories():
+    """(name, history, price) cases: real-looking bars of several lengths, bars with
+    missing values, flat prices and a flat tail after moving prices
+    """
+    
+    rng = np.random.default_rng(7)
+    base = app.PROVIDER.history('AAPL', '2y')
+    cases = []
+    
+    for bars in (20, 35, 60, 120, 210, 300):
+        hist = base.tail(bars)
+        cases.append((f"bars-{bars}", hist, float(hist['Close'].iloc[-1]) * 1.01))
+    
+    for case in range(12):
+        hist = base.tail(int(rng.choice([40, 120, 260]))).copy()
+        for _ in range(int(rng.integers(1, 4))):
+            column = rng.choice(['Close', 'Close', 'High', 'Low', 'Volume'])
+            hist.iloc[int(rng.integers(0, len(hist))), hist.columns.get_loc(column)] = np.nan
+        price = float(np.nan_to_num(hist['Close'].iloc[-1], nan=100.0))
+        cases.append((f"missing-{case}", hist, price))
+    
+    for bars in (20, 60, 250):
+        for price in (0.1, 17.17, 123.45):
+            cases.append((f"flat-{bars}-{price}", flat_history(bars, price), price))
+            cases.append((f"flat-{bars}-{price}-moved", flat_history(bars, price), price * 1.01))
+    
+    hist = base.tail(120).copy()
+    hist.iloc[-60:, :4] = 50.0
+    cases.append(("flat-tail", hist, 50.0))
+    
+    return cases
+
+
+CASES = histories()
+
+
+# ============================================================================
+# TECHNICALS
+# ============================================================================
+
+@pytest.mark.parametrize('hist, price', [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_engine_matches_reference(hist, price):
+    assert mismatches(reference_technicals(hist, price), app.TechnicalEngine.compute(hist, price)) == {}
+
+
+def test_engine_batch_matches_single():
+    batch = app.TechnicalEngine.batch(
+        {name: hist for name, hist, _ in CASES}, {name: price for name, _, price in CASES}
+    )
+    for name, hist, price in CASES:
+        assert mismatches(app.TechnicalEngine.compute(hist, price), batch[name]) == {}, name
+
+
+@pytest.mark.parametrize('hist, price', [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_state_matches_reference(hist, price):
+    expected = reference_technicals(hist, price)
+    assert mismatches(expected, app.IndicatorState.from_history(hist).technicals(price)) == {}
+    
+    # Seeded with the first bars, then streamed the rest
+    state = app.IndicatorState.from_history(hist.iloc[:len(hist) // 2])
+    for high, low, close, volume in hist[['High', 'Low', 'Close', 'Volume']].iloc[len(hist) // 2:].itertuples(index=False):
+        state.update(high, low, close, volume, new_bar=True)
+    assert mismatches(expected, state.technicals(price)) == {}
+
+
+def test_state_replaces_forming_bar():
+    hist = app.PROVIDER.history('MSFT', '1y')
+    state = app.IndicatorState.from_history(hist.iloc[:-1])
+    high, low, close, volume = hist[['High', 'Low', 'Close', 'Volume']].iloc[-1]
+    state.update(high * 1.1, low * 0.9, close * 1.05, volume * 2, new_bar=True)
+    state.update(high, low, close, volume)
+    assert mismatches(app.TechnicalEngine.compute(hist, close), state.technicals(close)) == {}
+
+
+def memo_keys() -> List[str]:
+    return [key for key in app.MARKET_CACHE._entries if key.startswith('technicals:')]
+
+
+def test_finished_histories_are_memoized(provider, monkeypatch):
+    # Ends before today, so every bar is final
+    hist = provider.inner.history('AAPL', '1y').iloc[:-1]
+    price = float(hist['Close'].iloc[-1]) * 1.02
+    
+    first = app.IndicatorStates().technicals_many({'AAPL': hist}, {'AAPL': {'price': price}})['AAPL']
+    assert memo_keys() == [app.IndicatorStates._memo_key('AAPL', hist)]
+    assert mismatches(app.TechnicalEngine.compute(hist, price), first) == {}
+    
+    # Another process-wide state (or a later session) only reprices the memoized values
+    def no_seeding(*args):
+        raise AssertionError('reseeded a memoized history')
+    
+    monkeypatch.setattr(app.IndicatorState, 'from_matrix', no_seeding)
+    hits = app.MARKET_CACHE.hits
+    repriced = app.IndicatorStates().technicals_many({'AAPL': hist.copy()}, {'AAPL': {'price': price * 0.9}})['AAPL']
+    assert app.MARKET_CACHE.hits == hits + 1
+    assert mismatches(app.TechnicalEngine.compute(hist, price * 0.9), repriced) == {}
+
+
+def test_memoized_technicals_follow_history_revisions(provider):
+    hist = provider.inner.history('MSFT', '1y').iloc[:-1]
+    price = float(hist['Close'].iloc[-1])
+    states = app.IndicatorStates()
+    states.technicals_many({'MSFT': hist}, {'MSFT': {'price': price}})
+    
+    revised = hist.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.1
+    result = states.technicals_many({'MSFT': revised}, {'MSFT': {'price': price}})['MSFT']
+    
+    assert len(memo_keys()) == 2
+    assert mismatches(app.TechnicalEngine.compute(revised, price), result) == {}
+    
+    app.MARKET_CACHE.invalidate(memo_keys())
+    again = states.technicals_many({'MSFT': revised}, {'MSFT': {'price': price}})['MSFT']
+    assert mismatches(result, again) == {}
+
+
+def test_forming_bars_are_not_memoized(provider, monkeypatch):
+    hist = provider.inner.history('AAPL', '1y')
+    monkeypatch.setattr(app.IndicatorStates, '_session_date', staticmethod(lambda is_crypto: hist.index.values[-1]))
+    
+    price = float(hist['Close'].iloc[-1])
+    result = app.IndicatorStates().technicals_many({'AAPL': hist}, {'AAPL': {'price': price}})['AAPL']
+    assert memo_keys() == []
+    assert mismatches(app.TechnicalEngine.compute(hist, price), result) == {}
+
+
+@pytest.mark.parametrize('hist, price', [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_graph_matches_reference(hist, price):
+    expected = reference_technicals(hist, price)
+    series = app.IndicatorSeries(hist)
+    
+    # The series are NaN where the reference leaves out an indicator for a short history
+    last = {
+        key: series[key][-1] for key, value in expected.items()
+        if key in app.IndicatorGraph.NODES and key != 'score' and value is not None
+    }
+    assert mismatches({key: expected[key] for key in last}, last) == {}
+    
+    # The score node takes each bar's close as the price
+    close = float(hist['Close'].iloc[-1])
+    assert same(reference_technicals(hist, close)['score'], series['score'][-1])
+
+
+def test_graph_series_are_shared(provider):
+    hist = provider.inner.history('AAPL', '1y')
+    series = app.IndicatorGraph.series('aapl', hist)
+    assert app.IndicatorGraph.series('AAPL', hist) is series
+    assert series['rsi'] is series['rsi']
+
+
+def test_graph_series_count_nodes_computed_after_caching(provider):
+    hist = provider.inner.history('AAPL', '1y')
+    series = app.IndicatorGraph.series('AAPL', hist)
+    stored = app.MARKET_CACHE.stats()['bytes']
+    assert stored == series.nbytes()
+    
+    series['macd_histogram']
+    assert series.nbytes() > stored
+    assert app.MARKET_CACHE.stats()['bytes'] == app.MARKET_CACHE._entries[series.cache_key][2] == series.nbytes()
+
+
+# ============================================================================
+# CACHES
+# ============================================================================
+
+def test_cache_ttl():
+    cache = app.MarketDataCache(default_ttl=60)
+    cache.set('fresh', 1)
+    cache.set('stale', 2, ttl=-1)
+    
+    assert cache.get('fresh') == 1
+    assert cache.get('stale') is None
+    assert cache.peek('stale') == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+    
+    cache.invalidate(['fresh'])
+    assert cache.peek('fresh') is None
+
+
+def test_cache_evicts_expired_then_least_recently_used():
+    block = np.zeros(100)
+    cache = app.MarketDataCache(max_bytes=3 * block.nbytes)
+    cache.set('a', block.copy())
+    cache.set('b', block.copy(), ttl=-1)
+    cache.set('c', block.copy())
+    cache.get('a')
+    
+    cache.set('d', block.copy())
+    assert cache.peek('b') is None
+    
+    cache.set('e', block.copy())
+    assert cache.peek('c') is None
+    assert [key for key in 'ade' if cache.peek(key) is not None] == ['a', 'd', 'e']
+    assert cache.stats()['bytes'] <= cache.max_bytes
+    assert cache.evictions == 2
+
+
+def test_cache_attached_sizes_and_release():
+    released = []
+    cache = app.MarketDataCache(max_bytes=1000)
+    cache.attach('rows:', lambda name: 600, released.append)
+    
+    cache.set('rows:A', 0)
+    cache.set('rows:B', 0)
+    assert released == ['A']
+    
+    cache.invalidate(['rows:B'])
+    assert released == ['A', 'B']
+    assert cache.stats()['bytes'] == 0
+
+
+# ============================================================================
+# FUNDAMENTALS
+# ============================================================================
+
+def test_fundamentals_table_lookup():
+    table = app.FundamentalsTable()
+    row = table.upsert('AAPL', {'sector': 'Technology', 'employees': 150000, 'beta': 1.2, 'pe_ratio': None})
+    
+    assert table.lookup(row, 'sector', 'AAPL') == 'Technology'
+    assert table.lookup(row, 'employees', 'AAPL') == 150000
+    assert isinstance(table.lookup(row, 'employees', 'AAPL'), int)
+    assert table.lookup(row, 'pe_ratio', 'AAPL') is None
+    with pytest.raises(KeyError):
+        table.lookup(row, 'industry', 'AAPL')
+    with pytest.raises(KeyError):
+        table.lookup(row, 'sector', 'MSFT')
+    
+    # Replacing a symbol's values drops fields it no longer has
+    assert table.upsert('AAPL', {'sector': 'Technology'}) == row
+    assert table.fields(row, 'AAPL') == ['sector']
+
+
+def test_fundamentals_table_reuses_removed_rows():
+    table = app.FundamentalsTable()
+    rows = [table.upsert(f"S{i}", {'beta': float(i)}) for i in range(table.INITIAL_ROWS + 1)]
+    assert table.lookup(rows[-1], 'beta', f"S{table.INITIAL_ROWS}") == table.INITIAL_ROWS
+    
+    table.remove('S3')
+    assert not table.owns(rows[3], 'S3')
+    with pytest.raises(KeyError):
+        table.lookup(rows[3], 'beta', 'S3')
+    
+    assert table.upsert('NEW', {'beta': 9.0}) == rows[3]
+    assert not table.owns(rows[3], 'S3')
+    np.testing.assert_array_equal(table.column('beta', ['S1', 'NEW', 'GONE']), [1.0, 9.0, np.nan])
+
+
+def test_fundamentals_table_column_types():
+    table = app.FundamentalsTable()
+    table.upsert('A', {'sector': 'Energy', 'beta': None})
+    table.upsert('B', {'beta': 0.8})
+    
+    assert list(table.column('sector', ['A', 'B'])) == ['Energy', None]
+    np.testing.assert_array_equal(table.column('beta', ['A', 'B']), [np.nan, 0.8])
+    np.testing.assert_array_equal(table.column('unknown', ['A']), [np.nan])
+
+
+def test_market_record_reads_fundamentals_then_quote(provider):
+    record = app.DataFetcher.get_data('AAPL')
+    
+    assert record['ticker'] == 'AAPL' and record['asset_type'] == 'stock'
+    assert record['sector'] == app.FUNDAMENTALS.lookup(record.row, 'sector', 'AAPL')
+    assert record['price'] == record.quote['price']
+    assert len(record) == len(set(record)) == len(dict(record))
+    with pytest.raises(KeyError):
+        record['no such field']
+
+
+def test_records_refetch_fundamentals_once_their_row_is_gone(provider):
+    record = app.DataFetcher.get_data('AAPL')
+    sector = record['sector']
+    calls = provider.count('info')
+    
+    # The fundamentals entry expires or is evicted while the record is still cached
+    app.MARKET_CACHE.invalidate(['fundamentals:AAPL'])
+    assert not record.intact()
+    
+    again = app.DataFetcher.get_data('AAPL')
+    assert again.intact() and again['sector'] == sector
+    assert provider.count('info') == calls + 1
+    
+    metrics = app.PortfolioAnalyzer.calculate_metrics(
+        {'AAPL': {}}, {'AAPL': {'data': again, 'total_value': 100.0, 'cost_basis': 90.0,
+                                 'gain_loss_dollars': 10.0, 'is_crypto': False}}
+    )
+    assert list(metrics['sector_allocation']) == [sector]
+
+
+# ============================================================================
+# DATA FETCHING
+# ============================================================================
+
+def test_get_data_many_batches_histories(provider):
+    results = app.DataFetcher.get_data_many(['AAPL', 'MSFT', 'btc', 'aapl'])
+    
+    assert list(results) == ['AAPL', 'MSFT', 'btc', 'aapl']
+    assert results['btc']['normalized_ticker'] == 'BTC-USD'
+    assert results['aapl']['price'] == results['AAPL']['price']
+    
+    # One download for every history, one profile request per distinct symbol
+    assert [symbols for method, symbols in provider.calls if method == 'download'] == [('AAPL', 'BTC-USD', 'MSFT')]
+    assert sorted(symbols for method, symbols in provider.calls if method == 'info') == [
+        ('AAPL',), ('BTC-USD',), ('MSFT',)
+    ]
+
+
+def test_get_data_many_serves_repeat_loads_from_cache(provider):
+    first = app.DataFetcher.get_data_many(['AAPL', 'MSFT'])
+    calls = len(provider.calls)
+    
+    second = app.DataFetcher.get_data_many(['MSFT', 'AAPL'])
+    assert len(provider.calls) == calls
+    assert second['AAPL']['price'] == first['AAPL']['price']
+
+
+def test_get_data_many_reports_failed_tickers(provider):
+    provider.failing['NOPE'] = KeyError('currentPrice')
+    results = app.DataFetcher.get_data_many(['AAPL', 'NOPE'])
+    
+    assert results['AAPL'] is not None
+    assert results['NOPE'] is None
+    assert st.session_state.fetch_errors['NOPE'] == 'error'
+    assert app.DataFetcher.known_failure('NOPE') == 'error'
+
+
+
+def test_fetch_parallel_keeps_order_and_drops_duplicates():
+    def fetch(item):
+        time.sleep(0.05 if item == 'a' else 0)
+        return item.upper()
+    
+    results, errors = app.DataFetcher.fetch_parallel(fetch, ['a', 'b', 'c', 'b'], max_workers=3)
+    assert list(results.items()) == [('a', 'A'), ('b', 'B'), ('c', 'C')]
+    assert errors == {}
+
+
+def test_fetch_parallel_times_out_slow_items_only():
+    release = threading.Event()
+    
+    def fetch(item):
+        if item == 'slow':
+            release.wait(5)
+        return item
+    
+    started = time.monotonic()
+    results, errors = app.DataFetcher.fetch_parallel(fetch, ['slow', 'fast'], max_workers=2, timeout=0.2)
+    release.set()
+    
+    assert time.monotonic() - started < 2
+    assert results == {'slow': None, 'fast': 'fast'}
+    assert errors == {'slow': 'timeout'}
+
+
+def test_fetch_parallel_reasons():
+    def fetch(item):
+        if item == 'throttled':
+            raise app.UpstreamError('throttled')
+        if item == 'broken':
+            raise KeyError('currentPrice')
+        return item
+    
+    results, errors = app.DataFetcher.fetch_parallel(fetch, ['ok', 'throttled', 'broken'])
+    assert results == {'ok': 'ok', 'throttled': None, 'broken': None}
+    # Unexpected exceptions get a fixed reason, never their message
+    assert errors == {'throttled': 'throttled', 'broken': 'error'}
+
+
+def test_failed_lookups_are_answered_from_the_negative_cache(provider):
+    provider.failing['NOPE'] = KeyError('currentPrice')
+    app.DataFetcher.get_data_many(['NOPE'])
+    calls = len(provider.calls)
+    
+    assert app.DataFetcher.get_data_many(['NOPE']) == {'NOPE': None}
+    assert len(provider.calls) == calls
+    assert st.session_state.fetch_errors['NOPE'] == 'error'
+    
+    # Retry forgets the failure, so the next load asks upstream again
+    app.DataFetcher.forget_failures(['nope'])
+    app.DataFetcher.get_data_many(['NOPE'])
+    assert len(provider.calls) > calls
+
+
+@pytest.mark.parametrize('reason', ['not found', 'throttled', 'error', 'something new'])
+def test_failure_lifetime_depends_on_reason(reason):
+    app.DataFetcher._remember_failure('TTL-TEST', reason)
+    _, expires_at, _ = app.MARKET_CACHE._entries['missing:TTL-TEST']
+    
+    expected = app.DataFetcher.FAILURE_TTLS.get(reason, app.DataFetcher.DEFAULT_FAILURE_TTL)
+    assert expires_at - time.monotonic() == pytest.approx(expected, abs=1)
+    app.DataFetcher.forget_failures(['TTL-TEST'])
+
+
+def test_single_flight_hands_out_each_key_once():
+    flights = app.SingleFlight()
+    leading, waiting = flights.claim(['A', 'B', 'A'])
+    assert (leading, waiting) == (['A', 'B'], {})
+    
+    leading, waiting = flights.claim(['B', 'C'])
+    assert leading == ['C'] and list(waiting) == ['B']
+    
+    flights.resolve('B', 'result')
+    assert waiting['B'].result(timeout=1) == 'result'
+    
+    # A resolved key can be claimed again
+    assert flights.claim(['B'])[0] == ['B']
+
+
+def test_concurrent_loads_of_a_ticker_share_one_request(provider, monkeypatch):
+    info = provider.inner.info
+    
+    def slow_info(symbol):
+        time.sleep(0.3)
+        return info(symbol)
+    
+    monkeypatch.setattr(provider.inner, 'info', slow_info)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(app.DataFetcher.refresh_many({'AAPL': 'AAPL'})[0]['AAPL']))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert provider.count('info') == 1
+    assert len(results) == 4 and all(data is not None for data in results)
+
+
+def test_benchmarks_share_one_history_download(provider):
+    benchmarks = app.DataFetcher.get_benchmarks(['SPY', 'QQQ', '60/40'])
+    
+    assert list(benchmarks) == ['SPY', 'QQQ', '60/40']
+    assert [symbols for method, symbols in provider.calls if method == 'download'] == [('AGG', 'QQQ', 'SPY')]
+    
+    # Cached per name and period
+    calls = len(provider.calls)
+    again = app.DataFetcher.get_benchmarks(['60/40', 'SPY'])
+    assert len(provider.calls) == calls
+    assert again['SPY'] is benchmarks['SPY']
+
+
+def test_sixty_forty_proxy_rebalances_daily(provider):
+    spy = app.HistoryStore.fetch_one('SPY')['Close']
+    agg = app.HistoryStore.fetch_one('AGG')['Close']
+    blend = app.DataFetcher.get_benchmarks(['60/40'], '3mo')['60/40']['Close']
+    
+    daily = blend.pct_change().dropna()
+    expected = (0.6 * spy.pct_change() + 0.4 * agg.pct_change()).loc[daily.index]
+    np.testing.assert_allclose(daily.to_numpy(), expected.to_numpy(), rtol=1e-9)
+    
+    first = blend.index[0]
+    assert first >= blend.index[-1] - pd.DateOffset(months=3)
+    assert spy.index[spy.index < first][-1] < blend.index[-1] - pd.DateOffset(months=3)
+
+
+def test_benchmark_periods(provider):
+    ytd = app.DataFetcher.get_benchmarks(['SPY'], 'ytd')['SPY']
+    assert (ytd.index.year == ytd.index[-1].year).all()
+    
+    with pytest.raises(ValueError, match='5y'):
+        app.DataFetcher.get_benchmarks(['SPY'], '5y')
+
+
+def test_unavailable_benchmarks_are_left_out(provider):
+    app.DataFetcher.get_benchmarks(['SPY'])
+    provider.failing['AGG'] = KeyError('AGG')
+    benchmarks = app.DataFetcher.get_benchmarks(['SPY', '60/40'])
+    
+    assert list(benchmarks) == ['SPY']
+    assert st.session_state.fetch_errors['benchmark:60/40'] == 'not found'
+
+
+# ============================================================================
+# OPTIONS
+# ============================================================================
+
+def test_option_chains_load_one_expiry_at_a_time(provider):
+    chains = app.DataFetcher.get_options_chain('aapl')
+    assert len(chains) == 8 and provider.count('option_chain') == 0
+    
+    expiry = list(chains)[0]
+    chain = chains[expiry]
+    assert provider.count('option_chain') == 1
+    assert chain['calls']['strike'].is_monotonic_increasing
+    
+    # Reads of the same expiry, from this chain or a new one, come from the cache
+    assert app.DataFetcher.get_options_chain('AAPL')[expiry]['puts'] is chain['puts']
+    assert provider.count('options') == 1 and provider.count('option_chain') == 1
+    
+    with pytest.raises(KeyError):
+        chains['1999-01-01']
+
+
+def test_option_strike_range(provider):
+    chains = app.DataFetcher.get_options_chain('AAPL')
+    expiry = list(chains)[0]
+    strikes = chains[expiry]['calls']['strike']
+    low, high = strikes.iloc[10], strikes.iloc[20]
+    
+    window = chains.strike_range(expiry, low, high)
+    assert window['calls']['strike'].tolist() == strikes.iloc[10:21].tolist()
+    assert window['puts']['strike'].between(low, high).all()
+
+
+def test_option_failures_record_a_reason(provider, monkeypatch):
+    assert app.DataFetcher.get_options_chain('BTC') is None
+    
+    provider.failing['NOPE'] = KeyError('options')
+    assert app.DataFetcher.get_options_chain('NOPE') is None
+    assert st.session_state.fetch_errors['options:NOPE'] == 'error'
+    
+    def broken(symbol, expiry):
+        raise ValueError('malformed chain')
+    
+    monkeypatch.setattr(provider.inner, 'option_chain', broken)
+    chains = app.DataFetcher.get_options_chain('MSFT')
+    assert chains[list(chains)[0]] is None
+    assert st.session_state.fetch_errors['options:MSFT'] == 'error'
+
+
+# ============================================================================
+# NEWS
+# ============================================================================
+
+def test_news_feed_merges_shared_stories(provider):
+    news = app.NewsAggregator()
+    assert news.refresh(['AAPL', 'msft']) == {}
+    
+    stories, total = news.page(['AAPL', 'MSFT'], 0, 100)
+    # Five stories per ticker plus one market wrap returned for both
+    assert total == len(stories) == 11
+    wrap = [story for story in stories if story['id'].startswith('wrap-')]
+    assert len(wrap) == 1 and wrap[0]['tickers'] == ('AAPL', 'MSFT')
+    assert news.page(['MSFT'])[1] == 6
+    
+    published = [story['published'] for story in stories]
+    assert published == sorted(published, reverse=True)
+
+
+def test_news_pages_are_slices_of_the_feed(provider):
+    news = app.NewsAggregator()
+    news.refresh(['AAPL', 'MSFT', 'NVDA'])
+    everything, total = news.page(['AAPL', 'MSFT', 'NVDA'], 0, 100)
+    
+    pages = [news.page(['AAPL', 'MSFT', 'NVDA'], offset, 4) for offset in range(0, total, 4)]
+    assert all(count == total for _, count in pages)
+    assert [story['id'] for page, _ in pages for story in page] == [story['id'] for story in everything]
+
+
+def test_news_is_refetched_only_once_expired(provider):
+    news = app.NewsAggregator()
+    provider.failing['NOPE'] = KeyError('news')
+    
+    assert news.refresh(['AAPL', 'NOPE']) == {'NOPE': 'error'}
+    assert news.unfetched(['AAPL', 'NOPE', 'MSFT']) == ['MSFT']
+    
+    news.refresh(['AAPL'])
+    assert provider.count('news') == 2
+    
+    news.invalidate(['aapl'])
+    news.refresh(['AAPL'])
+    assert provider.count('news') == 3
+    assert news.page(['AAPL'])[1] == 6
+
+
+def test_news_parses_the_flat_layout():
+    story = app.NewsAggregator.parse({
+        'uuid': 'abc', 'title': 'Flat', 'publisher': 'Wire', 'link': 'https://example.com/flat',
+        'providerPublishTime': 1_700_000_000, 'type': 'STORY',
+    })
+    assert story['id'] == 'abc' and story['publisher'] == 'Wire' and story['link'] == 'https://example.com/flat'
+    assert story['published'] == datetime.fromtimestamp(1_700_000_000)
+    assert app.NewsAggregator.parse({'content': {}}) is None
+
+
+# ============================================================================
+# UPSTREAM PROTECTION
+# ============================================================================
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays the guard sleeps for, without sleeping or jitter"""
+    slept = []
+    monkeypatch.setattr(app.time, 'sleep', slept.append)
+    monkeypatch.setattr(app.random, 'uniform', lambda low, high: 1.0)
+    return slept
+
+
+def failing(*errors):
+    """A call that raises these errors in turn, then returns 'ok'"""
+    
+    remaining = list(errors)
+    calls = []
+    
+    def call():
+        calls.append(1)
+        if remaining:
+            raise remaining.pop(0)
+        return 'ok'
+    
+    call.calls = calls
+    return call
+
+
+def test_guard_retries_with_exponential_backoff(sleeps):
+    guard = app.UpstreamGuard(rate_limited=False)
+    call = failing(ConnectionError(), RuntimeError('429 Too Many Requests'))
+    
+    assert guard.call(call) == 'ok'
+    assert sleeps == [0.5, 1.0]
+    assert guard.stats()['retries'] == 2
+    assert guard.stats()['throttled'] == 1 and guard.stats()['errors'] == 1
+
+
+def test_guard_gives_up_after_max_retries(sleeps):
+    guard = app.UpstreamGuard(rate_limited=False)
+    call = failing(*[ConnectionError()] * 10)
+    
+    with pytest.raises(app.UpstreamError) as error:
+        guard.call(call)
+    assert error.value.reason == 'network'
+    assert len(call.calls) == guard.MAX_RETRIES + 1
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_guard_does_not_retry_other_errors(sleeps):
+    guard = app.UpstreamGuard(rate_limited=False)
+    call = failing(KeyError('currentPrice'))
+    
+    with pytest.raises(KeyError):
+        guard.call(call)
+    assert len(call.calls) == 1 and sleeps == []
+
+
+def test_guard_breaker_opens_and_recovers(sleeps, monkeypatch):
+    guard = app.UpstreamGuard(rate_limited=False)
+    monkeypatch.setattr(guard, 'MAX_RETRIES', 0)
+    
+    for _ in range(guard.FAILURE_THRESHOLD):
+        with pytest.raises(app.UpstreamError):
+            guard.call(failing(ConnectionError()))
+    assert guard.is_open()
+    
+    # Refused without reaching upstream
+    call = failing()
+    with pytest.raises(app.UpstreamError) as error:
+        guard.call(call)
+    assert error.value.reason == 'provider unavailable'
+    assert call.calls == [] and guard.stats()['rejected'] == 1
+    
+    guard._open_until = 0.0
+    assert guard.call(call) == 'ok'
+    assert guard.stats()['breaker'] == 'closed'
+
+
+def test_guard_rate_limit(sleeps, monkeypatch):
+    guard = app.UpstreamGuard()
+    monkeypatch.setattr(guard, 'MAX_TOKEN_WAIT', 0)
+    
+    for _ in range(guard.BURST):
+        guard.call(failing())
+    with pytest.raises(app.UpstreamError) as error:
+        guard.call(failing())
+    assert error.value.reason == 'rate limited'
+
+
+# ============================================================================
+# PRICE HISTORY
+# ============================================================================
+
+def test_history_update_downloads_only_new_bars(provider):
+    full = app.PROVIDER.inner.history('AAPL', '1y')
+    app.MARKET_CACHE.set('history:AAPL', full.iloc[:-5], ttl=-1)
+    
+    updated = app.HistoryStore.update_many(['AAPL'])['AAPL']
+    
+    assert provider.date_ranges == [{'start': full.index[-6].date()}]
+    assert np.array_equal(updated.index.values, full.index.values)
+    assert np.allclose(updated['Close'], full['Close'])
+    
+    # Unexpired histories are served without a request
+    app.HistoryStore.update_many(['AAPL'])
+    assert provider.count('download') == 1
+
+
+def test_refused_history_batch_is_not_retried_per_symbol(provider, monkeypatch):
+    monkeypatch.setattr(app.UPSTREAM, 'MAX_RETRIES', 0)
+    provider.failing['AAPL'] = RuntimeError('429 Too Many Requests')
+    
+    results = app.DataFetcher.get_data_many(['AAPL', 'MSFT'])
+    
+    assert results == {'AAPL': None, 'MSFT': None}
+    assert provider.count('download') == 1
+    assert provider.count('history') == 0
+    assert st.session_state.fetch_errors == {'AAPL': 'throttled', 'MSFT': 'throttled'}
+    assert app.DataFetcher.known_failure('MSFT') == 'throttled'
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return app.HistoryDisk(str(tmp_path))
+
+
+def test_disk_round_trip(disk):
+    hist = app.PROVIDER.history('AAPL', '1y')
+    disk.write('AAPL', hist, ttl=60)
+    
+    stored, expires_at = disk.read('AAPL')
+    assert np.array_equal(stored.index.values, hist.index.values)
+    assert np.array_equal(stored[list(hist.columns)].to_numpy(), hist.to_numpy(dtype=float))
+    assert expires_at > 0
+    assert disk.read('MSFT') == (None, 0)
+
+
+def test_disk_append_replaces_from_first_fresh_bar(disk):
+    hist = app.PROVIDER.history('AAPL', '1y')
+    disk.write('AAPL', hist.iloc[:-5], ttl=60)
+    
+    # The last stored bar was still forming: the fresh bars start on it
+    fresh = hist.iloc[-6:].copy()
+    fresh.iloc[0, fresh.columns.get_loc('Close')] += 1
+    disk.append('AAPL', fresh, ttl=60)
+    
+    stored, _ = disk.read('AAPL')
+    assert len(stored) == len(hist)
+    assert stored['Close'].iloc[-6] == hist['Close'].iloc[-6] + 1
+    assert np.array_equal(stored['Close'].to_numpy()[-5:], hist['Close'].to_numpy()[-5:])
+
+
+def test_disk_shorter_rewrite_keeps_mapped_reads(disk):
+    hist = app.PROVIDER.history('AAPL', '1y')
+    disk.write('AAPL', hist, ttl=60)
+    dates, columns, _ = disk.read_columns('AAPL')
+    
+    disk.write('AAPL', hist.tail(10), ttl=60)
+    
+    # A reader's mapping stays whole; new reads see only the new version
+    assert len(columns['Close']) == len(hist)
+    assert columns['Close'][-1] == hist['Close'].iloc[-1]
+    assert len(disk.read('AAPL')[0]) == 10
+    assert len([name for name in os.listdir(disk._path('AAPL')) if name.endswith('.bin')]) == len(disk.COLUMNS) + 1
+
+
+def test_history_survives_restart(provider):
+    hist = app.HistoryStore.update_many(['MSFT'])['MSFT']
+    downloads = provider.count('download')
+    
+    # A new process starts with an empty memory cache but the same directory
+    app.MARKET_CACHE.clear()
+    restored = app.HistoryStore.update_many(['MSFT'])['MSFT']
+    
+    assert provider.count('download') == downloads
+    assert np.array_equal(restored.index.values, hist.index.values)
+    assert np.array_equal(restored['Close'].to_numpy(), hist['Close'].to_numpy())
+
+
+
+# ============================================================================
+# BACKTESTING
+# ============================================================================
+
+ANALYZER_SETTINGS = {'take_profit_threshold': 50, 'stop_loss_threshold': -20, 'volume_spike_multiplier': 3.0}
+
+
+def scripted_series(closes, **nodes) -> app.IndicatorSeries:
+    """An indicator series over these closes with some nodes replaced by fixed arrays"""
+    
+    closes = np.asarray(closes, dtype=float)
+    index = pd.bdate_range('2024-01-01', periods=len(closes))
+    hist = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1e6}, index=index)
+    series = app.IndicatorSeries(hist)
+    for name, values in nodes.items():
+        series._values[name] = np.broadcast_to(np.asarray(values, dtype=float), len(closes)).copy()
+    return series
+
+
+def scripted_history(monkeypatch, series: app.IndicatorSeries) -> pd.DataFrame:
+    """Make the backtester read `series` and return the history it covers"""
+    monkeypatch.setattr(app.IndicatorGraph, 'series', staticmethod(lambda ticker, hist: series))
+    return pd.DataFrame({'Close': series['close']}, index=series.index)
+
+
+@pytest.mark.parametrize('score, rsi, low, high, action', [
+    (70, 25, 98, 150, 'STRONG BUY'),
+    (35, 15, 96, 150, 'STRONG BUY'),
+    (40, 25, 98, 150, 'CONSIDER BUYING'),
+    (-70, 85, 50, 101, 'STRONG SELL'),
+    (-40, 75, 50, 101, 'CONSIDER SELLING'),
+    (0, 50, 50, 150, 'HOLD'),
+])
+def test_action_rule_matches_position_analyzer(score, rsi, low, high, action):
+    series = scripted_series(np.full(25, 100.0), score=score, rsi=rsi, week_52_low=low, week_52_high=high)
+    strong_buy, strong_sell = app.Backtester.actions(*app.Backtester.action_scores(series))
+    
+    data = {'price': 100.0, 'week_52_low': low, 'week_52_high': high, 'volume': 0, 'avg_volume': 0,
+            'technicals': {'score': score, 'rsi': rsi}}
+    analysis = app.PositionAnalyzer.analyze('TEST', {'shares': 1, 'avg_cost': 100.0}, data, ANALYZER_SETTINGS)
+    assert analysis['action'] == action
+    assert (strong_buy[-1], strong_sell[-1]) == (action == 'STRONG BUY', action == 'STRONG SELL')
+
+
+def test_action_rule_trades_on_strong_signals(monkeypatch):
+    # Oversold near its low at bar 20 (RSI needs 20 bars), then doubled to a new high by bar 30
+    closes = np.r_[np.full(30, 100.0), np.full(10, 200.0)]
+    score, rsi, low = np.zeros(40), np.full(40, 50.0), np.full(40, 50.0)
+    score[20], rsi[20], low[20] = 70, 25, 98
+    high = np.r_[np.full(30, 150.0), np.full(10, 200.0)]
+    hist = scripted_history(monkeypatch, scripted_series(closes, score=score, rsi=rsi, week_52_low=low, week_52_high=high))
+    
+    result = app.Backtester.run('TEST', hist, 'action', settings=ANALYZER_SETTINGS)
+    trades = result['trades']
+    assert result['trade_count'] == 1
+    assert (trades['entry_date'][0], trades['exit_date'][0]) == (hist.index[20], hist.index[30])
+    assert trades['return_pct'][0] == pytest.approx(100)
+    
+    # Up 60% at an overbought new high: a strong sell only past the take-profit threshold
+    closes[30:], high[30:], rsi[30:] = 160, 160, 75
+    hist = scripted_history(monkeypatch, scripted_series(closes, score=score, rsi=rsi, week_52_low=low, week_52_high=high))
+    assert app.Backtester.run('TEST', hist, 'action')['trades']['exit_date'][0] == hist.index[30]
+    assert app.Backtester.run('TEST', hist, 'action', settings={'take_profit_threshold': 70})['trades']['open'][0]
+    
+    low[20] = 50
+    hist = scripted_history(monkeypatch, scripted_series(closes, score=score, rsi=rsi, week_52_low=low, week_52_high=high))
+    assert app.Backtester.run('TEST', hist, 'action')['trade_count'] == 0
+
+
+def test_score_rule_walks_from_trade_to_trade(monkeypatch):
+    score = np.array([0, 70, 80, 0, -70, -80, 65, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0], dtype=float)
+    closes = 100 + np.arange(20.0)
+    hist = scripted_history(monkeypatch, scripted_series(closes, score=score))
+    
+    trades = app.Backtester.run('TEST', hist)['trades']
+    assert trades['entry_date'].tolist() == [hist.index[1], hist.index[6]]
+    assert trades['exit_date'][0] == hist.index[4]
+    assert trades['open'].tolist() == [False, True]
+    assert trades['exit_price'][1] == closes[-1]
+    
+    higher = app.Backtester.run('TEST', hist, entry_score=75, exit_score=-75)['trades']
+    assert higher['entry_date'][0] == hist.index[2] and higher['exit_date'][0] == hist.index[5]
+
+
+def test_backtest_statistics():
+    close = np.array([100, 110, 99, 99, 120, 60], dtype=float)
+    index = pd.bdate_range('2024-01-01', periods=len(close))
+    result = app.Backtester._evaluate(index, close, np.zeros(len(close)), [(0, 2), (3, None)])
+    
+    # Held through bars 1-2, then 4-5
+    assert result['equity'].tolist() == pytest.approx([1, 1.1, 0.99, 0.99, 0.99 * 120 / 99, 0.6])
+    assert result['trades']['return_pct'].tolist() == pytest.approx([-1, 100 * (60 / 99 - 1)])
+    assert result['trade_count'] == 2 and result['hit_rate'] == 0
+    assert result['total_return'] == pytest.approx(-40)
+    assert result['buy_hold_return'] == pytest.approx(-40)
+    assert result['max_drawdown'] == pytest.approx((0.6 / (0.99 * 120 / 99) - 1) * 100)
+    assert result['exposure'] == pytest.approx(4 / 6 * 100)
+    
+    untraded = app.Backtester._evaluate(index, close, np.zeros(len(close)), [])
+    assert untraded['hit_rate'] is None and untraded['total_return'] == 0
+
+
+def test_backtest_many_tickers(provider):
+    histories = {
+        'AAPL': provider.inner.history('AAPL', '2y'),
+        'MSFT': provider.inner.history('MSFT', '2y'),
+        'NEW': provider.inner.history('NVDA', '2y').iloc[-10:],
+        'NONE': None,
+    }
+    results = app.Backtester.run_many(histories, 'score', entry_score=30, exit_score=-30)
+    assert list(results) == ['AAPL', 'MSFT']
+    
+    summary = app.Backtester.summary(results)
+    assert summary['Ticker'].tolist() == ['AAPL', 'MSFT']
+    assert summary['Trades'].tolist() == [results['AAPL']['trade_count'], results['MSFT']['trade_count']]
+    assert all(result['trade_count'] > 0 for result in results.values())
+    
+    # Entries and exits land where the vectorized score series crosses the thresholds
+    score = results['AAPL']['score']
+    trades = results['AAPL']['trades']
+    assert (score[trades['entry_date']] >= 30).all()
+    assert (score[trades['exit_date'].dropna()] <= -30).all()
+
+
+# ============================================================================
+# SCREENER
+# ============================================================================
+
+def test_screener_matches_serial_scan(provider):
+    symbols = [f"S{i:03d}" for i in range(230)] + ['BTC-USD']
+    app.HistoryStore.update_many(symbols)
+    
+    results, missing = app.Screener.run(symbols + ['NOPE'], workers=2)
+    serial = pd.DataFrame(app.Screener.scan(app.HISTORY_DISK.root, symbols), columns=app.Screener.COLUMNS)
+    
+    assert missing == ['NOPE']
+    assert results[app.Screener.COLUMNS].equals(serial)
+    
+    # Scores from the stored window agree with the engine on the cached history
+    hist = app.HistoryStore.update_many(['S005'])['S005']
+    row = results.set_index('Symbol').loc['S005']
+    technicals = app.TechnicalEngine.compute(hist, hist['Close'].iloc[-1])
+    assert same(technicals['score'], row['Score'])
+    assert same(technicals['rsi'], row['RSI'])
+
+
+def test_screener_universe_files(tmp_path):
+    listing = tmp_path / 'universe.csv'
+    listing.write_text("Name,Symbol\nApple,aapl\nMicrosoft,MSFT\nApple again,AAPL\n")
+    assert app.Screener.load_universe(str(listing)) == ['AAPL', 'MSFT']
+    
+    plain = tmp_path / 'universe.txt'
+    plain.write_text("# megacaps\nAAPL, MSFT\nnvda  # chips\n")
+    assert app.Screener.load_universe(str(plain)) == ['AAPL', 'MSFT', 'NVDA']
+
+
+# ============================================================================
+# PAGE
+# ============================================================================
+
+def test_auto_refresh_does_not_block_the_page(provider):
+    from streamlit.testing.v1 import AppTest
+    
+    page = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'), default_timeout=60)
+    page.session_state['portfolios'] = {'Main Portfolio': {'AAPL': {'shares': 10, 'avg_cost': 100.0}}}
+    page.session_state['active_portfolio'] = 'Main Portfolio'
+    page.session_state['auto_refresh'] = True
+    page.session_state['refresh_interval'] = 300
+    
+    started = time.monotonic()
+    page.run()
+    
+    # The whole page renders at once; the watcher fragment schedules the next refresh
+    assert time.monotonic() - started < 60
+    assert not page.exception
+    assert page.session_state['last_refresh'] is not None